@@ -17,6 +17,8 @@ LIMIT="${3:-50}"
 ./bin/restart_8090.sh
 ./bin/routes_contract.sh >/dev/null
 ./bin/smoke_publish_ci.sh "${RUN_ID}"
+./bin/smoke_ingest_ci.sh
+./bin/smoke_runs_registry_ci.sh
 ./bin/smoke_all.sh "${PATTERN}" "${LIMIT}"
 
 echo "PASS ci run_id=${RUN_ID} pattern=${PATTERN} limit=${LIMIT}"
@@ -17,6 +17,8 @@ set +a
 tail -n 5 /tmp/routes_contract.out | grep -q "OK" || { echo "FAIL preflight routes_contract"; exit 1; }
 
 ./bin/smoke_publish_ci.sh "${RUN_ID}"
+./bin/smoke_ingest_ci.sh
+./bin/smoke_runs_registry_ci.sh
 
 ./bin/smoke_all.sh "${PATTERN}" "${LIMIT}"
 
@@ -25,6 +25,11 @@ required=[
   ("GET","/runs/published/{run_id}/pdf"),
   ("GET","/runs/published/{run_id}/proof"),
   ("GET","/admin/force/status"),
+  ("POST","/events/ingest"),
+  ("POST","/events/ingest_batch"),
+  ("GET","/loe/signals"),
+  ("POST","/runs/register_batch"),
+  ("GET","/runs"),
 ]
 
 present=set(bucket.keys())
@@ -0,0 +1,45 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# ingest -> dedup -> LOE: a fresh run gets one event twice (second is a duplicate),
+# then a batch repeating it plus a new one; /loe/signals must count exactly 2 events.
+
+BASE_URL="${BASE_URL:-http://127.0.0.1:8090}"
+TAG="smoke_$(date -u +"%Y%m%dT%H%M%SZ")_$$"
+RUN_ID="${TAG}_run"
+APP_ID="smoke_ingest"
+
+json_get() {
+  # json_get '<json>' <python expression over d>
+  JSON_IN="$1" python3 -c "import json,os; d=json.loads(os.environ['JSON_IN']); print($2)"
+}
+
+fail() {
+  echo "FAIL smoke_ingest ${RUN_ID} $1"
+  exit 1
+}
+
+# registered first so the smoke also passes with RUN_REGISTRY_STRICT=1
+REG="$(curl -sS -X POST "${BASE_URL}/runs/register" -H "content-type: application/json" \
+  -d "{\"run_id\": \"${RUN_ID}\", \"app_id\": \"${APP_ID}\", \"mode\": \"dev\"}")"
+[ "$(json_get "${REG}" 'd.get("ok")')" = "True" ] || fail "register"
+
+EVENT="{\"event_id\": \"${TAG}_e1\", \"action\": \"step\", \"context\": {\"app_id\": \"${APP_ID}\", \"run_id\": \"${RUN_ID}\", \"step_id\": \"s1\"}, \"metrics\": {\"duration_ms\": 120}}"
+EVENT2="{\"event_id\": \"${TAG}_e2\", \"action\": \"step\", \"context\": {\"app_id\": \"${APP_ID}\", \"run_id\": \"${RUN_ID}\", \"step_id\": \"s2\"}, \"metrics\": {\"duration_ms\": 80}}"
+
+ONE="$(curl -sS -X POST "${BASE_URL}/events/ingest" -H "content-type: application/json" -d "{\"event\": ${EVENT}}")"
+[ "$(json_get "${ONE}" 'd.get("duplicate")')" = "False" ] || fail "first_ingest_not_fresh"
+
+AGAIN="$(curl -sS -X POST "${BASE_URL}/events/ingest" -H "content-type: application/json" -d "{\"event\": ${EVENT}}")"
+[ "$(json_get "${AGAIN}" 'd.get("duplicate")')" = "True" ] || fail "retry_not_duplicate"
+
+BATCH="$(printf '%s\n%s\n' "${EVENT}" "${EVENT2}" | curl -sS -X POST "${BASE_URL}/events/ingest_batch" \
+  -H "content-type: application/x-ndjson" --data-binary @-)"
+[ "$(json_get "${BATCH}" '(d.get("accepted"), d.get("duplicates"), d.get("rejected"))')" = "(2, 1, 0)" ] \
+  || fail "batch_counts"
+
+LOE="$(curl -sS "${BASE_URL}/loe/signals?run_id=${RUN_ID}")"
+SEEN="$(json_get "${LOE}" 'd["derived"]["events_seen_after_filter"]')"
+[ "${SEEN}" = "2" ] || fail "loe_seen=${SEEN}"
+
+echo "PASS smoke_ingest ${RUN_ID}"
@@ -0,0 +1,55 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# register_batch -> list_runs cursor paging: a fresh app gets 5 runs in one batch;
+# paging /runs by 2 must return each of them exactly once over 3 pages.
+
+BASE_URL="${BASE_URL:-http://127.0.0.1:8090}"
+APP_ID="smoke_$(date -u +"%Y%m%dT%H%M%SZ")_$$"
+
+fail() {
+  echo "FAIL smoke_runs_registry ${APP_ID} $1"
+  exit 1
+}
+
+BODY="$(APP_ID="${APP_ID}" python3 -c '
+import json, os
+app = os.environ["APP_ID"]
+print(json.dumps({"runs": [{"run_id": f"{app}_r{i}", "app_id": app, "mode": "dev", "meta": {"site": "smoke"}} for i in range(5)]}))
+')"
+REG="$(curl -sS -X POST "${BASE_URL}/runs/register_batch" -H "content-type: application/json" -d "${BODY}")"
+COUNT="$(JSON_IN="${REG}" python3 -c 'import json,os; d=json.loads(os.environ["JSON_IN"]); print(d.get("count") if d.get("ok") else -1)')"
+[ "${COUNT}" = "5" ] || fail "register_batch count=${COUNT}"
+
+SEEN=""
+PAGES=0
+CURSOR=""
+while :; do
+  PAGES=$((PAGES+1))
+  [ "${PAGES}" -le 10 ] || fail "cursor_loop"
+  PAGE="$(curl -sS -G "${BASE_URL}/runs" --data-urlencode "app_id=${APP_ID}" --data-urlencode "limit=2" \
+    ${CURSOR:+--data-urlencode "cursor=${CURSOR}"})"
+  OUT="$(JSON_IN="${PAGE}" python3 -c '
+import json, os
+d = json.loads(os.environ["JSON_IN"])
+if not d.get("ok"):
+    raise SystemExit(1)
+print(d.get("next_cursor") or "")
+print(" ".join(r["run_id"] for r in d["runs"]))
+')" || fail "list_runs_error page=${PAGES}"
+  CURSOR="$(echo "${OUT}" | head -n 1)"
+  SEEN="${SEEN} $(echo "${OUT}" | tail -n 1)"
+  [ -n "${CURSOR}" ] || break
+done
+
+CHECK="$(SEEN="${SEEN}" APP_ID="${APP_ID}" python3 -c '
+import os
+seen = os.environ["SEEN"].split()
+app = os.environ["APP_ID"]
+want = [f"{app}_r{i}" for i in range(5)]
+print("ok" if len(seen) == len(set(seen)) == 5 and set(seen) == set(want) else "runs=" + ",".join(seen))
+')"
+[ "${CHECK}" = "ok" ] || fail "${CHECK}"
+[ "${PAGES}" = "3" ] || fail "pages=${PAGES}"
+
+echo "PASS smoke_runs_registry ${APP_ID} pages=${PAGES}"
@@ -1,12 +1,13 @@
 import json
 from pathlib import Path
-from threading import Lock
+
+from fabric.file_lock import atomic_write_text, file_lock
 
 BASE = Path(__file__).resolve().parent.parent / "db"
 AGENT_FLAGS = BASE / "agent_flags.json"
 LAYER_FLAGS = BASE / "layer_flags.json"
 
-_lock = Lock()
+_lock = file_lock("agent_flags")
 
 def _read(path: Path) -> dict:
     if not path.exists():
@@ -19,7 +20,7 @@ def _read(path: Path) -> dict:
 
 def _write(path: Path, data: dict):
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+    atomic_write_text(path, json.dumps(data, indent=2, sort_keys=True) + "\n")
 
 def _normalize_disabled_only(flags: dict) -> dict:
     out = {}
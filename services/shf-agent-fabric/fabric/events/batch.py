@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fabric.events.schema import normalize_event
+from fabric.run_ledger import write_normalized_events
+from fabric.runs_registry.store import runs_exist
+
+MAX_BATCH_EVENTS = 50000
+# request body cap for /events/ingest_batch (checked on Content-Length and while streaming)
+MAX_BATCH_BYTES = 64 * 1024 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+class BatchParser:
+    """
+    Incremental parser for a streamed batch body: NDJSON (one event per line)
+    or a single JSON array of events. Feed raw byte chunks; yields
+    (item_no, value, error) as soon as each item is complete. item_no is 1-based
+    (the line number for NDJSON, the element number for arrays).
+    """
+
+    def __init__(self) -> None:
+        self._utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buf = ""
+        self._mode: Optional[str] = None  # "ndjson" | "array"
+        self._line = 0
+        self._item = 0
+        self._array_done = False
+
+    def feed(self, chunk: bytes, final: bool = False) -> Iterator[Tuple[int, Any, Optional[str]]]:
+        self._buf += self._utf8.decode(chunk, final=final)
+        if self._mode is None:
+            stripped = self._buf.lstrip()
+            if not stripped:
+                return
+            self._mode = "array" if stripped[0] == "[" else "ndjson"
+            if self._mode == "array":
+                self._buf = stripped[1:]
+        if self._mode == "ndjson":
+            yield from self._feed_ndjson(final)
+        else:
+            yield from self._feed_array(final)
+
+    def _feed_ndjson(self, final: bool) -> Iterator[Tuple[int, Any, Optional[str]]]:
+        lines = self._buf.split("\n")
+        self._buf = "" if final else lines.pop()
+        for line in lines:
+            self._line += 1
+            if not line.strip():
+                continue
+            try:
+                yield self._line, json.loads(line), None
+            except Exception as e:
+                yield self._line, None, f"INVALID_JSON: {e}"
+
+    def _feed_array(self, final: bool) -> Iterator[Tuple[int, Any, Optional[str]]]:
+        buf = self._buf
+        n = len(buf)
+        pos = 0
+        while not self._array_done:
+            while pos < n and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= n:
+                if final:
+                    self._item += 1
+                    yield self._item, None, "INVALID_JSON: unterminated array"
+                    self._array_done = True
+                break
+            if buf[pos] == "]":
+                self._array_done = True
+                pos = n
+                break
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except ValueError as e:
+                if final:
+                    self._item += 1
+                    yield self._item, None, f"INVALID_JSON: {e}"
+                    self._array_done = True
+                    pos = n
+                break  # element not complete yet
+            pos = end
+            self._item += 1
+            yield self._item, value, None
+        self._buf = buf[pos:]
+
+
+def _unwrap(value: Any) -> Any:
+    # Accept the single-ingest envelope ({"event": {...}}) as well as bare events.
+    if isinstance(value, dict) and set(value.keys()) == {"event"} and isinstance(value.get("event"), dict):
+        return value["event"]
+    return value
+
+
+def ingest_batch(items: List[Tuple[int, Any, Optional[str]]], strict: bool, durable: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Normalizes every item once, checks run_ids against the registry in one batched
+    query (strict mode), and appends all valid events in a single ledger write.
+    Events already ingested (same event_id) are accepted with duplicate=True but not
+    written again. Returns per-item accept/reject results.
+    """
+    results: List[Dict[str, Any]] = []
+    accepted: List[Tuple[int, Dict[str, Any]]] = []
+
+    for item_no, value, err in items:
+        if err:
+            results.append({"line": item_no, "ok": False, "error": err})
+            continue
+        value = _unwrap(value)
+        if not isinstance(value, dict):
+            results.append({"line": item_no, "ok": False, "error": "EVENT_NOT_OBJECT"})
+            continue
+        if len(accepted) >= MAX_BATCH_EVENTS:
+            results.append({"line": item_no, "ok": False, "error": "BATCH_TOO_LARGE"})
+            continue
+        accepted.append((item_no, normalize_event(value)))
+
+    if strict:
+        known = runs_exist(
+            (n.get("context") or {}).get("run_id") for _, n in accepted
+        )
+        kept: List[Tuple[int, Dict[str, Any]]] = []
+        for item_no, norm in accepted:
+            run_id = (norm.get("context") or {}).get("run_id")
+            if not isinstance(run_id, str) or not run_id.strip():
+                results.append({"line": item_no, "ok": False, "error": "MISSING_RUN_ID"})
+            elif run_id not in known:
+                results.append({"line": item_no, "ok": False, "error": "UNKNOWN_RUN_ID", "run_id": run_id})
+            else:
+                kept.append((item_no, norm))
+        accepted = kept
+
+    written = write_normalized_events([n for _, n in accepted], durable=durable)
+    duplicates = set(written["duplicates"])
+    for i, (item_no, norm) in enumerate(accepted):
+        results.append({"line": item_no, "ok": True, "event_id": norm.get("event_id"), "duplicate": i in duplicates})
+
+    results.sort(key=lambda r: r["line"])
+    return {
+        "ok": True,
+        "accepted": len(accepted),
+        "duplicates": len(duplicates),
+        "rejected": len(results) - len(accepted),
+        "results": results,
+    }
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import uuid
+from typing import Any, Dict, Optional
+
+from fabric.events.schema import _str, normalize_event
+
+# Fixed namespace so the same legacy record always gets the same event_id
+# (re-running a compaction or merge does not mint new ids).
+LEGACY_ID_NAMESPACE = uuid.UUID("7f1c2a4e-5b1d-4c55-9a3e-2d6f0b8c9e11")
+
+# Older writers named the action `kind` (/runs/execute log) or `route` (/run).
+LEGACY_ACTION_KEYS = ("kind", "route")
+
+# Keys normalize_event reads; everything else in a legacy record is kept under `detail`.
+_NORMALIZED_KEYS = frozenset(
+    (
+        "schema_version", "event_id", "id", "ts", "ts_ms", "timestamp",
+        "actor_type", "actor", "action", "event", "type",
+        "context", "metrics", "flags", "outcome", "detail", "_raw",
+        "app_id", "app", "appId", "program_id", "program", "programId",
+        "plan_id", "plan", "planId", "run_id", "run", "runId",
+        "step_id", "step", "stepId", "session_id", "session", "sessionId",
+        "cohort_id", "cohort", "cohortId",
+        "duration_ms", "elapsed_ms", "ms", "cost_usd", "cost", "effort",
+        "manual_override", "manual", "reward", "first_reward", "pilot_mode",
+    )
+)
+
+
+def legacy_event_id(rec: Dict[str, Any]) -> str:
+    body = json.dumps(rec, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return str(uuid.uuid5(LEGACY_ID_NAMESPACE, body))
+
+
+def is_canonical(rec: Any) -> bool:
+    return isinstance(rec, dict) and rec.get("schema_version") == 1
+
+
+def upgrade_event(rec: Any) -> Optional[Dict[str, Any]]:
+    """
+    Canonical form of a legacy ledger / execution-log record, or None if it cannot be
+    classified (not an object, or no action under any known key).
+
+    Records without an id get a deterministic one derived from their content. Fields the
+    canonical schema has no slot for (agent names, messages, artifacts, ...) are kept
+    under `detail`. Canonical records are returned unchanged.
+    """
+    if not isinstance(rec, dict):
+        return None
+    if is_canonical(rec):
+        return rec
+    e = dict(rec)
+    used = set()
+    if not any(_str(e.get(k)) for k in ("action", "event", "type")):
+        for k in LEGACY_ACTION_KEYS:
+            if _str(e.get(k)):
+                e["action"] = _str(e.get(k))
+                used.add(k)
+                break
+        else:
+            return None
+    if not (_str(e.get("event_id")) or _str(e.get("id"))):
+        e["event_id"] = legacy_event_id(rec)
+    # legacy records without a timestamp cannot be placed in time; don't stamp them "now"
+    if not (_str(e.get("ts")) or _str(e.get("timestamp"))):
+        return None
+
+    norm = normalize_event(e)
+    detail = dict(rec.get("detail")) if isinstance(rec.get("detail"), dict) else {}
+    for k, v in rec.items():
+        if k not in _NORMALIZED_KEYS and k not in used and v is not None:
+            detail.setdefault(k, v)
+    if detail:
+        norm["detail"] = detail
+    return norm
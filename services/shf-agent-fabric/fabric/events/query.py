@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from fabric.events.schema import event_ts_ms, parse_ts_ms
+from fabric.ledger.follower import format_cursor, parse_cursor
+from fabric.ledger.scan import field_pattern
+from fabric.ledger.segments import INDEX_FIELDS, query_events
+
+MAX_QUERY_LIMIT = 1000
+MAX_PROJECTION_FIELDS = 50
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[List[str]]]:
+    """'event_id,ts,context.run_id' -> dotted paths split into keys; None/'' -> whole records."""
+    if fields is None or not fields.strip():
+        return None
+    paths = []
+    for f in fields.split(","):
+        f = f.strip()
+        if not f:
+            continue
+        parts = f.split(".")
+        if any(not p for p in parts):
+            raise ValueError("INVALID_FIELDS")
+        paths.append(parts)
+    if not paths or len(paths) > MAX_PROJECTION_FIELDS:
+        raise ValueError("INVALID_FIELDS")
+    return paths
+
+
+def project(e: Dict[str, Any], paths: List[List[str]]) -> Dict[str, Any]:
+    """The parts of `e` named by `paths`, nested as in the record; missing paths are left out."""
+    out: Dict[str, Any] = {}
+    for parts in paths:
+        cur: Any = e
+        for p in parts:
+            if not isinstance(cur, dict) or p not in cur:
+                break
+            cur = cur[p]
+        else:
+            dst = out
+            for p in parts[:-1]:
+                nxt = dst.get(p)
+                if not isinstance(nxt, dict):
+                    nxt = dst[p] = {}
+                dst = nxt
+            dst[parts[-1]] = cur
+    return out
+
+
+def run_query(
+    context: Dict[str, Optional[str]],
+    actor_type: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    fields: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One page of ledger records, oldest-first, matching exact context keys
+    ({INDEX_FIELDS key: value}), actor_type, action and ts in [since, until).
+
+    Context keys are looked up in the segment postings and the time range prunes segments
+    and blocks, so only candidate lines are read; action (or actor_type) is matched on
+    the raw bytes before decoding. `cursor` is the `next_cursor` of the previous page
+    (a ledger position, the same form /events/stream uses). Raises ValueError with an
+    error code for bad input.
+    """
+    keys = {k: v for k, v in context.items() if v}
+    if any(k not in INDEX_FIELDS for k in keys):
+        raise ValueError("UNSUPPORTED_FILTER")
+    since_ms = parse_ts_ms(since) if since else None
+    if since and since_ms is None:
+        raise ValueError("INVALID_SINCE")
+    until_ms = parse_ts_ms(until) if until else None
+    if until and until_ms is None:
+        raise ValueError("INVALID_UNTIL")
+    after = parse_cursor(cursor)
+    paths = parse_fields(fields)
+    limit = max(1, min(int(limit), MAX_QUERY_LIMIT))
+
+    def match(e: Any) -> bool:
+        if not isinstance(e, dict):
+            return False
+        if keys:
+            ctx = e.get("context")
+            if not isinstance(ctx, dict) or any(ctx.get(k) != v for k, v in keys.items()):
+                return False
+        if action and e.get("action") != action:
+            return False
+        if actor_type and e.get("actor_type") != actor_type:
+            return False
+        if since_ms is not None or until_ms is not None:
+            ts = event_ts_ms(e)
+            if ts is None:
+                return False
+            if since_ms is not None and ts < since_ms:
+                return False
+            if until_ms is not None and ts >= until_ms:
+                return False
+        return True
+
+    prefilter = field_pattern("action", [action]) if action else None
+    if prefilter is None and actor_type:
+        prefilter = field_pattern("actor_type", [actor_type])
+
+    rows, next_after, stats = query_events(
+        keys=keys,
+        since_ms=since_ms,
+        until_ms=until_ms,
+        after=after,
+        limit=limit,
+        match=match,
+        prefilter=prefilter,
+    )
+    events = [project(e, paths) if paths is not None else e for _, e in rows]
+    return {
+        "ok": True,
+        "count": len(events),
+        "events": events,
+        "next_cursor": format_cursor(next_after) if next_after is not None else None,
+        "stats": stats,
+    }
@@ -1,15 +1,53 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import os
 import uuid
 
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MS = timedelta(milliseconds=1)
+
+
 def _utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+def parse_ts_ms(ts: Any) -> Optional[int]:
+    """
+    Parses ISO timestamps (Z suffix, offset, or naive=UTC) into UTC epoch milliseconds.
+    Returns None if the value is missing or unparseable.
+    """
+    if not isinstance(ts, str) or not ts.strip():
+        return None
+    s = ts.strip()
+    try:
+        if s.endswith("Z"):
+            s = s[:-1] + "+00:00"
+        dt = datetime.fromisoformat(s)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return (dt - _EPOCH) // _MS
+    except Exception:
+        return None
+
+
+def event_ts_ms(e: Dict[str, Any]) -> Optional[int]:
+    """
+    Event time in UTC epoch ms: the precomputed `ts_ms` when present, else parsed from `ts`
+    (events written before ts_ms existed, until backfilled).
+    """
+    v = e.get("ts_ms")
+    if isinstance(v, int) and not isinstance(v, bool):
+        return v
+    return parse_ts_ms(e.get("ts"))
+
+
 def _str(x: Any) -> Optional[str]:
     if x is None:
         return None
@@ -54,20 +92,243 @@ def _get_context(e: Dict[str, Any]) -> Dict[str, Any]:
     return {}
 
 
+ACTOR_TYPES = ("student", "staff", "employer", "agency", "system", "unknown")
+CONTEXT_KEYS = ("app_id", "program_id", "plan_id", "run_id", "step_id", "session_id", "cohort_id")
+
+# Top-level keys a canonical event may carry. Anything else (legacy aliases such as
+# `app`, `ms`, `manual`, or a stored `_raw`) sends the event through the full normalizer.
+_CANONICAL_KEYS = frozenset(
+    ("schema_version", "event_id", "ts", "ts_ms", "actor_type", "action", "context", "metrics", "flags", "outcome", "detail")
+)
+
+
+def _clean_str(x: Any) -> bool:
+    return isinstance(x, str) and bool(x) and x == x.strip()
+
+
+def _canonical(e: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Pass-through for events already in canonical form (schema_version=1, well-typed
+    fields, no legacy aliases): validates them and recomputes ts_ms, returning exactly
+    what the full normalizer would. The context/metrics/flags dicts are shared with the
+    input, not copied. Returns None when the event needs full normalization.
+    """
+    sv = e.get("schema_version")
+    if sv != 1 or isinstance(sv, bool) or not _CANONICAL_KEYS.issuperset(e):
+        return None
+    event_id, ts, actor_type, action = e.get("event_id"), e.get("ts"), e.get("actor_type"), e.get("action")
+    if not (_clean_str(event_id) and _clean_str(ts) and _clean_str(action)) or actor_type not in ACTOR_TYPES:
+        return None
+    ctx = e.get("context", {})
+    metrics = e.get("metrics", {})
+    flags = e.get("flags", {})
+    detail = e.get("detail")
+    if not (isinstance(ctx, dict) and isinstance(metrics, dict) and isinstance(flags, dict)):
+        return None
+    if detail is not None and not isinstance(detail, dict):
+        return None
+    for k, v in ctx.items():
+        if k not in CONTEXT_KEYS or not _clean_str(v):
+            return None
+    outcome = e.get("outcome")
+    if outcome is not None and not _clean_str(outcome):
+        return None
+
+    out = {
+        "schema_version": 1,
+        "event_id": event_id,
+        "ts": ts,
+        "actor_type": actor_type,
+        "action": action,
+        "context": ctx,
+        "metrics": metrics,
+        "flags": flags,
+    }
+    if outcome is not None:
+        out["outcome"] = outcome
+    if detail:
+        out["detail"] = detail
+    ts_ms = parse_ts_ms(ts)
+    if ts_ms is not None:
+        out["ts_ms"] = ts_ms
+    return out
+
+
+# --- per-producer shape adapters ---
+
+SHAPES_PATH = Path(
+    os.getenv("EVENT_SHAPES_PATH") or Path(__file__).resolve().parents[2] / "registry" / "event_shapes.json"
+)
+
+
+def _actor(x: Any) -> Optional[str]:
+    v = _str(x)
+    v = v.lower() if v else None
+    return v if v in ACTOR_TYPES else None
+
+
+def _coercer(target: str) -> Callable[[Any], Any]:
+    if target == "actor_type":
+        return _actor
+    if target.startswith("metrics."):
+        return _num
+    if target.startswith("flags."):
+        return _bool
+    return _str
+
+
+@dataclass(frozen=True)
+class EventShape:
+    """
+    Fixed field layout of one producer's events, keyed by its app_id.
+
+    `fields` maps canonical targets ("event_id", "ts", "actor_type", "action", "outcome",
+    "context.<key>", "metrics.<key>", "flags.<key>") to the producer's top-level key.
+    Unmapped fields get the normalizer's defaults; context.app_id defaults to app_id.
+    """
+
+    app_id: str
+    fields: Dict[str, str]
+
+    def compile(self) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        top: List[Tuple[str, str, Callable[[Any], Any]]] = []
+        nested: List[Tuple[str, str, str, Callable[[Any], Any]]] = []
+        for target, source in self.fields.items():
+            group, _, key = target.partition(".")
+            if key and group in ("context", "metrics", "flags"):
+                if group == "context" and key not in CONTEXT_KEYS:
+                    raise ValueError(f"UNKNOWN_CONTEXT_KEY: {key}")
+                nested.append((group, key, source, _coercer(target)))
+            elif not key and target in ("event_id", "ts", "actor_type", "action", "outcome"):
+                top.append((target, source, _coercer(target)))
+            else:
+                raise ValueError(f"UNKNOWN_SHAPE_TARGET: {target}")
+        app_id = self.app_id
+
+        def adapt(e: Dict[str, Any]) -> Dict[str, Any]:
+            vals: Dict[str, Any] = {}
+            for target, source, coerce in top:
+                v = coerce(e.get(source))
+                if v is not None:
+                    vals[target] = v
+            groups: Dict[str, Dict[str, Any]] = {"context": {}, "metrics": {}, "flags": {}}
+            for group, key, source, coerce in nested:
+                v = coerce(e.get(source))
+                if v is not None:
+                    groups[group][key] = v
+            groups["context"].setdefault("app_id", app_id)
+            ts = vals.get("ts") or _utc_iso()
+            out = {
+                "schema_version": 1,
+                "event_id": vals.get("event_id") or str(uuid.uuid4()),
+                "ts": ts,
+                "actor_type": vals.get("actor_type") or "unknown",
+                "action": vals.get("action") or "unknown",
+                "context": groups["context"],
+                "metrics": groups["metrics"],
+                "flags": groups["flags"],
+            }
+            if "outcome" in vals:
+                out["outcome"] = vals["outcome"]
+            ts_ms = parse_ts_ms(ts)
+            if ts_ms is not None:
+                out["ts_ms"] = ts_ms
+            return out
+
+        return adapt
+
+
+_adapters: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+_shapes: Dict[str, EventShape] = {}
+_shapes_lock = Lock()
+_shapes_loaded = False
+
+
+def register_shape(shape: EventShape) -> None:
+    """Registers (or replaces) the adapter for shape.app_id. Raises ValueError on bad targets."""
+    adapter = shape.compile()
+    with _shapes_lock:
+        _shapes[shape.app_id] = shape
+        _adapters[shape.app_id] = adapter
+
+
+def load_shapes(path: Path = SHAPES_PATH) -> int:
+    """
+    Loads shapes from a JSON file: {"<app_id>": {"fields": {"<target>": "<source key>"}}}.
+    A missing file registers nothing; invalid entries are skipped. Returns the count loaded.
+    """
+    global _shapes_loaded
+    _shapes_loaded = True
+    try:
+        data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    except Exception:
+        return 0
+    n = 0
+    for app_id, spec in (data.items() if isinstance(data, dict) else []):
+        fields = spec.get("fields") if isinstance(spec, dict) else None
+        if not isinstance(fields, dict):
+            continue
+        try:
+            register_shape(EventShape(app_id=str(app_id), fields={str(k): str(v) for k, v in fields.items()}))
+            n += 1
+        except ValueError:
+            continue
+    return n
+
+
+def list_shapes() -> Dict[str, Dict[str, str]]:
+    if not _shapes_loaded:
+        load_shapes()
+    with _shapes_lock:
+        return {app_id: dict(s.fields) for app_id, s in _shapes.items()}
+
+
+def _adapter_for(e: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    if not _shapes_loaded:
+        load_shapes()
+    if not _adapters:
+        return None
+    app_id = e.get("app_id")
+    if not isinstance(app_id, str):
+        ctx = e.get("context")
+        app_id = ctx.get("app_id") if isinstance(ctx, dict) else None
+    return _adapters.get(app_id) if isinstance(app_id, str) else None
+
+
 def normalize_event(raw: Dict[str, Any]) -> Dict[str, Any]:
     """
     Canonical SHF event schema (event-first architecture).
+
+    Already-canonical events are validated and passed through; events from a producer
+    with a registered EventShape (by app_id) are mapped directly; everything else goes
+    through the full alias-aware normalizer below.
+    """
+    if isinstance(raw, dict):
+        out = _canonical(raw)
+        if out is not None:
+            return out
+        adapter = _adapter_for(raw)
+        if adapter is not None:
+            return adapter(raw)
+    return _normalize_generic(raw)
+
+
+def _normalize_generic(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Full normalizer for legacy / loosely-shaped events.
     Backward compatible: preserves original keys under `_raw` if needed.
 
     Canonical fields:
       - event_id: str (uuid)
       - ts: str (UTC ISO Z)
+      - ts_ms: int (UTC epoch ms of ts, computed once here; omitted if ts is unparseable)
       - actor_type: str (student|staff|employer|agency|system|unknown)
       - action: str
       - context: dict { app_id, program_id, plan_id, run_id, step_id, session_id, cohort_id }
       - metrics: dict { duration_ms, cost_usd, effort, ... }
       - flags: dict { manual_override, reward, first_reward, pilot_mode }
       - outcome: str (optional)
+      - detail: dict (optional; route-specific payload, e.g. request_id / agent / artifacts)
       - schema_version: int
     """
     e = dict(raw or {})
@@ -79,7 +340,7 @@ def normalize_event(raw: Dict[str, Any]) -> Dict[str, Any]:
 
     # --- actor ---
     actor_type = (_str(e.get("actor_type")) or _str(e.get("actor")) or "unknown").lower()
-    if actor_type not in ("student", "staff", "employer", "agency", "system", "unknown"):
+    if actor_type not in ACTOR_TYPES:
         actor_type = "unknown"
 
     # --- action ---
@@ -165,6 +426,12 @@ def normalize_event(raw: Dict[str, Any]) -> Dict[str, Any]:
     }
     if outcome:
         normalized["outcome"] = outcome
+    if isinstance(e.get("detail"), dict) and e["detail"]:
+        normalized["detail"] = dict(e["detail"])
+
+    ts_ms = parse_ts_ms(ts)
+    if ts_ms is not None:
+        normalized["ts_ms"] = ts_ms
 
     # Keep a slim raw copy for forensic debug (optional)
     # Avoid storing huge blobs
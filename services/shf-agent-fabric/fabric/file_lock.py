@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except Exception:  # not available on Windows
+    fcntl = None
+
+BASE = Path(__file__).resolve().parent.parent
+LOCKS_DIR = BASE / "db" / "locks"
+
+_locks: Dict[str, "FileLock"] = {}
+_locks_guard = threading.Lock()
+_counters: Dict[str, "SharedCounter"] = {}
+_COUNTER = struct.Struct("<Q")
+
+
+class FileLock:
+    """
+    Reentrant lock shared by the threads of this process and, through flock(2) on
+    `path`, by every process on the node (uvicorn --workers N). Without fcntl it only
+    excludes threads of this process.
+
+    The lock file is opened per outermost acquire (not once per process) so a forked
+    worker never shares an open file description, and with it the lock, with its parent.
+    Use file_lock(name) rather than constructing one: two instances on the same path
+    in one process would block each other.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._rlock.acquire(blocking):
+            return False
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BlockingIOError:
+                self._rlock.release()
+                return False
+            except BaseException:
+                self._rlock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+        return True
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+        self._rlock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def file_lock(name: str) -> FileLock:
+    """The process-wide FileLock for db/locks/<name>.lock."""
+    with _locks_guard:
+        lock = _locks.get(name)
+        if lock is None:
+            lock = _locks[name] = FileLock(LOCKS_DIR / f"{name}.lock")
+        return lock
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = "utf-8") -> None:
+    """
+    Replaces `path` with `text` in one rename, so readers in any process see the old or
+    the new content, never a partial file. The temp name is unique per process and thread.
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_text(text, encoding=encoding)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class SharedCounter:
+    """
+    A 64-bit counter in db/locks/<name>.version, memory-mapped so every process on the
+    node reads the current value with a plain memory read (no syscall). Writers bump it
+    under the matching file lock; use shared_counter(name). Used as a cross-worker "something changed" version.
+    """
+
+    def __init__(self, name: str, lock: FileLock):
+        self.path = LOCKS_DIR / f"{name}.version"
+        self._lock = lock
+        self._mm: Optional[mmap.mmap] = None
+        self._guard = threading.Lock()
+
+    def _map(self) -> mmap.mmap:
+        mm = self._mm
+        if mm is None:
+            with self._guard:
+                if self._mm is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < _COUNTER.size:
+                            os.ftruncate(fd, _COUNTER.size)
+                        self._mm = mmap.mmap(fd, _COUNTER.size)
+                    finally:
+                        os.close(fd)
+                mm = self._mm
+        return mm
+
+    def value(self) -> int:
+        return _COUNTER.unpack_from(self._map(), 0)[0]
+
+    def bump(self) -> int:
+        mm = self._map()
+        with self._lock:
+            v = _COUNTER.unpack_from(mm, 0)[0] + 1
+            _COUNTER.pack_into(mm, 0, v)
+        return v
+
+
+def shared_counter(name: str) -> SharedCounter:
+    """The process-wide SharedCounter for db/locks/<name>.version."""
+    lock = file_lock(f"{name}.version")
+    with _locks_guard:
+        counter = _counters.get(name)
+        if counter is None:
+            counter = _counters[name] = SharedCounter(name, lock)
+        return counter
@@ -3,6 +3,10 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict
 
+from fabric.file_lock import file_lock
+
+_lock = file_lock("force_audit")
+
 def _root() -> Path:
     return Path(__file__).resolve().parents[1]
 
@@ -12,6 +16,5 @@ def append_force_event(ev: Dict[str, Any]) -> None:
     fp = base / "force.audit.jsonl"
     ev = dict(ev)
     ev.setdefault("ts", datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"))
-    fp.write_text("", encoding="utf-8") if not fp.exists() else None
-    with fp.open("a", encoding="utf-8") as f:
+    with _lock, fp.open("a", encoding="utf-8") as f:
         f.write(json.dumps(ev, ensure_ascii=False) + "\n")
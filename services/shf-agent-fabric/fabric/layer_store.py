@@ -1,7 +1,10 @@
 import json
 from pathlib import Path
 
+from fabric.file_lock import atomic_write_text, file_lock
+
 LAYERS_FILE = Path(__file__).resolve().parent.parent / "db" / "layer_flags.json"
+_lock = file_lock("layer_flags")
 
 def _load() -> dict:
     try:
@@ -13,7 +16,7 @@ def _load() -> dict:
 
 def _save(data: dict) -> None:
     LAYERS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    LAYERS_FILE.write_text(json.dumps(data, indent=2) + "\n")
+    atomic_write_text(LAYERS_FILE, json.dumps(data, indent=2) + "\n")
 
 def is_layer_enabled(layer: str, default: bool = True) -> bool:
     data = _load()
@@ -22,12 +25,13 @@ def is_layer_enabled(layer: str, default: bool = True) -> bool:
     return default
 
 def set_layer_enabled(layer: str, enabled: bool) -> bool:
-    data = _load()
-    if enabled:
-        data.pop(layer, None)
-    else:
-        data[layer] = True
-    _save(data)
+    with _lock:
+        data = _load()
+        if enabled:
+            data.pop(layer, None)
+        else:
+            data[layer] = True
+        _save(data)
     return enabled
 
 def list_layer_flags() -> dict:
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from fabric.events.schema import parse_ts_ms
+from fabric.ledger.consumer import swap_sealed_segment
+from fabric.ledger.segments import segments
+
+
+def _with_ts_ms(e: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Copy of e with ts_ms inserted after ts, or None if nothing to add."""
+    if "ts_ms" in e:
+        return None
+    ts_ms = parse_ts_ms(e.get("ts"))
+    if ts_ms is None:
+        return None
+    out: Dict[str, Any] = {}
+    for k, v in e.items():
+        out[k] = v
+        if k == "ts":
+            out["ts_ms"] = ts_ms
+    return out
+
+
+def _rewrite_segment(path, tmp) -> Dict[str, int]:
+    """Writes path -> tmp adding ts_ms where missing; other lines are copied byte for byte."""
+    stats = {"lines": 0, "updated": 0}
+    with path.open("rb") as src, tmp.open("wb") as dst:
+        for line in src:
+            stats["lines"] += 1
+            body = line.rstrip(b"\n")
+            try:
+                e = json.loads(body) if body.strip() else None
+            except Exception:
+                e = None
+            upd = _with_ts_ms(e) if isinstance(e, dict) else None
+            if upd is None:
+                dst.write(line if line.endswith(b"\n") else line + b"\n")
+                continue
+            dst.write((json.dumps(upd) + "\n").encode("utf-8"))
+            stats["updated"] += 1
+        dst.flush()
+        os.fsync(dst.fileno())
+    return stats
+
+
+def backfill_ts_ms(include_legacy: bool = True, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Adds the precomputed ts_ms to events written before normalize_event carried it.
+
+    Only sealed segments are rewritten (the active one is still being appended to; its
+    older events keep falling back to parsing `ts`). Each segment is copied with ts_ms
+    inserted and swapped in atomically; ledger consumers are rebased to the new offsets.
+    Segments with nothing to add are left as is.
+    """
+    results: List[Dict[str, Any]] = []
+    todo = [s for s in segments() if s.sealed and (s.seg_id != 0 or include_legacy)]
+    for i, seg in enumerate(todo):
+        if progress is not None:
+            progress({"segments_done": i, "segments_total": len(todo), "segment": seg.seg_id})
+        tmp = seg.path.with_name(seg.path.name + ".backfill.tmp")
+        stats = _rewrite_segment(seg.path, tmp)
+        if stats["updated"] == 0:
+            tmp.unlink()
+            results.append({"segment": seg.seg_id, **stats})
+            continue
+        old_end = seg.indexed_bytes
+        new_seg = swap_sealed_segment(seg.seg_id, tmp, same_records=True)
+        results.append({"segment": seg.seg_id, **stats, "bytes_before": old_end, "bytes_after": new_seg.indexed_bytes})
+
+    return {"ok": True, "segments": results, "updated": sum(r["updated"] for r in results)}
+
+
+if __name__ == "__main__":
+    print(json.dumps(backfill_ts_ms(), indent=2))
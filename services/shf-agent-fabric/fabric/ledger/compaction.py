@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fabric.events.legacy import is_canonical, upgrade_event
+from fabric.file_lock import atomic_write_text
+from fabric.ledger.backfill import _with_ts_ms
+from fabric.ledger.consumer import swap_sealed_segment
+from fabric.ledger.segments import LEDGER_DIR, segments
+from fabric.run_ledger import EXECUTION_LOG, FABRIC_APP_ID, write_normalized_events
+
+ARCHIVE_DIR = LEDGER_DIR / "archive"
+MERGE_CHECKPOINT = LEDGER_DIR / "execution_log_merge.json"
+MERGE_BATCH = 1000
+
+
+def _archive(name: str, lines: List[bytes]) -> Optional[str]:
+    """Appends raw lines that could not be converted to archive/<name>.rejected.jsonl."""
+    if not lines:
+        return None
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    path = ARCHIVE_DIR / f"{name}.rejected.jsonl"
+    with path.open("ab") as f:
+        for line in lines:
+            f.write(line if line.endswith(b"\n") else line + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return str(path)
+
+
+def _parse(body: bytes) -> Tuple[bool, Any]:
+    try:
+        return True, json.loads(body)
+    except Exception:
+        return False, None
+
+
+def _convert(line: bytes) -> Tuple[Optional[bytes], str]:
+    """
+    One ledger line in canonical form. Returns (line, kind) with kind one of
+    kept | ts_ms | upgraded | rejected | blank; rejected/blank lines are dropped.
+    """
+    body = line.rstrip(b"\n")
+    if not body.strip():
+        return None, "blank"
+    ok, rec = _parse(body)
+    if not ok:
+        return None, "rejected"
+    if is_canonical(rec):
+        upd = _with_ts_ms(rec)
+        if upd is None:
+            return body + b"\n", "kept"
+        return (json.dumps(upd) + "\n").encode("utf-8"), "ts_ms"
+    upgraded = upgrade_event(rec)
+    if upgraded is None:
+        return None, "rejected"
+    return (json.dumps(upgraded) + "\n").encode("utf-8"), "upgraded"
+
+
+def compact_segment(seg) -> Dict[str, Any]:
+    """
+    Rewrites one sealed segment so every record is canonical: legacy records are upgraded,
+    unconvertible ones moved to the archive. No-op (file untouched) if nothing changes.
+    """
+    counts = {"kept": 0, "ts_ms": 0, "upgraded": 0, "rejected": 0, "blank": 0}
+    rejected: List[bytes] = []
+    tmp = seg.path.with_name(seg.path.name + ".compact.tmp")
+    with seg.path.open("rb") as src, tmp.open("wb") as dst:
+        for line in src:
+            out, kind = _convert(line)
+            counts[kind] += 1
+            if kind == "rejected":
+                rejected.append(line)
+            if out is not None:
+                dst.write(out)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    result: Dict[str, Any] = {"segment": seg.seg_id, **counts}
+    if counts["ts_ms"] == counts["upgraded"] == counts["rejected"] == counts["blank"] == 0:
+        tmp.unlink()
+        return result
+    # archive first: if we crash before the swap the originals are still in the segment
+    result["archive"] = _archive(seg.path.stem, rejected)
+    same_records = counts["upgraded"] == counts["rejected"] == 0
+    old_end = seg.indexed_bytes
+    new_seg = swap_sealed_segment(seg.seg_id, tmp, same_records=same_records)
+    result.update(bytes_before=old_end, bytes_after=new_seg.indexed_bytes)
+    return result
+
+
+def _merge_offset() -> int:
+    try:
+        return int(json.loads(MERGE_CHECKPOINT.read_text(encoding="utf-8")).get("offset") or 0)
+    except Exception:
+        return 0
+
+
+def _save_merge_offset(offset: int) -> None:
+    atomic_write_text(MERGE_CHECKPOINT, json.dumps({"offset": offset, "ts": datetime.now(timezone.utc).isoformat()}))
+
+
+def merge_execution_log(progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Appends the old /runs/execute log (db/runs/events.jsonl) to the canonical ledger.
+
+    Records are stamped with FABRIC_APP_ID like the ones /runs/execute writes now.
+    Resumes from a byte-offset checkpoint; upgraded records get content-derived ids, so
+    the ingest dedup index also catches a re-merge after a lost checkpoint.
+    """
+    stats = {"merged": 0, "duplicates": 0, "rejected": 0}
+    if not EXECUTION_LOG.exists():
+        return {"path": str(EXECUTION_LOG), **stats}
+    offset = _merge_offset()
+    if offset > EXECUTION_LOG.stat().st_size:
+        offset = 0  # log was replaced; ids keep the re-merge idempotent
+    rejected: List[bytes] = []
+    batch: List[Dict[str, Any]] = []
+
+    def flush(pos: int) -> None:
+        if batch:
+            written = write_normalized_events(batch)
+            stats["merged"] += written["count"]
+            stats["duplicates"] += len(written["duplicates"])
+            batch.clear()
+        _archive("execution_log", rejected)
+        rejected.clear()
+        _save_merge_offset(pos)
+        if progress is not None:
+            progress({"offset": pos, **stats})
+
+    with EXECUTION_LOG.open("rb") as f:
+        f.seek(offset)
+        pos = offset
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partial last line; picked up next time
+            pos += len(line)
+            if not line.strip():
+                continue
+            ok, rec = _parse(line)
+            ev = upgrade_event(rec) if ok else None
+            if ev is None:
+                stats["rejected"] += 1
+                rejected.append(line)
+                continue
+            ev.setdefault("context", {})["app_id"] = FABRIC_APP_ID
+            batch.append(ev)
+            if len(batch) >= MERGE_BATCH:
+                flush(pos)
+        flush(pos)
+    return {"path": str(EXECUTION_LOG), "offset": pos, **stats}
+
+
+def compact(include_legacy: bool = True, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Compaction job: rewrites every sealed segment (including the legacy runs.jsonl as
+    segment 0) into canonical schema, archiving what cannot be converted, then merges
+    the old execution log into the ledger. After it, ledger readers no longer decode
+    legacy records only to count them as ignored.
+    """
+    results = []
+    todo = [s for s in segments() if s.sealed and (s.seg_id != 0 or include_legacy)]
+    for i, seg in enumerate(todo):
+        if progress is not None:
+            progress({"segments_done": i, "segments_total": len(todo), "segment": seg.seg_id})
+        results.append(compact_segment(seg))
+    if progress is not None:
+        progress({"segments_done": len(todo), "segments_total": len(todo), "step": "merge_execution_log"})
+    merge = merge_execution_log()
+    return {
+        "ok": True,
+        "segments": results,
+        "upgraded": sum(r["upgraded"] for r in results),
+        "rejected": sum(r["rejected"] for r in results),
+        "execution_log": merge,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(compact(), indent=2))
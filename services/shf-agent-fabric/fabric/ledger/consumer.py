@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import atexit
+import json
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from threading import Lock, RLock, Thread
+from typing import Any, Dict, List, Tuple
+
+from fabric.file_lock import atomic_write_text
+from fabric.ledger.segments import (
+    Segment,
+    add_append_listener,
+    iter_from,
+    ledger_generation,
+    ledger_lock,
+    replace_sealed,
+    segments,
+)
+
+_consumers: List["LedgerConsumer"] = []
+
+# checkpoints are written by one background thread, never by the ledger writer thread
+CHECKPOINT_POLL_S = 1.0
+_checkpointer: "Thread | None" = None
+_checkpointer_lock = Lock()
+
+
+def consumers() -> List["LedgerConsumer"]:
+    """Every live LedgerConsumer, in creation order (lock them in this order)."""
+    return list(_consumers)
+
+
+class LedgerConsumer:
+    """
+    Base for derived stores that follow the ledger (aggregates, rollups, ...).
+
+    State is folded forward record by record and checkpointed to `path` together with the
+    ledger position (seg_id, offset) it covers. On restart only records past that position
+    are replayed; a checkpoint from another ledger generation (a sealed segment was
+    rewritten meanwhile) is discarded and the state rebuilt. In-process appends arrive through the segment append listener; anything
+    missed (other writers, listener races) is picked up by catch_up().
+
+    With several worker processes each keeps its own copy; they fold the same ledger, so
+    whichever checkpoint is written last is a valid (state, position) pair. A worker that
+    sees the generation change (another process rewrote a segment) reloads.
+
+    Folding (on the ledger writer thread for local appends) never writes the checkpoint:
+    a background checkpointer saves dirty consumers every checkpoint_interval_s, and the
+    JSON is written to disk outside self.lock.
+
+    Subclasses implement reset(), apply(), state_to_dict() and state_from_dict(); large
+    states can override state_json() to reuse the encoding of unchanged parts.
+    """
+
+    version = 1
+    checkpoint_interval_s = 10.0
+    # True when the state keeps summaries of records after retention removes them
+    # from the ledger (it must then be rebased, not rebuilt, when they are dropped).
+    summarizes_expired = False
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = RLock()
+        self.position: Tuple[int, int] = (0, 0)
+        self._loaded = False
+        self._generation = 0
+        self._dirty = False
+        self._saved_at = 0.0
+        # orders checkpoint writes: a snapshot is on disk before a later one is taken
+        self._save_lock = Lock()
+        add_append_listener(self._on_append)
+        atexit.register(self._save_on_exit)
+        _consumers.append(self)
+        _ensure_checkpointer()
+
+    # --- subclass hooks ---
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def apply(self, e: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def state_to_dict(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def state_from_dict(self, d: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def state_json(self) -> str:
+        """state_to_dict() as JSON; called with self.lock held."""
+        return json.dumps(self.state_to_dict())
+
+    # --- machinery ---
+
+    def _fold(self, e: Any) -> None:
+        if isinstance(e, dict):
+            self.apply(e)
+            self._dirty = True
+
+    def load(self) -> None:
+        _ensure_checkpointer()
+        with self.lock:
+            self.reset()
+            self.position = (0, 0)
+            self._generation = ledger_generation()
+            if self.path.exists():
+                try:
+                    doc = json.loads(self.path.read_text(encoding="utf-8"))
+                    if doc.get("version") == self.version and doc.get("generation", 0) == self._generation:
+                        self.state_from_dict(doc.get("state") or {})
+                        pos = doc.get("position") or [0, 0]
+                        self.position = (int(pos[0]), int(pos[1]))
+                except Exception:
+                    self.reset()
+                    self.position = (0, 0)
+            self._loaded = True
+
+    def save(self, force: bool = False) -> None:
+        # lock order: self.lock, then _save_lock; the file is written after self.lock is
+        # released (unless the caller holds it), with _save_lock keeping writes in order
+        with self.lock:
+            if not self._dirty or self._generation != ledger_generation():
+                return  # stale copy: another process rewrote the ledger, catch_up() reloads
+            now = time.time()
+            if not force and now - self._saved_at < self.checkpoint_interval_s:
+                return
+            head = json.dumps({"version": self.version, "generation": self._generation, "position": list(self.position)})
+            text = head[:-1] + ', "state": ' + self.state_json() + "}"
+            self._saved_at = now
+            self._dirty = False
+            self._save_lock.acquire()
+        try:
+            atomic_write_text(self.path, text)
+        except BaseException:
+            self._dirty = True
+            raise
+        finally:
+            self._save_lock.release()
+
+    def catch_up(self) -> None:
+        """Folds every ledger record past the checkpoint position into the state."""
+        with self.lock:
+            if not self._loaded or self._generation != ledger_generation():
+                self.load()
+            for pos, e in iter_from(self.position):
+                self._fold(e)
+                self.position = pos
+
+    def _on_append(self, seg_id: int, start: int, end: int, events: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            if not self._loaded:
+                return  # first reader replays from the checkpoint
+            if (seg_id, end) <= self.position:
+                return  # already folded in by a catch_up
+            if (seg_id, start) != self.position:
+                self.catch_up()
+                return
+            for e in events:
+                self._fold(e)
+            self.position = (seg_id, end)
+
+    def rebase(self, seg_id: int, old_end: int, new_end: int) -> None:
+        """
+        Adjusts the checkpoint after sealed segment `seg_id` was rewritten with the same
+        records (old size old_end, new size new_end). Call with self.lock held.
+        A position inside the segment cannot be mapped, so the state is rebuilt instead.
+        """
+        if not self._loaded:
+            self.load()
+        # the ledger generation changed, so the checkpoint must be rewritten either way
+        self._generation = ledger_generation()
+        self._dirty = True
+        if self.position[0] != seg_id:
+            return
+        if self.position[1] == old_end:
+            self.position = (seg_id, new_end)
+        else:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """
+        Drops the state and checkpoint; the next reader replays the whole ledger.
+        Used when records behind the position changed. Call with self.lock held.
+        """
+        self.reset()
+        self.position = (0, 0)
+        self._dirty = True
+        self.save(force=True)
+        # unloaded: appends are skipped until a reader replays (not the writer thread)
+        self._loaded = False
+
+    def _save_on_exit(self) -> None:
+        if self._loaded:
+            try:
+                self.save(force=True)
+            except Exception:
+                pass
+
+    def checkpoint_info(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"position": list(self.position), "path": str(self.path)}
+
+
+def _checkpoint_loop() -> None:
+    while True:
+        time.sleep(CHECKPOINT_POLL_S)
+        for c in consumers():
+            if c._loaded and c._dirty:
+                try:
+                    c.save()
+                except Exception:
+                    pass
+
+
+def _ensure_checkpointer() -> None:
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None or not _checkpointer.is_alive():
+            _checkpointer = Thread(target=_checkpoint_loop, name="ledger-checkpoints", daemon=True)
+            _checkpointer.start()
+
+
+def swap_sealed_segment(seg_id: int, new_path: Path, same_records: bool, expired: bool = False) -> Segment:
+    """
+    Replaces sealed segment `seg_id` with the rewritten file `new_path` while appends
+    (in every process) are held off and every consumer is locked and caught up. same_records=True (only bytes changed, e.g. a
+    backfill) rebases checkpoints to the new offsets; otherwise consumers are rebuilt.
+    expired=True (retention dropped records) rebases the consumers that summarize
+    expired records and rebuilds the rest.
+    """
+    with ledger_lock, ExitStack() as stack:
+        cs = consumers()
+        for c in cs:
+            stack.enter_context(c.lock)
+            c.catch_up()
+        old_end = next(s.indexed_bytes for s in segments() if s.seg_id == seg_id)
+        seg = replace_sealed(seg_id, new_path)
+        for c in cs:
+            if same_records or (expired and c.summarizes_expired):
+                c.rebase(seg_id, old_end, seg.indexed_bytes)
+                c.save(force=True)
+            else:
+                c.rebuild()
+        return seg
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from fabric.ledger.consumer import LedgerConsumer
+from fabric.ledger.segments import LEDGER_DIR, add_append_filter
+from fabric.settings import EVENT_DEDUP_WINDOW
+
+CHECKPOINT_PATH = LEDGER_DIR / "dedup_index.json"
+
+
+class EventIdIndex(LedgerConsumer):
+    """
+    The most recent `window` event_ids in the ledger, oldest first, for ingest dedup.
+
+    Built from the ledger like the LOE stores (checkpoint + replay), so it survives
+    restarts. Ingest claims ids before writing: a claim is an O(1) membership test, and a
+    fresh id is held as pending at once so a concurrent retry of the same event is
+    caught before the first write reaches the ledger.
+
+    Claims only see this process's pending ids. Across worker processes, the append
+    filter runs under the ledger lock with the index caught up, and drops events whose
+    id another process has written meanwhile.
+
+    Ids of events dropped by retention are kept (the index is rebased like the LOE
+    summaries) until they age out of the window. Only a full rebuild from the ledger
+    loses them.
+    """
+
+    version = 1
+    checkpoint_interval_s = 30.0
+    summarizes_expired = True
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.ids: "OrderedDict[str, None]" = OrderedDict()
+        # claimed here, not yet seen in the ledger
+        self.pending: Set[str] = set()
+        super().__init__(CHECKPOINT_PATH)
+
+    def reset(self) -> None:
+        self.ids = OrderedDict()
+
+    def _add(self, event_id: str) -> None:
+        self.ids[event_id] = None
+        while len(self.ids) > self.window:
+            self.ids.popitem(last=False)
+
+    def apply(self, e: Dict[str, Any]) -> None:
+        event_id = e.get("event_id")
+        if isinstance(event_id, str):
+            self.pending.discard(event_id)
+            if event_id not in self.ids:
+                self._add(event_id)
+
+    def state_to_dict(self) -> Dict[str, Any]:
+        return {"window": self.window, "ids": list(self.ids)}
+
+    def state_from_dict(self, d: Dict[str, Any]) -> None:
+        self.ids = OrderedDict((i, None) for i in (d.get("ids") or [])[-self.window :] if isinstance(i, str))
+
+    def claim(self, event_ids: List[Any]) -> List[bool]:
+        with self.lock:
+            self.catch_up()
+            dup: List[bool] = []
+            for event_id in event_ids:
+                if not isinstance(event_id, str):
+                    dup.append(False)
+                elif event_id in self.ids or event_id in self.pending:
+                    dup.append(True)
+                else:
+                    self.pending.add(event_id)
+                    dup.append(False)
+            return dup
+
+    def release(self, event_ids: Iterable[Any]) -> None:
+        with self.lock:
+            for event_id in event_ids:
+                self.pending.discard(event_id)
+
+    def drop_written(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append filter: events whose event_id is not in the ledger yet."""
+        with self.lock:
+            self.catch_up()
+            return [e for e in events if e.get("event_id") not in self.ids]
+
+
+_index: Optional[EventIdIndex] = EventIdIndex(EVENT_DEDUP_WINDOW) if EVENT_DEDUP_WINDOW > 0 else None
+if _index is not None:
+    add_append_filter(_index.drop_written)
+
+
+def claim(event_ids: List[Any]) -> List[bool]:
+    """
+    Flags each id that is already in the recent window (or repeated earlier in this call)
+    as a duplicate; all other ids are recorded. Release ids whose write then fails.
+    """
+    if _index is None:
+        return [False] * len(event_ids)
+    return _index.claim(event_ids)
+
+
+def release(event_ids: Iterable[Any]) -> None:
+    if _index is not None:
+        _index.release(event_ids)
+
+
+def checkpoint_info() -> Dict[str, Any]:
+    if _index is None:
+        return {"enabled": False}
+    with _index.lock:
+        return {
+            **_index.checkpoint_info(),
+            "window": _index.window,
+            "ids": len(_index.ids),
+            "pending": len(_index.pending),
+        }
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from threading import Lock, Thread
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from fabric.ledger.segments import add_append_listener, iter_from, tail_position
+from fabric.settings import EVENTS_STREAM_BUFFER, EVENTS_STREAM_MAX_CLIENTS, EVENTS_STREAM_POLL_MS
+
+Position = Tuple[int, int]
+
+READ_BACK_CHUNK = 500
+
+
+def format_cursor(pos: Position) -> str:
+    return f"{pos[0]}:{pos[1]}"
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Position]:
+    """'<seg_id>:<offset>' -> position; None/'' / 'tail' -> None (live only). Raises ValueError."""
+    if cursor is None or cursor.strip() in ("", "tail"):
+        return None
+    seg, sep, off = cursor.strip().partition(":")
+    if not sep:
+        raise ValueError("INVALID_CURSOR")
+    try:
+        pos = (int(seg), int(off))
+    except ValueError:
+        raise ValueError("INVALID_CURSOR")
+    if pos[0] < 0 or pos[1] < 0:
+        raise ValueError("INVALID_CURSOR")
+    return pos
+
+
+def _matches(e: Any, app_id: Optional[str], run_id: Optional[str]) -> bool:
+    if not isinstance(e, dict) or e.get("schema_version") != 1:
+        return False
+    ctx = e.get("context") if isinstance(e.get("context"), dict) else {}
+    if app_id and ctx.get("app_id") != app_id:
+        return False
+    if run_id and ctx.get("run_id") != run_id:
+        return False
+    return True
+
+
+class Subscription:
+    """
+    One stream client: filters plus a bounded queue of (position, events) batches fed
+    from the follower. A client that falls `buffer` events behind is dropped; it can
+    resume from its last cursor, which replays the gap from the ledger.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, app_id: Optional[str], run_id: Optional[str], buffer: int):
+        self.loop = loop
+        self.app_id = app_id
+        self.run_id = run_id
+        self.buffer = buffer
+        self.queue: "asyncio.Queue[Tuple[Position, List[Dict[str, Any]]]]" = asyncio.Queue()
+        self.queued_events = 0
+        self.dropped = False
+        self.start: Position = (0, 0)
+
+    def matches(self, e: Any) -> bool:
+        return _matches(e, self.app_id, self.run_id)
+
+    def _offer(self, pos: Position, events: List[Dict[str, Any]]) -> None:
+        # runs on the subscriber's event loop
+        if self.dropped:
+            return
+        if self.queued_events + len(events) > self.buffer:
+            self.dropped = True
+            self.queue.put_nowait((pos, []))  # wake the reader so it can close
+            return
+        self.queued_events += len(events)
+        self.queue.put_nowait((pos, events))
+
+    async def get(self, timeout: float) -> Optional[Tuple[Position, List[Dict[str, Any]]]]:
+        """Next live batch after the replay point, or None on timeout."""
+        while True:
+            try:
+                pos, events = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            self.queued_events -= len(events)
+            if pos > self.start:
+                return pos, events
+
+    def replay(self, cursor: Optional[Position]) -> Iterator[Tuple[Position, Dict[str, Any]]]:
+        """Matching ledger records after `cursor`, up to the position live delivery starts at."""
+        if cursor is None:
+            return
+        for pos, e in iter_from(cursor):
+            if pos > self.start:
+                break
+            if self.matches(e):
+                yield pos, e
+
+
+class TailFollower:
+    """
+    Single ledger tail follower fanning appended records out to every stream client,
+    so N dashboards cost one listener instead of N polling scans.
+
+    Appends made in this process arrive through the segment append listener. Records
+    other worker processes append are read back from the ledger: on the next local
+    append that does not follow on from the follower's position, or by a poll every
+    EVENTS_STREAM_POLL_MS while clients are connected.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = EVENTS_STREAM_MAX_CLIENTS,
+        buffer: int = EVENTS_STREAM_BUFFER,
+        poll_ms: int = EVENTS_STREAM_POLL_MS,
+    ):
+        self.max_clients = max_clients
+        self.buffer = buffer
+        self.poll_s = max(0, poll_ms) / 1000.0
+        self._lock = Lock()
+        self._subs: Set[Subscription] = set()
+        # serializes fan-out; position is the ledger point everything before has been fanned out
+        self._feed_lock = Lock()
+        self.position: Optional[Position] = None
+        self._poller: Optional[Thread] = None
+        add_append_listener(self._on_append)
+
+    def subscribe(self, app_id: Optional[str] = None, run_id: Optional[str] = None) -> Subscription:
+        """Registers a client on the running event loop. Raises RuntimeError("TOO_MANY_CLIENTS")."""
+        sub = Subscription(asyncio.get_running_loop(), app_id or None, run_id or None, self.buffer)
+        with self._lock:
+            if len(self._subs) >= self.max_clients:
+                raise RuntimeError("TOO_MANY_CLIENTS")
+            self._subs.add(sub)
+        with self._feed_lock:
+            if self.position is None:
+                self.position = tail_position()
+        # read after registering: appends past this point are delivered live, earlier ones replayed
+        sub.start = tail_position()
+        self._ensure_poller()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+
+    def clients(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+    def _fan_out(self, records: List[Tuple[Position, Any]]) -> None:
+        """Offers (position, record) pairs, in ledger order, to every client that wants them."""
+        if not records:
+            return
+        with self._lock:
+            subs = list(self._subs)
+        pos = records[-1][0]
+        for sub in subs:
+            matched = [e for p, e in records if p > sub.start and sub.matches(e)]
+            if not matched:
+                continue
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, pos, matched)
+            except RuntimeError:
+                self.unsubscribe(sub)  # loop closed
+
+    def _read_back(self) -> None:
+        """Fans out ledger records past the position (appends by other processes). Call with _feed_lock held."""
+        chunk: List[Tuple[Position, Any]] = []
+        for pos, e in iter_from(self.position):
+            chunk.append((pos, e))
+            self.position = pos
+            if len(chunk) >= READ_BACK_CHUNK:
+                self._fan_out(chunk)
+                chunk = []
+        self._fan_out(chunk)
+
+    def _on_append(self, seg_id: int, start: int, end: int, events: List[Dict[str, Any]]) -> None:
+        with self._feed_lock:
+            if self.position is None or (seg_id, end) <= self.position:
+                return  # no clients, or already read back
+            if (seg_id, start) != self.position:
+                self._read_back()
+                return
+            self._fan_out([((seg_id, end), e) for e in events])
+            self.position = (seg_id, end)
+
+    def _ensure_poller(self) -> None:
+        if self.poll_s <= 0:
+            return
+        with self._lock:
+            if self._poller is not None and self._poller.is_alive():
+                return
+            self._poller = Thread(target=self._poll, name="events-stream-poll", daemon=True)
+            self._poller.start()
+
+    def _poll(self) -> None:
+        while True:
+            time.sleep(self.poll_s)
+            with self._lock:
+                if not self._subs:
+                    self._poller = None
+                    break
+            try:
+                with self._feed_lock:
+                    if self.position is not None and tail_position() > self.position:
+                        self._read_back()
+            except Exception:
+                pass
+        with self._feed_lock:
+            with self._lock:
+                if not self._subs:
+                    self.position = None  # re-read at the next subscribe
+
+
+follower = TailFollower()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import secrets
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fabric.file_lock import atomic_write_text, file_lock
+from fabric.ledger.backfill import backfill_ts_ms
+from fabric.ledger.compaction import compact, merge_execution_log
+from fabric.ledger.retention import apply_retention
+from fabric.ledger.segments import LEDGER_DIR
+from fabric.settings import LEDGER_RETENTION_INTERVAL_H
+
+Progress = Callable[[Dict[str, Any]], None]
+
+# Ledger maintenance jobs; they rewrite segments, so at most one runs at a time.
+# Each is called as fn(progress=...) and may report progress dicts through it.
+JOBS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "compact": compact,
+    "merge_execution_log": merge_execution_log,
+    "backfill_ts_ms": backfill_ts_ms,
+    "retention": apply_retention,
+}
+MAX_HISTORY = 50
+
+# Job records shared by all worker processes, so status polls can land on any of them.
+HISTORY_PATH = LEDGER_DIR / "jobs.json"
+
+_lock = threading.Lock()
+_running: Optional[Dict[str, Any]] = None
+# held by the job thread for the whole run: one job at a time across processes
+_job_lock = file_lock("ledger_jobs")
+_history_lock = file_lock("ledger_jobs_history")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _read_history() -> List[Dict[str, Any]]:
+    try:
+        hist = json.loads(HISTORY_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return [j for j in hist if isinstance(j, dict)] if isinstance(hist, list) else []
+
+
+def _publish(job: Dict[str, Any]) -> None:
+    """Writes the current state of `job` into the shared history. Call with _lock held."""
+    with _history_lock:
+        hist = _read_history()
+        for i, j in enumerate(hist):
+            if j.get("job_id") == job["job_id"]:
+                hist[i] = dict(job)
+                break
+        else:
+            hist.append(dict(job))
+        del hist[:-MAX_HISTORY]
+        atomic_write_text(HISTORY_PATH, json.dumps(hist))
+
+
+def _run(job: Dict[str, Any], fn: Callable[..., Dict[str, Any]], started: threading.Event, ok: List[bool]) -> None:
+    global _running
+
+    if not _job_lock.acquire(blocking=False):
+        with _lock:
+            _running = None
+        started.set()  # ok stays empty: start() reports JOB_RUNNING
+        return
+    with _lock:
+        _publish(job)
+    ok.append(True)
+    started.set()
+
+    def progress(p: Dict[str, Any]) -> None:
+        with _lock:
+            job["progress"] = dict(p)
+            _publish(job)
+
+    try:
+        result = fn(progress=progress)
+        with _lock:
+            job.update(status="done", result=result)
+    except Exception as e:
+        with _lock:
+            job.update(status="error", error=f"{type(e).__name__}: {e}", trace=traceback.format_exc(limit=5))
+    finally:
+        with _lock:
+            job["finished_at"] = _now()
+            try:
+                _publish(job)
+            finally:
+                _running = None
+                _job_lock.release()
+
+
+def start(name: str) -> Dict[str, Any]:
+    """
+    Starts job `name` on a background thread and returns its record.
+    Raises KeyError for an unknown job and RuntimeError("JOB_RUNNING") if one is active
+    in this or any other worker process.
+    """
+    global _running
+    fn = JOBS[name]
+    with _lock:
+        if _running is not None:
+            raise RuntimeError("JOB_RUNNING")
+        job = {"job_id": secrets.token_hex(6), "name": name, "status": "running", "started_at": _now()}
+        _running = job
+    started, ok = threading.Event(), []
+    threading.Thread(target=_run, args=(job, fn, started, ok), name=f"ledger-job-{name}", daemon=True).start()
+    started.wait()
+    if not ok:
+        raise RuntimeError("JOB_RUNNING")
+    with _lock:
+        return dict(job)
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    with _history_lock:
+        for job in _read_history():
+            if job.get("job_id") == job_id:
+                return job
+    return None
+
+
+def list_jobs() -> List[Dict[str, Any]]:
+    with _history_lock:
+        return list(reversed(_read_history()))
+
+
+_scheduler: Optional[threading.Thread] = None
+
+
+def _schedule_loop(interval_s: float) -> None:
+    while True:
+        time.sleep(interval_s)
+        try:
+            start("retention")
+        except RuntimeError:
+            pass  # another job is running; try again next interval
+
+
+def start_scheduler() -> bool:
+    """Runs the retention job every LEDGER_RETENTION_INTERVAL_H hours (no-op when 0)."""
+    global _scheduler
+    if LEDGER_RETENTION_INTERVAL_H <= 0 or _scheduler is not None:
+        return False
+    _scheduler = threading.Thread(
+        target=_schedule_loop, args=(LEDGER_RETENTION_INTERVAL_H * 3600.0,), name="ledger-retention", daemon=True
+    )
+    _scheduler.start()
+    return True
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from fabric.events.schema import event_ts_ms
+# imported so the dedup index is a live consumer that segment swaps rebase (keeping
+# expired ids) even when retention runs on its own
+from fabric.ledger import dedup
+from fabric.ledger.consumer import swap_sealed_segment
+from fabric.ledger.segments import BASE, ledger_generation, segments
+from fabric.loe.frozen import FrozenDelta, file_sha256, frozen
+from fabric.settings import LEDGER_RETENTION_DAYS
+
+POLICY_PATH = Path(os.getenv("LEDGER_RETENTION_PATH") or BASE / "registry" / "retention.json")
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Days to keep raw events: per run_id, else per app_id, else default_days (0 = forever).
+    File form: {"default_days": 90, "apps": {"<app_id>": 30}, "runs": {"<run_id>": 365}}
+    """
+
+    default_days: int = 0
+    apps: Dict[str, int] = field(default_factory=dict)
+    runs: Dict[str, int] = field(default_factory=dict)
+
+    def days_for(self, app_id: Any, run_id: Any) -> int:
+        if isinstance(run_id, str) and run_id in self.runs:
+            return self.runs[run_id]
+        if isinstance(app_id, str) and app_id in self.apps:
+            return self.apps[app_id]
+        return self.default_days
+
+    def enabled(self) -> bool:
+        return any(d > 0 for d in (self.default_days, *self.apps.values(), *self.runs.values()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"default_days": self.default_days, "apps": dict(self.apps), "runs": dict(self.runs)}
+
+
+def _days(x: Any) -> int:
+    try:
+        return max(0, int(x))
+    except (TypeError, ValueError):
+        return 0
+
+
+def load_policy(path: Path = POLICY_PATH) -> RetentionPolicy:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    except Exception:
+        data = {}
+    data = data if isinstance(data, dict) else {}
+    apps = data.get("apps") if isinstance(data.get("apps"), dict) else {}
+    runs = data.get("runs") if isinstance(data.get("runs"), dict) else {}
+    return RetentionPolicy(
+        default_days=_days(data.get("default_days", LEDGER_RETENTION_DAYS)),
+        apps={str(k): _days(v) for k, v in apps.items()},
+        runs={str(k): _days(v) for k, v in runs.items()},
+    )
+
+
+def _expired(e: Any, policy: RetentionPolicy, now_ms: int) -> bool:
+    if not isinstance(e, dict):
+        return False
+    ctx = e.get("context") if isinstance(e.get("context"), dict) else {}
+    days = policy.days_for(ctx.get("app_id"), ctx.get("run_id"))
+    if days <= 0:
+        return False
+    ts = event_ts_ms(e)
+    return ts is not None and ts < now_ms - days * DAY_MS
+
+
+def expire_segment(seg, policy: RetentionPolicy, now_ms: int) -> Dict[str, Any]:
+    """
+    Summarize-then-expire for one sealed segment: expired events are folded into the
+    frozen LOE summaries (staged), the segment is rewritten without them and swapped in,
+    then the summaries are committed. Untouched if nothing in it has expired.
+    Expired events are folded as they are read, so memory is bounded by the summaries.
+    Their ids stay in the dedup window (it is rebased, not rebuilt), but a later full
+    rebuild of that index only sees the remaining ledger, after which a replay of an
+    expired event_id is written again.
+    """
+    # cheap skip: the block index says every event is newer than the shortest cutoff
+    shortest = min(d for d in (policy.default_days, *policy.apps.values(), *policy.runs.values()) if d > 0)
+    if seg.ts_min is None or seg.ts_min >= now_ms - shortest * DAY_MS:
+        return {"segment": seg.seg_id, "expired": 0, "kept": None, "skipped": True}
+
+    delta = FrozenDelta()
+    kept = 0
+    tmp = seg.path.with_name(seg.path.name + ".retention.tmp")
+    with seg.path.open("rb") as src, tmp.open("wb") as dst:
+        for line in src:
+            if not line.strip():
+                continue
+            try:
+                e = json.loads(line)
+            except Exception:
+                e = None
+            if _expired(e, policy, now_ms):
+                delta.add(e)
+                continue
+            kept += 1
+            dst.write(line if line.endswith(b"\n") else line + b"\n")
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    result: Dict[str, Any] = {"segment": seg.seg_id, "expired": delta.events, "kept": kept}
+    if delta.is_empty():
+        tmp.unlink()
+        return result
+    frozen.stage(delta, ledger_generation() + 1, seg.path, file_sha256(tmp))
+    old_end = seg.indexed_bytes
+    new_seg = swap_sealed_segment(seg.seg_id, tmp, same_records=False, expired=True)
+    frozen.commit()
+    result.update(bytes_before=old_end, bytes_after=new_seg.indexed_bytes)
+    return result
+
+
+def apply_retention(progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Retention job: expires raw events past their policy from every sealed segment
+    (the active segment is left alone until it rotates). LOE aggregates and day rollups
+    keep covering the expired events through the frozen summaries.
+    """
+    policy = load_policy()
+    if not policy.enabled():
+        return {"ok": True, "enabled": False, "policy": policy.to_dict(), "segments": []}
+    now_ms = int(time.time() * 1000)
+    todo = [s for s in segments() if s.sealed]
+    results = []
+    for i, seg in enumerate(todo):
+        if progress is not None:
+            progress({"segments_done": i, "segments_total": len(todo), "segment": seg.seg_id})
+        results.append(expire_segment(seg, policy, now_ms))
+    if progress is not None:
+        progress({"segments_done": len(todo), "segments_total": len(todo)})
+    return {
+        "ok": True,
+        "enabled": True,
+        "policy": policy.to_dict(),
+        "expired": sum(r["expired"] for r in results),
+        "segments": results,
+        "frozen": frozen.info(),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(apply_retention(), indent=2))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple
+
+
+def field_pattern(field: str, values: Iterable[str]) -> Optional[Pattern[bytes]]:
+    """
+    Byte pattern for `"<field>": "<value>"` with any of `values`, as json.dumps writes it
+    (either separator spacing, ASCII-escaped or raw UTF-8 values).
+
+    It is a pre-filter: it may also hit the same key elsewhere in a line, so decoded
+    records still go through the real match. Returns None when there is nothing to match.
+    """
+    alts = set()
+    for v in values:
+        if not isinstance(v, str):
+            continue
+        alts.add(re.escape(json.dumps(v)[1:-1].encode("ascii")))
+        alts.add(re.escape(json.dumps(v, ensure_ascii=False)[1:-1].encode("utf-8")))
+    if not alts:
+        return None
+    key = re.escape(json.dumps(field).encode("utf-8"))
+    return re.compile(key + rb'\s*:\s*"(?:' + b"|".join(sorted(alts)) + rb')"')
+
+
+def candidate_line_spans(buf, start: int, stop: int, pattern: Pattern[bytes]) -> List[Tuple[int, int]]:
+    """
+    (line_start, line_end) of the lines of buf[start:stop] containing `pattern`, oldest
+    first; line_end is past the newline (or `stop` for an unterminated last line).
+    """
+    spans: List[Tuple[int, int]] = []
+    last = -1
+    for m in pattern.finditer(buf, start, stop):
+        ls = buf.rfind(b"\n", start, m.start()) + 1 or start
+        if ls == last:
+            continue
+        last = ls
+        le = buf.find(b"\n", ls, stop)
+        spans.append((ls, stop if le == -1 else le + 1))
+    return spans
+
+
+def iter_line_spans(buf, start: int, stop: int) -> Iterator[Tuple[int, int]]:
+    """(line_start, line_end) of every line of buf[start:stop], oldest first."""
+    pos = start
+    while pos < stop:
+        le = buf.find(b"\n", pos, stop)
+        end = stop if le == -1 else le + 1
+        yield pos, end
+        pos = end
+
+
+def iter_candidate_lines(buf, start: int, stop: int, pattern: Pattern[bytes]) -> Iterator[bytes]:
+    """
+    Lines of buf[start:stop] containing `pattern`, newest-first.
+
+    `buf` is usually an mmap of a segment: the regex runs over the mapped bytes directly,
+    and only matching lines are sliced out, so non-candidates are never copied or decoded.
+    """
+    for ls, le in reversed(candidate_line_spans(buf, start, stop, pattern)):
+        yield buf[ls:le].rstrip(b"\n")
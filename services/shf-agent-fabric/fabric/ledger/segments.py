@@ -0,0 +1,781 @@
+from __future__ import annotations
+
+import atexit
+import bisect
+import json
+import mmap
+import os
+import time
+from pathlib import Path
+from threading import RLock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Pattern, Tuple
+
+from fabric.events.schema import event_ts_ms
+from fabric.file_lock import atomic_write_text, file_lock
+from fabric.ledger.scan import candidate_line_spans, iter_candidate_lines, iter_line_spans
+from fabric.ledger.tail import iter_lines_reverse
+from fabric.settings import LEDGER_SEGMENT_MAX_AGE_S, LEDGER_SEGMENT_MAX_BYTES
+
+BASE = Path(__file__).resolve().parent.parent.parent
+DB = BASE / "db"
+LEDGER_DIR = DB / "ledger"
+LEDGER_DIR.mkdir(parents=True, exist_ok=True)
+
+# Pre-segmentation ledger. Indexed in place as segment 0 and never appended to again.
+LEGACY_LOG = DB / "runs.jsonl"
+
+# Bumped whenever a sealed segment is rewritten; derived-store checkpoints from another
+# generation point at stale offsets and are discarded.
+GENERATION_PATH = LEDGER_DIR / "generation"
+
+INDEX_VERSION = 2
+# context keys with postings; sidecars from an older INDEX_VERSION are rebuilt on load
+INDEX_FIELDS = ("app_id", "run_id", "step_id", "session_id", "cohort_id")
+BLOCK_BYTES = 64 * 1024
+# the sidecar is rewritten once its delta file outgrows it (and this floor)
+INDEX_DELTA_MIN_BYTES = 1024 * 1024
+
+_lock = RLock()
+
+# Serializes appends, rotation and sealed-segment rewrites across worker processes.
+# Take it before _lock, never while holding _lock.
+ledger_lock = file_lock("ledger")
+
+# Called as fn(seg_id, start_offset, end_offset, events) after each append, outside _lock.
+# Listeners must tolerate out-of-order or missed calls (compare positions, then catch up).
+_append_listeners: List[Callable[[int, int, int, List[Dict[str, Any]]], None]] = []
+
+# Called as fn(events) -> events to write, under ledger_lock once every other process's
+# appends are indexed (e.g. to drop event_ids another worker already wrote).
+_append_filters: List[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = []
+
+
+def _seg_name(seg_id: int) -> str:
+    return f"seg-{seg_id:08d}"
+
+
+class Segment:
+    """
+    One ledger segment plus its sidecar index.
+
+    Sidecar (seg-XXXXXXXX.idx.json):
+      - postings: {field: {value: [byte offsets]}} for INDEX_FIELDS (context.app_id, .run_id, ...)
+      - blocks:   [[start_offset, ts_min_ms, ts_max_ms]] every ~BLOCK_BYTES, for time-range pruning
+      - indexed_bytes: how far the file has been indexed (tail beyond it is re-indexed on load)
+
+    Appends don't rewrite the sidecar: the records they index are appended to
+    seg-XXXXXXXX.idx.delta.jsonl, one line per append, {"from", "to", "records":
+    [[offset, end, ts_ms, {field: value}]]}, and replayed on load. The sidecar is
+    rewritten (and the delta dropped) when the segment is sealed, rewritten or the
+    process exits, or once the delta outgrows it.
+    """
+
+    def __init__(self, seg_id: int, path: Path, sealed: bool = False):
+        self.seg_id = seg_id
+        self.path = path
+        self.idx_path = LEDGER_DIR / f"{_seg_name(seg_id)}.idx.json"
+        self.delta_path = LEDGER_DIR / f"{_seg_name(seg_id)}.idx.delta.jsonl"
+        self.sealed = sealed
+        self.created_ms: Optional[int] = None
+        self.indexed_bytes = 0
+        self.count = 0
+        self.ts_min: Optional[int] = None
+        self.ts_max: Optional[int] = None
+        self.postings: Dict[str, Dict[str, List[int]]] = {f: {} for f in INDEX_FIELDS}
+        self.blocks: List[List[Any]] = []
+        self._block_starts: List[int] = []
+        self._dirty = False
+        # indexed records not yet in the sidecar or its delta, and where the delta ends
+        self._pending: List[List[Any]] = []
+        self._delta_to = 0
+        self._base_bytes = 0
+        self._delta_bytes = 0
+
+    # --- index maintenance ---
+
+    def add(self, offset: int, end: int, event: Any) -> None:
+        ts_ms = keys = None
+        if isinstance(event, dict):
+            ts_ms = event_ts_ms(event)
+            ctx = event.get("context")
+            if isinstance(ctx, dict):
+                keys = {f: ctx[f] for f in INDEX_FIELDS if isinstance(ctx.get(f), str)}
+        self._index(offset, end, ts_ms, keys)
+        self._pending.append([offset, end, ts_ms, keys])
+        self._dirty = True
+
+    def _index(self, offset: int, end: int, ts_ms: Optional[int], keys: Optional[Dict[str, str]]) -> None:
+        if not self.blocks or offset - self.blocks[-1][0] >= BLOCK_BYTES:
+            self.blocks.append([offset, None, None])
+            self._block_starts.append(offset)
+        self.count += 1
+        self.indexed_bytes = end
+
+        if ts_ms is not None:
+            b = self.blocks[-1]
+            b[1] = ts_ms if b[1] is None else min(b[1], ts_ms)
+            b[2] = ts_ms if b[2] is None else max(b[2], ts_ms)
+            self.ts_min = ts_ms if self.ts_min is None else min(self.ts_min, ts_ms)
+            self.ts_max = ts_ms if self.ts_max is None else max(self.ts_max, ts_ms)
+
+        for field, v in (keys or {}).items():
+            self.postings[field].setdefault(v, []).append(offset)
+
+    def catch_up(self) -> None:
+        """Indexes complete lines appended past indexed_bytes (restart, or another writer)."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size <= self.indexed_bytes:
+            return
+        with self.path.open("rb") as f:
+            f.seek(self.indexed_bytes)
+            pos = self.indexed_bytes
+            for line in f:
+                if not line.endswith(b"\n") and not self.sealed:
+                    break  # partial write in progress; pick it up next time
+                end = pos + len(line)
+                if line.strip():
+                    try:
+                        ev = json.loads(line)
+                    except Exception:
+                        ev = None
+                    self.add(pos, end, ev)
+                else:
+                    self.indexed_bytes = end
+                pos = end
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "segment": self.path.name,
+            "sealed": self.sealed,
+            "created_ms": self.created_ms,
+            "indexed_bytes": self.indexed_bytes,
+            "count": self.count,
+            "ts_min": self.ts_min,
+            "ts_max": self.ts_max,
+            "postings": self.postings,
+            "blocks": self.blocks,
+        }
+
+    def load(self) -> bool:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return False
+        if not self.idx_path.exists():
+            # a segment created by an older version, or one whose sidecar was never written
+            self._dirty = self._load_delta(size)
+            return self._dirty
+        try:
+            text = self.idx_path.read_text(encoding="utf-8")
+            d = json.loads(text)
+        except Exception:
+            return False
+        if not isinstance(d, dict) or d.get("version") != INDEX_VERSION or d.get("segment") != self.path.name:
+            return False
+        if int(d.get("indexed_bytes") or 0) > size:
+            # segment was truncated/rewritten underneath the sidecar
+            return False
+        self._base_bytes = len(text)
+        self.sealed = bool(d.get("sealed")) or self.sealed
+        self.created_ms = d.get("created_ms")
+        self.indexed_bytes = int(d.get("indexed_bytes") or 0)
+        self.count = int(d.get("count") or 0)
+        self.ts_min = d.get("ts_min")
+        self.ts_max = d.get("ts_max")
+        postings = d.get("postings") if isinstance(d.get("postings"), dict) else {}
+        self.postings = {f: dict(postings.get(f) or {}) for f in INDEX_FIELDS}
+        self.blocks = [list(b) for b in (d.get("blocks") or [])]
+        self._block_starts = [b[0] for b in self.blocks]
+        # a replayed delta is folded into the sidecar by the next save (e.g. on seal)
+        self._dirty = self._load_delta(size)
+        return True
+
+    def _load_delta(self, size: int) -> bool:
+        """
+        Replays delta lines that continue the index; lines that overlap it (several
+        writers) are applied from indexed_bytes on. Stops at a gap or a torn line; the
+        tail past that is re-indexed from the segment by catch_up().
+        """
+        self._delta_to = self.indexed_bytes
+        try:
+            f = self.delta_path.open("rb")
+        except FileNotFoundError:
+            return False
+        replayed = False
+        with f:
+            for line in f:
+                self._delta_bytes += len(line)
+                try:
+                    d = json.loads(line)
+                    lo, hi, records = int(d["from"]), int(d["to"]), d["records"]
+                except Exception:
+                    break
+                if hi <= self.indexed_bytes:
+                    continue
+                if lo > self.indexed_bytes or hi > size:
+                    break
+                for offset, end, ts_ms, keys in records:
+                    if offset >= self.indexed_bytes:
+                        self._index(offset, end, ts_ms, keys)
+                self.indexed_bytes = hi
+                replayed = True
+        self._delta_to = self.indexed_bytes
+        return replayed
+
+    def flush_delta(self) -> None:
+        """Appends what was indexed since the last flush to the delta file; call with _lock held."""
+        if self.indexed_bytes <= self._delta_to:
+            return
+        if self._delta_bytes > max(INDEX_DELTA_MIN_BYTES, self._base_bytes):
+            self.save()
+            return
+        line = (json.dumps({"from": self._delta_to, "to": self.indexed_bytes, "records": self._pending}) + "\n").encode("utf-8")
+        with self.delta_path.open("ab") as f:
+            f.write(line)
+        self._delta_bytes += len(line)
+        self._delta_to = self.indexed_bytes
+        self._pending = []
+
+    def save(self) -> None:
+        """Rewrites the sidecar with the whole index and drops the delta file."""
+        if not self._dirty and not self._pending:
+            return
+        text = json.dumps(self.to_dict())
+        atomic_write_text(self.idx_path, text)
+        try:
+            self.delta_path.unlink()
+        except FileNotFoundError:
+            pass
+        self._dirty = False
+        self._pending = []
+        self._delta_to = self.indexed_bytes
+        self._base_bytes = len(text)
+        self._delta_bytes = 0
+
+    # --- candidate selection ---
+
+    def overlaps(self, since_ms: Optional[int], until_ms: Optional[int]) -> bool:
+        if since_ms is None and until_ms is None:
+            return True
+        if self.ts_min is None:
+            return False
+        if since_ms is not None and self.ts_max < since_ms:
+            return False
+        if until_ms is not None and self.ts_min >= until_ms:
+            return False
+        return True
+
+    def _block_ok(self, i: int, since_ms: Optional[int], until_ms: Optional[int]) -> bool:
+        b = self.blocks[i]
+        if since_ms is None and until_ms is None:
+            return True
+        if b[1] is None:
+            return False
+        if since_ms is not None and b[2] < since_ms:
+            return False
+        if until_ms is not None and b[1] >= until_ms:
+            return False
+        return True
+
+    def may_contain(self, keys: Dict[str, str]) -> bool:
+        """False when the postings rule out every keyed filter value in this segment."""
+        return all(v in self.postings[f] for f, v in keys.items())
+
+    def candidate_offsets(
+        self,
+        keys: Dict[str, str],
+        since_ms: Optional[int],
+        until_ms: Optional[int],
+    ) -> Optional[List[int]]:
+        """
+        Line offsets that may match, ascending, from the postings of the keyed filters
+        ({INDEX_FIELDS field: value}). None means "no keyed filter": use blocks.
+        """
+        lists = [self.postings[f].get(v) or [] for f, v in keys.items()]
+        if not lists:
+            return None
+        lists.sort(key=len)
+        offs = lists[0]
+        for other in lists[1:]:
+            keep = set(other)
+            offs = [o for o in offs if o in keep]
+        if since_ms is None and until_ms is None:
+            return list(offs)
+        out = []
+        for o in offs:
+            i = bisect.bisect_right(self._block_starts, o) - 1
+            if i >= 0 and self._block_ok(i, since_ms, until_ms):
+                out.append(o)
+        return out
+
+    def candidate_spans(self, since_ms: Optional[int], until_ms: Optional[int], end: int) -> List[Tuple[int, int]]:
+        """Byte ranges of the blocks overlapping the time filter (blocks always start on a line)."""
+        spans: List[Tuple[int, int]] = []
+        n = len(self.blocks)
+        for i in range(n):
+            if not self._block_ok(i, since_ms, until_ms):
+                continue
+            stop = self.blocks[i + 1][0] if i + 1 < n else end
+            spans.append((self.blocks[i][0], stop))
+        return spans
+
+
+_segments: Dict[int, Segment] = {}
+_loaded = False
+_generation: Optional[int] = None
+
+
+def _discover() -> None:
+    if LEGACY_LOG.exists() and 0 not in _segments:
+        seg = Segment(0, LEGACY_LOG, sealed=True)
+        seg.load()
+        _segments[0] = seg
+    for p in sorted(LEDGER_DIR.glob("seg-*.jsonl")):
+        try:
+            seg_id = int(p.stem.split("-", 1)[1])
+        except Exception:
+            continue
+        if seg_id in _segments:
+            continue
+        seg = Segment(seg_id, p)
+        seg.load()
+        _segments[seg_id] = seg
+    ids = sorted(_segments)
+    for seg_id in ids[:-1]:
+        _segments[seg_id].sealed = True
+
+
+def refresh() -> None:
+    """Picks up new segments and indexes any unindexed tail bytes."""
+    global _loaded
+    with _lock:
+        _discover()
+        for seg in _segments.values():
+            seg.catch_up()
+            if seg.sealed:
+                seg.save()
+        _loaded = True
+
+
+@atexit.register
+def _save_on_exit() -> None:
+    with _lock:
+        for seg in _segments.values():
+            try:
+                seg.save()
+            except Exception:
+                pass
+
+
+def _ensure_loaded() -> None:
+    global _generation
+    gen = ledger_generation()
+    if gen != _generation:
+        # another process rewrote a sealed segment: every cached index may be stale
+        # (and must not be saved over the new sidecar), so reload them from disk
+        _segments.clear()
+        _generation = gen
+        refresh()
+    elif not _loaded:
+        refresh()
+
+
+def _catch_up_tail() -> None:
+    """
+    Indexes lines other processes appended to the active segment, and any segment they
+    rotated to. Call with _lock held.
+    """
+    ids = [k for k in sorted(_segments) if k > 0]
+    active = ids[-1] if ids else 0
+    if (LEDGER_DIR / f"{_seg_name(active + 1)}.jsonl").exists():
+        _discover()
+    for k in sorted(_segments):
+        if k >= max(active, 1):
+            _segments[k].catch_up()
+
+
+def segments() -> List[Segment]:
+    with _lock:
+        _ensure_loaded()
+        _catch_up_tail()
+        return [_segments[k] for k in sorted(_segments)]
+
+
+def _active_for_write(nbytes: int) -> Segment:
+    ids = [k for k in sorted(_segments) if k > 0]
+    active = _segments[ids[-1]] if ids else None
+    if active is not None:
+        active.catch_up()
+        too_big = LEDGER_SEGMENT_MAX_BYTES > 0 and active.indexed_bytes + nbytes > LEDGER_SEGMENT_MAX_BYTES
+        too_old = (
+            LEDGER_SEGMENT_MAX_AGE_S > 0
+            and active.created_ms is not None
+            and (time.time() * 1000 - active.created_ms) > LEDGER_SEGMENT_MAX_AGE_S * 1000
+        )
+        if active.count > 0 and (too_big or too_old):
+            _fsync_path(active.path)
+            active.sealed = True
+            active.save()
+            active = None
+    if active is None:
+        seg_id = (ids[-1] + 1) if ids else 1
+        active = Segment(seg_id, LEDGER_DIR / f"{_seg_name(seg_id)}.jsonl")
+        active.created_ms = int(time.time() * 1000)
+        active.path.touch()
+        active._dirty = True
+        active.save()  # so created_ms survives a restart; appends only add deltas
+        _segments[seg_id] = active
+    return active
+
+
+def append_events(events: List[Dict[str, Any]], fsync: bool = False) -> Dict[str, Any]:
+    """
+    Appends already-normalized events to the active segment in one write and indexes them.
+    Rotates to a new segment when the size or age threshold is exceeded.
+    fsync=True makes the write durable before returning.
+    Safe across worker processes: the write happens under ledger_lock after indexing
+    what other processes appended, and append filters may drop events.
+    """
+    if not events:
+        return {"ok": True, "count": 0}
+    with ledger_lock:
+        with _lock:
+            _ensure_loaded()
+            _catch_up_tail()
+        for filt in list(_append_filters):
+            events = filt(events)
+        if not events:
+            return {"ok": True, "count": 0}
+        lines = [(json.dumps(e) + "\n").encode("utf-8") for e in events]
+        data = b"".join(lines)
+        with _lock:
+            seg = _active_for_write(len(data))
+            with seg.path.open("ab") as f:
+                start = f.tell()
+                f.write(data)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            if start != seg.indexed_bytes:
+                # someone else appended in between; index their lines first
+                seg.catch_up()
+            else:
+                pos = start
+                for line, ev in zip(lines, events):
+                    seg.add(pos, pos + len(line), ev)
+                    pos += len(line)
+            seg.flush_delta()
+    end = start + len(data)
+    for fn in list(_append_listeners):
+        try:
+            fn(seg.seg_id, start, end, events)
+        except Exception:
+            pass
+    return {"ok": True, "count": len(events), "segment": seg.path.name, "offset": start}
+
+
+def replace_sealed(seg_id: int, new_path: Path) -> Segment:
+    """
+    Swaps a sealed segment's file for a rewritten copy holding the same records in the same
+    order (e.g. a backfill), and rebuilds its sidecar index. Byte offsets change, so the
+    ledger generation is bumped and live consumers must be rebased or rebuilt by the
+    caller (see fabric.ledger.consumer.swap_sealed_segment).
+    """
+    global _generation
+    with ledger_lock, _lock:
+        _ensure_loaded()
+        old = _segments.get(seg_id)
+        if old is None or not old.sealed:
+            raise ValueError("SEGMENT_NOT_SEALED")
+        _generation = _bump_generation()
+        os.replace(new_path, old.path)
+        _fsync_path(old.path.parent)
+        seg = Segment(seg_id, old.path, sealed=True)
+        seg.created_ms = old.created_ms
+        seg.catch_up()
+        seg.save()
+        _segments[seg_id] = seg
+        return seg
+
+
+def ledger_generation() -> int:
+    try:
+        return int(GENERATION_PATH.read_text(encoding="utf-8").strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _bump_generation() -> int:
+    gen = ledger_generation() + 1
+    atomic_write_text(GENERATION_PATH, f"{gen}\n")
+    return gen
+
+
+def add_append_listener(fn: Callable[[int, int, int, List[Dict[str, Any]]], None]) -> None:
+    if fn not in _append_listeners:
+        _append_listeners.append(fn)
+
+
+def add_append_filter(fn: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]) -> None:
+    if fn not in _append_filters:
+        _append_filters.append(fn)
+
+
+def tail_position() -> Tuple[int, int]:
+    """(seg_id, offset) just past the last indexed record."""
+    segs = segments()
+    if not segs:
+        return (0, 0)
+    last = segs[-1]
+    return (last.seg_id, last.indexed_bytes)
+
+
+def iter_from(position: Tuple[int, int]) -> Iterator[Tuple[Tuple[int, int], Any]]:
+    """
+    Forward replay from `position` (seg_id, offset) to the current indexed tail.
+    Yields ((seg_id, end_offset), record) so consumers can checkpoint after any record.
+    """
+    seg_id, offset = position
+    for seg in segments():
+        if seg.seg_id < seg_id:
+            continue
+        start = offset if seg.seg_id == seg_id else 0
+        with _lock:
+            stop = seg.indexed_bytes
+            if start >= stop:
+                continue
+            # opened under the lock so a concurrent replace_sealed() cannot swap the file
+            f = seg.path.open("rb")
+        with f:
+            f.seek(start)
+            pos = start
+            while pos < stop:
+                line = f.readline()
+                if not line:
+                    break
+                pos += len(line)
+                # unparseable lines are yielded as None so the position still advances
+                yield (seg.seg_id, pos), _parse(line)
+
+
+def _fsync_path(path: Path) -> None:
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_active() -> None:
+    """fsyncs the newest segment (used by interval fsync policies)."""
+    with _lock:
+        ids = [k for k in sorted(_segments) if k > 0]
+        if ids:
+            _fsync_path(_segments[ids[-1]].path)
+
+
+def _parse(line: bytes) -> Any:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except Exception:
+        return None
+
+
+def _keys(app_id: Optional[str], run_id: Optional[str]) -> Dict[str, str]:
+    keys = {}
+    if app_id:
+        keys["app_id"] = app_id
+    if run_id:
+        keys["run_id"] = run_id
+    return keys
+
+
+def _iter_segment_newest_first(
+    seg: Segment,
+    keys: Dict[str, str],
+    since_ms: Optional[int],
+    until_ms: Optional[int],
+    prefilter: Optional[Pattern[bytes]] = None,
+) -> Iterator[Any]:
+    with _lock:
+        end = seg.indexed_bytes
+        offsets = seg.candidate_offsets(keys, since_ms, until_ms)
+        spans = seg.candidate_spans(since_ms, until_ms, end) if offsets is None else []
+        if end == 0 or (offsets is not None and not offsets):
+            return
+        f = seg.path.open("rb")
+    with f, mmap.mmap(f.fileno(), end, access=mmap.ACCESS_READ) as mm:
+        if offsets is not None:
+            for o in reversed(offsets):
+                le = mm.find(b"\n", o, end)
+                line = mm[o : end if le == -1 else le]
+                if prefilter is not None and not prefilter.search(line):
+                    continue
+                ev = _parse(line)
+                if ev is not None:
+                    yield ev
+            return
+        for start, stop in reversed(spans):
+            if prefilter is not None:
+                lines = iter_candidate_lines(mm, start, stop, prefilter)
+            else:
+                lines = iter_lines_reverse(mm, start, stop)
+            for line in lines:
+                ev = _parse(line)
+                if ev is not None:
+                    yield ev
+
+
+def iter_events(
+    app_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    since_ms: Optional[int] = None,
+    until_ms: Optional[int] = None,
+    match: Optional[Callable[[Any], bool]] = None,
+    prefilter: Optional[Pattern[bytes]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[Any]:
+    """
+    Records that satisfy `match`, newest-first, read lazily with the same segment and
+    index pruning as read_events. Scan counters are written into `stats` as it goes.
+    """
+    keys = _keys(app_id, run_id)
+    segs = segments()
+    if stats is not None:
+        stats.update(segments_total=len(segs), segments_opened=0)
+    for seg in reversed(segs):
+        if not seg.overlaps(since_ms, until_ms) or not seg.may_contain(keys):
+            continue
+        if stats is not None:
+            stats["segments_opened"] += 1
+        for ev in _iter_segment_newest_first(seg, keys, since_ms, until_ms, prefilter):
+            if match is None or match(ev):
+                yield ev
+
+
+def read_events(
+    app_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    since_ms: Optional[int] = None,
+    until_ms: Optional[int] = None,
+    limit: Optional[int] = None,
+    match: Optional[Callable[[Any], bool]] = None,
+    prefilter: Optional[Pattern[bytes]] = None,
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Returns the newest `limit` records that satisfy `match`, in ledger (oldest-first) order.
+    Only segments whose index can match the filters are opened; within a segment only the
+    indexed offsets (app_id/run_id) or overlapping time blocks are read.
+    Segments are memory-mapped; with a `prefilter` (see fabric.ledger.scan.field_pattern)
+    raw lines are searched first and only hits are decoded.
+    The index narrows candidates; `match` is still the authority.
+    """
+    rows: List[Any] = []
+    stats: Dict[str, Any] = {}
+    it = iter_events(app_id, run_id, since_ms, until_ms, match, prefilter, stats)
+    try:
+        for ev in it:
+            rows.append(ev)
+            if limit is not None and len(rows) >= limit:
+                break
+    finally:
+        it.close()
+    rows.reverse()
+    return rows, stats
+
+
+def _iter_segment_forward(
+    seg: Segment,
+    keys: Dict[str, str],
+    since_ms: Optional[int],
+    until_ms: Optional[int],
+    after: int,
+    prefilter: Optional[Pattern[bytes]] = None,
+) -> Iterator[Tuple[Tuple[int, int], Any]]:
+    """Candidate records starting at or past byte `after`, oldest-first, with their end positions."""
+    with _lock:
+        end = seg.indexed_bytes
+        offsets = seg.candidate_offsets(keys, since_ms, until_ms)
+        spans = seg.candidate_spans(since_ms, until_ms, end) if offsets is None else []
+        if end <= after or (offsets is not None and not offsets):
+            return
+        f = seg.path.open("rb")
+    with f, mmap.mmap(f.fileno(), end, access=mmap.ACCESS_READ) as mm:
+        if 0 < after and mm[after - 1 : after] != b"\n":
+            # not a line boundary (hand-made or stale cursor): resume at the next line
+            le = mm.find(b"\n", after, end)
+            after = end if le == -1 else le + 1
+        if offsets is not None:
+            for o in offsets[bisect.bisect_left(offsets, after) :]:
+                le = mm.find(b"\n", o, end)
+                stop = end if le == -1 else le + 1
+                line = mm[o:stop]
+                if prefilter is not None and not prefilter.search(line):
+                    continue
+                ev = _parse(line)
+                if ev is not None:
+                    yield (seg.seg_id, stop), ev
+            return
+        for start, stop in spans:
+            if stop <= after:
+                continue
+            start = max(start, after)
+            if prefilter is not None:
+                lines = candidate_line_spans(mm, start, stop, prefilter)
+            else:
+                lines = iter_line_spans(mm, start, stop)
+            for ls, le in lines:
+                ev = _parse(mm[ls:le])
+                if ev is not None:
+                    yield (seg.seg_id, le), ev
+
+
+def query_events(
+    keys: Optional[Dict[str, str]] = None,
+    since_ms: Optional[int] = None,
+    until_ms: Optional[int] = None,
+    after: Optional[Tuple[int, int]] = None,
+    limit: int = 100,
+    match: Optional[Callable[[Any], bool]] = None,
+    prefilter: Optional[Pattern[bytes]] = None,
+) -> Tuple[List[Tuple[Tuple[int, int], Any]], Optional[Tuple[int, int]], Dict[str, Any]]:
+    """
+    Keyset page of records that satisfy `match`, oldest-first, strictly after ledger
+    position `after` (seg_id, end offset of the last record already seen).
+
+    keys ({INDEX_FIELDS field: value}) select offsets from the postings, since/until
+    prune segments and blocks, and `prefilter` searches raw lines before decoding, as in
+    read_events. Returns ([(position, record)], next_after, stats); next_after is None
+    when the page reached the end of the ledger.
+    """
+    keys = keys or {}
+    seg_after, off_after = after or (0, 0)
+    rows: List[Tuple[Tuple[int, int], Any]] = []
+    opened = 0
+    segs = segments()
+    for seg in segs:
+        if seg.seg_id < seg_after:
+            continue
+        if not seg.overlaps(since_ms, until_ms) or not seg.may_contain(keys):
+            continue
+        opened += 1
+        start = off_after if seg.seg_id == seg_after else 0
+        for pos, ev in _iter_segment_forward(seg, keys, since_ms, until_ms, start, prefilter):
+            if match is not None and not match(ev):
+                continue
+            rows.append((pos, ev))
+            if len(rows) > limit:
+                break
+        if len(rows) > limit:
+            break
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_after = rows[-1][0] if more else None
+    return rows, next_after, {"segments_total": len(segs), "segments_opened": opened}
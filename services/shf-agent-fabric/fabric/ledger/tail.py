@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import BinaryIO, Iterator, Optional
+
+BLOCK_SIZE = 64 * 1024
+
+
+def iter_lines_reverse(
+    f: BinaryIO,
+    start: int = 0,
+    end: Optional[int] = None,
+    block_size: int = BLOCK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Yields the lines of f[start:end] newest-first (without newlines), reading fixed-size
+    blocks backwards from `end`. Memory stays at one block plus the longest line.
+    A final line without a trailing newline is yielded too.
+    """
+    if end is None:
+        f.seek(0, 2)
+        end = f.tell()
+    pos = end
+    carry = b""
+    while pos > start:
+        n = min(block_size, pos - start)
+        pos -= n
+        f.seek(pos)
+        chunk = f.read(n) + carry
+        lines = chunk.split(b"\n")
+        # lines[0] may continue in the previous block; keep it until we know
+        carry = lines[0]
+        for line in reversed(lines[1:]):
+            if line.strip():
+                yield line
+    if carry.strip():
+        yield carry
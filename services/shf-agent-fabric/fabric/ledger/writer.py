@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import atexit
+import queue
+import time
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional
+
+from fabric.ledger.segments import append_events, fsync_active
+from fabric.settings import (
+    LEDGER_FLUSH_INTERVAL_MS,
+    LEDGER_FSYNC,
+    LEDGER_FSYNC_INTERVAL_MS,
+    LEDGER_MAX_BATCH,
+    LEDGER_QUEUE_MAX,
+)
+
+FSYNC_POLICIES = ("none", "batch", "interval")
+QUEUE_PUT_TIMEOUT_S = 5.0
+
+
+class _Item:
+    __slots__ = ("events", "durable", "done", "error", "on_error")
+
+    def __init__(
+        self,
+        events: List[Dict[str, Any]],
+        durable: bool,
+        wait: bool,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ):
+        self.events = events
+        self.durable = durable
+        self.done = Event() if wait else None
+        self.error: Optional[BaseException] = None
+        self.on_error = on_error
+
+
+class GroupCommitWriter:
+    """
+    Background group-commit writer for the event ledger.
+
+    Callers enqueue normalized events; one writer thread drains the bounded queue and
+    appends everything it has (up to max_batch events) in a single write. While a batch
+    is being written the next one accumulates, so throughput grows with concurrency.
+
+    fsync policy:
+      - none:     never fsync (OS decides)
+      - batch:    fsync after every batch
+      - interval: fsync at most every fsync_interval_ms (and when idle)
+    A durable submit always fsyncs the batch that carries it and blocks until it is on disk.
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: int = LEDGER_FLUSH_INTERVAL_MS,
+        max_batch: int = LEDGER_MAX_BATCH,
+        queue_max: int = LEDGER_QUEUE_MAX,
+        fsync: str = LEDGER_FSYNC,
+        fsync_interval_ms: int = LEDGER_FSYNC_INTERVAL_MS,
+    ):
+        self.flush_interval_s = max(0, int(flush_interval_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.fsync = fsync if fsync in FSYNC_POLICIES else "none"
+        self.fsync_interval_s = max(1, int(fsync_interval_ms)) / 1000.0
+        self._q: "queue.Queue[_Item]" = queue.Queue(maxsize=max(1, int(queue_max)))
+        self._thread: Optional[Thread] = None
+        self._start_lock = Lock()
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self.stats = {"batches": 0, "events": 0, "fsyncs": 0, "max_batch_seen": 0, "errors": 0}
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="ledger-writer", daemon=True)
+                self._thread.start()
+
+    def submit(
+        self,
+        events: List[Dict[str, Any]],
+        durable: bool = False,
+        wait: bool = False,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> None:
+        """
+        Enqueues events for the next batch. durable=True blocks until they are fsynced;
+        wait=True blocks until they are written (not necessarily fsynced).
+        Raises RuntimeError if the queue stays full (backpressure) or the write failed.
+        on_error is called on the writer thread if the batch carrying these events fails
+        (the only failure signal a non-waiting caller gets).
+        """
+        self._ensure_started()
+        item = _Item(list(events), durable, wait or durable, on_error)
+        try:
+            self._q.put(item, timeout=QUEUE_PUT_TIMEOUT_S)
+        except queue.Full:
+            raise RuntimeError("LEDGER_QUEUE_FULL")
+        if item.done is not None:
+            item.done.wait()
+            if item.error is not None:
+                raise RuntimeError(f"LEDGER_WRITE_FAILED: {item.error}")
+
+    def flush(self) -> None:
+        """Blocks until everything submitted before this call has been written."""
+        self.submit([], wait=True)
+
+    def _collect(self, first: _Item) -> List[_Item]:
+        items = [first]
+        n = len(first.events)
+        deadline = time.monotonic() + self.flush_interval_s
+        while n < self.max_batch:
+            try:
+                items.append(self._q.get_nowait())
+            except queue.Empty:
+                # Durable/waiting callers are flushed right away; otherwise linger briefly
+                # so concurrent producers share one write.
+                if any(it.done is not None for it in items):
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            n += len(items[-1].events)
+        return items
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._q.get(timeout=self.fsync_interval_s)
+            except queue.Empty:
+                self._maybe_interval_fsync(idle=True)
+                continue
+            items = self._collect(first)
+            batch = [e for it in items for e in it.events]
+            durable = any(it.durable for it in items)
+            fsync = durable or self.fsync == "batch" or (
+                self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval_s
+            )
+            err: Optional[BaseException] = None
+            try:
+                if batch:
+                    append_events(batch, fsync=fsync)
+                    self.stats["batches"] += 1
+                    self.stats["events"] += len(batch)
+                    self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+                    if fsync:
+                        self.stats["fsyncs"] += 1
+                        self._last_fsync = time.monotonic()
+                        self._unsynced = False
+                    else:
+                        self._unsynced = True
+            except BaseException as e:  # surfaced to waiting callers
+                err = e
+                self.stats["errors"] += 1
+            for it in items:
+                it.error = err
+                if err is not None and it.on_error is not None:
+                    try:
+                        it.on_error(err)
+                    except Exception:
+                        self.stats["errors"] += 1
+                if it.done is not None:
+                    it.done.set()
+
+    def _maybe_interval_fsync(self, idle: bool = False) -> None:
+        if self.fsync != "interval" or not self._unsynced:
+            return
+        if idle or time.monotonic() - self._last_fsync >= self.fsync_interval_s:
+            try:
+                fsync_active()
+                self.stats["fsyncs"] += 1
+            except Exception:
+                self.stats["errors"] += 1
+                return
+            self._last_fsync = time.monotonic()
+            self._unsynced = False
+
+
+_writer: Optional[GroupCommitWriter] = None
+_writer_lock = Lock()
+
+
+def get_writer() -> GroupCommitWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter()
+    return _writer
+
+
+@atexit.register
+def _drain_on_exit() -> None:
+    if _writer is not None and _writer._thread is not None and _writer._thread.is_alive():
+        try:
+            _writer.flush()
+            _writer._maybe_interval_fsync(idle=True)
+        except Exception:
+            pass
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from fabric.loe.sketch import QuantileSketch
+
+COMPLETED_OUTCOMES = ("complete", "completed", "success", "placed")
+
+
+class LoeAccumulator:
+    """
+    Mergeable running totals behind the LOE `derived` block.
+
+    add() consumes events in ledger order; add_older() consumes them newest-first;
+    merge(other) appends a window that comes *after* this one (order matters only for
+    first_reward_event_index).
+    """
+
+    def __init__(self) -> None:
+        self.seen = 0
+        self.canonical = 0
+        self.manual = 0
+        self.duration_sketch = QuantileSketch()
+        self.duration_count = 0
+        self.duration_sum = 0.0
+        self.cost_sum = 0.0
+        self.cost_count = 0
+        self.step_counts: Dict[str, int] = {}
+        self.step_sketches: Dict[str, QuantileSketch] = {}
+        self.first_reward_index: Optional[int] = None
+        self.completed = 0
+        self._newest_first = False
+
+    @property
+    def legacy(self) -> int:
+        return self.seen - self.canonical
+
+    def add(self, e: Dict[str, Any]) -> None:
+        self.seen += 1
+        if e.get("schema_version") != 1:
+            return
+        idx = self.canonical
+        self.canonical += 1
+
+        metrics = e.get("metrics") or {}
+        flags = e.get("flags") or {}
+        context = e.get("context") or {}
+
+        if flags.get("manual_override") is True:
+            self.manual += 1
+
+        step = context.get("step_id")
+        if isinstance(step, str):
+            self.step_counts[step] = self.step_counts.get(step, 0) + 1
+
+        d = metrics.get("duration_ms")
+        if isinstance(d, (int, float)):
+            self.duration_sketch.add(d)
+            self.duration_count += 1
+            self.duration_sum += float(d)
+            if isinstance(step, str):
+                sk = self.step_sketches.get(step)
+                if sk is None:
+                    sk = self.step_sketches[step] = QuantileSketch()
+                sk.add(d)
+
+        c = metrics.get("cost_usd")
+        if isinstance(c, (int, float)):
+            self.cost_sum += float(c)
+            self.cost_count += 1
+
+        if self.first_reward_index is None and (flags.get("reward") or flags.get("first_reward")):
+            self.first_reward_index = idx
+
+        outcome = e.get("outcome")
+        if isinstance(outcome, str) and outcome.lower() in COMPLETED_OUTCOMES:
+            self.completed += 1
+
+    def add_older(self, e: Dict[str, Any]) -> None:
+        """add() for an event that precedes everything added so far (don't mix with add())."""
+        self._newest_first = True
+        first = self.first_reward_index
+        canonical = self.canonical
+        self.first_reward_index = -1  # keep add() from recording a reward index
+        self.add(e)
+        if self.canonical == canonical:
+            self.first_reward_index = first
+            return
+        step = (e.get("context") or {}).get("step_id")
+        if isinstance(step, str):
+            # keep step_counts in reverse first-seen order; derived() flips it back
+            self.step_counts[step] = self.step_counts.pop(step)
+        flags = e.get("flags") or {}
+        if flags.get("reward") or flags.get("first_reward"):
+            self.first_reward_index = 0
+        else:
+            self.first_reward_index = first + 1 if first is not None else None
+
+    def merge(self, other: "LoeAccumulator") -> "LoeAccumulator":
+        if self.first_reward_index is None and other.first_reward_index is not None:
+            self.first_reward_index = self.canonical + other.first_reward_index
+        self.seen += other.seen
+        self.canonical += other.canonical
+        self.manual += other.manual
+        self.duration_sketch.merge(other.duration_sketch)
+        self.duration_count += other.duration_count
+        self.duration_sum += other.duration_sum
+        self.cost_sum += other.cost_sum
+        self.cost_count += other.cost_count
+        for k, v in other.step_counts.items():
+            self.step_counts[k] = self.step_counts.get(k, 0) + v
+        for k, sk in other.step_sketches.items():
+            mine = self.step_sketches.get(k)
+            if mine is None:
+                self.step_sketches[k] = sk.copy()
+            else:
+                mine.merge(sk)
+        self.completed += other.completed
+        return self
+
+    def copy(self) -> "LoeAccumulator":
+        return LoeAccumulator().merge(self)
+
+    def derived(self) -> Dict[str, Any]:
+        total = self.canonical
+        n_d = self.duration_count
+        avg_duration_ms = (self.duration_sum / n_d) if n_d else 0.0
+        q = self.duration_sketch.summary()
+
+        steps = list(self.step_counts.items())
+        if self._newest_first:
+            steps.reverse()
+        top_steps: List[Tuple[str, int]] = sorted(steps, key=lambda kv: kv[1], reverse=True)[:5]
+        friction_steps = []
+        for sid, cnt in top_steps:
+            row: Dict[str, Any] = {"step_id": sid, "event_count": cnt}
+            sk = self.step_sketches.get(sid)
+            if sk is not None:
+                row["duration_ms"] = sk.summary()
+            friction_steps.append(row)
+
+        return {
+            "events_seen_after_filter": self.seen,
+            "canonical_events_used": total,
+            "legacy_events_ignored": self.legacy,
+            "manual_override_rate": (self.manual / total) if total else 0.0,
+            "avg_duration_ms": avg_duration_ms,
+            "p50_duration_ms": q["p50"],
+            "p90_duration_ms": q["p90"],
+            "p95_duration_ms": q["p95"],
+            "p99_duration_ms": q["p99"],
+            "avg_cost_usd": (self.cost_sum / self.cost_count) if self.cost_count else 0.0,
+            "total_cost_usd": self.cost_sum,
+            "first_reward_event_index": self.first_reward_index,
+            "completed_count_in_window": self.completed,
+            "friction_steps": friction_steps,
+        }
+
+    def counters(self) -> Dict[str, Any]:
+        """Additive totals (no sketches): deltas of these can be summed by a client."""
+        return {
+            "seen": self.seen,
+            "canonical": self.canonical,
+            "manual": self.manual,
+            "duration_count": self.duration_count,
+            "duration_sum": self.duration_sum,
+            "cost_count": self.cost_count,
+            "cost_sum": self.cost_sum,
+            "completed": self.completed,
+            "rewarded": self.first_reward_index is not None,
+            "step_counts": dict(self.step_counts),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seen": self.seen,
+            "canonical": self.canonical,
+            "manual": self.manual,
+            "duration_sketch": self.duration_sketch.to_dict(),
+            "duration_count": self.duration_count,
+            "duration_sum": self.duration_sum,
+            "cost_sum": self.cost_sum,
+            "cost_count": self.cost_count,
+            "step_counts": self.step_counts,
+            "step_sketches": {k: v.to_dict() for k, v in self.step_sketches.items()},
+            "first_reward_index": self.first_reward_index,
+            "completed": self.completed,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "LoeAccumulator":
+        a = cls()
+        a.seen = int(d.get("seen") or 0)
+        a.canonical = int(d.get("canonical") or 0)
+        a.manual = int(d.get("manual") or 0)
+        a.duration_sketch = QuantileSketch.from_dict(d.get("duration_sketch"))
+        a.duration_count = int(d.get("duration_count") or 0)
+        a.duration_sum = float(d.get("duration_sum") or 0.0)
+        a.cost_sum = float(d.get("cost_sum") or 0.0)
+        a.cost_count = int(d.get("cost_count") or 0)
+        a.step_counts = {str(k): int(v) for k, v in (d.get("step_counts") or {}).items()}
+        a.step_sketches = {str(k): QuantileSketch.from_dict(v) for k, v in (d.get("step_sketches") or {}).items()}
+        fr = d.get("first_reward_index")
+        a.first_reward_index = int(fr) if fr is not None else None
+        a.completed = int(d.get("completed") or 0)
+        return a
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from fabric.ledger.consumer import LedgerConsumer
+from fabric.ledger.segments import LEDGER_DIR
+from fabric.loe.accumulator import LoeAccumulator
+from fabric.loe.frozen import frozen
+from fabric.loe.scopes import Scope, parse_scope_key, scope_key, scopes_for
+
+CHECKPOINT_PATH = LEDGER_DIR / "loe_aggregates.json"
+
+
+class LoeAggregates(LedgerConsumer):
+    """
+    All-history LOE accumulators per (app_id, run_id) filter combination.
+    A rebuild starts from the frozen summaries of events removed by retention.
+    """
+
+    version = 4
+    summarizes_expired = True
+
+    def __init__(self) -> None:
+        self.accs: Dict[Scope, LoeAccumulator] = {}
+        super().__init__(CHECKPOINT_PATH)
+
+    def reset(self) -> None:
+        self.accs = frozen.seed_aggregates()
+
+    def apply(self, e: Dict[str, Any]) -> None:
+        for scope in scopes_for(e):
+            acc = self.accs.get(scope)
+            if acc is None:
+                acc = self.accs[scope] = LoeAccumulator()
+            acc.add(e)
+
+    def state_to_dict(self) -> Dict[str, Any]:
+        return {scope_key(k): v.to_dict() for k, v in self.accs.items()}
+
+    def state_from_dict(self, d: Dict[str, Any]) -> None:
+        self.accs = {parse_scope_key(k): LoeAccumulator.from_dict(v) for k, v in d.items()}
+
+
+_aggregates = LoeAggregates()
+
+
+def lookup(app_id: Optional[str] = None, run_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    LOE `derived` block over all history for the (app_id, run_id) filter,
+    current as of the ledger tail.
+    """
+    with _aggregates.lock:
+        _aggregates.catch_up()
+        acc = _aggregates.accs.get((app_id or None, run_id or None))
+        return (acc or LoeAccumulator()).derived()
+
+
+def checkpoint_info() -> Dict[str, Any]:
+    with _aggregates.lock:
+        return {**_aggregates.checkpoint_info(), "scopes": len(_aggregates.accs)}
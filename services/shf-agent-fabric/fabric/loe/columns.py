@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from fabric.events.schema import event_ts_ms
+from fabric.file_lock import atomic_write_text, file_lock
+from fabric.ledger.consumer import LedgerConsumer
+from fabric.ledger.segments import LEDGER_DIR, ledger_generation
+from fabric.loe.accumulator import COMPLETED_OUTCOMES
+from fabric.loe.sketch import QuantileSketch
+from fabric.run_ledger import is_fabric_event
+from fabric.settings import LOE_COLUMNS
+
+COLUMNS_DIR = LEDGER_DIR / "columns"
+META_PATH = COLUMNS_DIR / "meta.json"
+
+# column files are rewritten in place; workers take this around every load and save
+_files_lock = file_lock("loe_columns")
+
+NO_TS = -(2 ** 63)
+
+# bit flags column
+CANONICAL = 1
+MANUAL_OVERRIDE = 2
+REWARD = 4
+FIRST_REWARD = 8
+COMPLETED = 16
+
+# name -> NumPy dtype (C type codes, as in the raw column files)
+NUMERIC_COLUMNS: Dict[str, str] = {
+    "ts_ms": "q",
+    "duration_ms": "d",
+    "cost_usd": "d",
+    "bits": "B",
+}
+# dictionary-encoded: code 0 = missing, code i = values[i - 1]
+DICT_COLUMNS = ("action", "step_id", "app_id", "run_id")
+CODE_TYPE = "I"
+
+
+def _num(x: Any) -> float:
+    return float(x) if isinstance(x, (int, float)) else float("nan")
+
+
+class ColumnStore(LedgerConsumer):
+    """
+    Columnar copy of the ledger's dict records for vectorized LOE queries.
+
+    One row per record, in ledger order (the fabric's own run records are left out, as
+    in every LOE engine): typed arrays for ts (epoch ms), duration_ms,
+    cost_usd and a bit column (canonical, manual_override, reward, first_reward,
+    completed), plus dictionary-encoded action / step_id / app_id / run_id.
+
+    Columns are NumPy arrays with doubling capacity, filled up to `rows`. Rows below
+    `rows` are never written again (growing or reset() allocates new arrays), so queries
+    use views of them outside the lock instead of copies.
+
+    Persisted under db/ledger/columns/ as one raw (native byte order) file per column
+    (appended on each checkpoint) and meta.json (position, row count, dictionaries).
+    Worker processes share the files; each rewrites from its own persisted row count,
+    so meta.json always describes the column files written with it.
+    """
+
+    version = 2
+
+    def __init__(self) -> None:
+        self.generation = 0
+        self.reset()
+        super().__init__(META_PATH)
+
+    def reset(self) -> None:
+        self.cols: Dict[str, Any] = {name: np.empty(0, dtype=tc) for name, tc in NUMERIC_COLUMNS.items()}
+        for name in DICT_COLUMNS:
+            self.cols[name] = np.empty(0, dtype=CODE_TYPE)
+        self.values: Dict[str, List[str]] = {name: [] for name in DICT_COLUMNS}
+        self.codes: Dict[str, Dict[str, int]] = {name: {} for name in DICT_COLUMNS}
+        self.rows = 0
+        self._persisted_rows = 0
+        self._rewrite = True
+        self.generation += 1
+
+    def _code(self, name: str, v: Any) -> int:
+        if not isinstance(v, str):
+            return 0
+        codes = self.codes[name]
+        c = codes.get(v)
+        if c is None:
+            self.values[name].append(v)
+            c = codes[v] = len(self.values[name])
+        return c
+
+    def code_of(self, name: str, v: str) -> Optional[int]:
+        return self.codes[name].get(v)
+
+    def _grow(self) -> None:
+        cap = max(1024, 2 * self.rows)
+        for name, col in self.cols.items():
+            grown = np.empty(cap, dtype=col.dtype)
+            grown[: self.rows] = col[: self.rows]
+            self.cols[name] = grown
+
+    def views(self) -> Dict[str, Any]:
+        """Read-only views of the filled rows; call with self.lock held, use after releasing it."""
+        return {name: col[: self.rows] for name, col in self.cols.items()}
+
+    def apply(self, e: Dict[str, Any]) -> None:
+        if is_fabric_event(e):
+            return
+        ctx = e.get("context") if isinstance(e.get("context"), dict) else {}
+        metrics = e.get("metrics") if isinstance(e.get("metrics"), dict) else {}
+        flags = e.get("flags") if isinstance(e.get("flags"), dict) else {}
+
+        bits = 0
+        if e.get("schema_version") == 1:
+            bits |= CANONICAL
+        if flags.get("manual_override") is True:
+            bits |= MANUAL_OVERRIDE
+        if flags.get("reward"):
+            bits |= REWARD
+        if flags.get("first_reward"):
+            bits |= FIRST_REWARD
+        outcome = e.get("outcome")
+        if isinstance(outcome, str) and outcome.lower() in COMPLETED_OUTCOMES:
+            bits |= COMPLETED
+
+        ts = event_ts_ms(e)
+        r = self.rows
+        if r == len(self.cols["bits"]):
+            self._grow()
+        c = self.cols
+        c["ts_ms"][r] = NO_TS if ts is None else ts
+        c["duration_ms"][r] = _num(metrics.get("duration_ms"))
+        c["cost_usd"][r] = _num(metrics.get("cost_usd"))
+        c["bits"][r] = bits
+        c["action"][r] = self._code("action", e.get("action"))
+        c["step_id"][r] = self._code("step_id", ctx.get("step_id"))
+        c["app_id"][r] = self._code("app_id", ctx.get("app_id"))
+        c["run_id"][r] = self._code("run_id", ctx.get("run_id"))
+        self.rows = r + 1
+
+    # --- persistence (raw column files instead of one JSON document) ---
+
+    def _col_path(self, name: str):
+        return COLUMNS_DIR / f"{name}.bin"
+
+    def load(self) -> None:
+        with self.lock, _files_lock:
+            self.reset()
+            self.position = (0, 0)
+            self._generation = ledger_generation()
+            try:
+                meta = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else None
+                if (
+                    isinstance(meta, dict)
+                    and meta.get("version") == self.version
+                    and meta.get("generation", 0) == self._generation
+                ):
+                    self._load_columns(meta)
+            except Exception:
+                self.reset()
+                self.position = (0, 0)
+            self._loaded = True
+
+    def _load_columns(self, meta: Dict[str, Any]) -> None:
+        rows = int(meta.get("rows") or 0)
+        cols: Dict[str, Any] = {}
+        for name, col in self.cols.items():
+            data = np.fromfile(self._col_path(name), dtype=col.dtype, count=rows)
+            if len(data) < rows:
+                raise EOFError(name)  # a checkpoint was torn
+            cols[name] = data
+        self.cols = cols
+        self.values = {name: list(meta.get("values", {}).get(name) or []) for name in DICT_COLUMNS}
+        self.codes = {name: {v: i + 1 for i, v in enumerate(self.values[name])} for name in DICT_COLUMNS}
+        self.rows = rows
+        self._persisted_rows = rows
+        self._rewrite = False
+        pos = meta.get("position") or [0, 0]
+        self.position = (int(pos[0]), int(pos[1]))
+
+    def save(self, force: bool = False) -> None:
+        with self.lock:
+            if not self._dirty or self._generation != ledger_generation():
+                return  # stale copy: another process rewrote the ledger, catch_up() reloads
+            now = time.time()
+            if not force and now - self._saved_at < self.checkpoint_interval_s:
+                return
+            with _files_lock:
+                COLUMNS_DIR.mkdir(parents=True, exist_ok=True)
+                rewrite = self._rewrite or not all(self._col_path(name).exists() for name in self.cols)
+                for name, col in self.cols.items():
+                    path = self._col_path(name)
+                    # a worker that was behind may have cut the file short of our rows
+                    start = 0 if rewrite else min(self._persisted_rows, path.stat().st_size // col.itemsize)
+                    with path.open("wb" if rewrite else "r+b") as f:
+                        # drop any tail left by an interrupted checkpoint (or written by a
+                        # worker that was further along), then append
+                        f.seek(start * col.itemsize)
+                        f.truncate()
+                        col[start : self.rows].tofile(f)
+                meta = {
+                    "version": self.version,
+                    "generation": self._generation,
+                    "position": list(self.position),
+                    "rows": self.rows,
+                    "values": self.values,
+                }
+                atomic_write_text(self.path, json.dumps(meta))
+            self._persisted_rows = self.rows
+            self._rewrite = False
+            self._saved_at = now
+            self._dirty = False
+
+    def checkpoint_info(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"position": list(self.position), "path": str(COLUMNS_DIR), "rows": self.rows}
+
+
+_store: Optional[ColumnStore] = ColumnStore() if (np is not None and LOE_COLUMNS) else None
+
+
+def available() -> bool:
+    return _store is not None
+
+
+def _quantiles(vals) -> Dict[str, float]:
+    # through the same sketch (fed in ledger order) as the other engines, so every engine
+    # reports the same quantiles for the same window
+    sk = QuantileSketch()
+    sk.update(vals.tolist())
+    return sk.summary()
+
+
+def loe_derived(
+    app_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    since_ms: Optional[int] = None,
+    until_ms: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    LOE `derived` block for the newest `limit` matching records, from vectorized column
+    reductions. Same window and field rules as the scan engine; duration quantiles come
+    from the same QuantileSketch. Returns None when the column store is unavailable
+    (NumPy not installed).
+    """
+    if _store is None:
+        return None
+    with _store.lock:
+        _store.catch_up()
+        c = _store.views()
+        app_code = _store.code_of("app_id", app_id) if app_id else None
+        run_code = _store.code_of("run_id", run_id) if run_id else None
+        step_values = list(_store.values["step_id"])
+
+    if (app_id and app_code is None) or (run_id and run_code is None):
+        idx = np.empty(0, dtype=np.int64)
+    else:
+        mask = np.ones(len(c["bits"]), dtype=bool)
+        if app_code is not None:
+            mask &= c["app_id"] == app_code
+        if run_code is not None:
+            mask &= c["run_id"] == run_code
+        if since_ms is not None or until_ms is not None:
+            ts = c["ts_ms"]
+            mask &= ts != NO_TS
+            if since_ms is not None:
+                mask &= ts >= since_ms
+            if until_ms is not None:
+                mask &= ts < until_ms
+        idx = np.flatnonzero(mask)
+        if limit is not None:
+            idx = idx[-limit:]
+
+    bits = c["bits"][idx]
+    canon = (bits & CANONICAL) != 0
+    cidx = idx[canon]
+    cbits = bits[canon]
+    total = int(len(cidx))
+
+    dur = c["duration_ms"][cidx]
+    has_dur = ~np.isnan(dur)
+    d = dur[has_dur]
+    cost = c["cost_usd"][cidx]
+    cost = cost[~np.isnan(cost)]
+
+    rewarded = np.flatnonzero(cbits & (REWARD | FIRST_REWARD))
+
+    steps = c["step_id"][cidx]
+    friction_steps = []
+    present = steps != 0
+    if present.any():
+        codes, first, counts = np.unique(steps[present], return_index=True, return_counts=True)
+        # most frequent first; ties keep first-seen order (like the scan engine)
+        order = sorted(range(len(codes)), key=lambda i: (-int(counts[i]), int(first[i])))[:5]
+        for i in order:
+            code = int(codes[i])
+            row: Dict[str, Any] = {"step_id": step_values[code - 1], "event_count": int(counts[i])}
+            sd = dur[(steps == code) & has_dur]
+            if len(sd):
+                row["duration_ms"] = _quantiles(sd)
+            friction_steps.append(row)
+
+    q = _quantiles(d)
+    seen = int(len(idx))
+    return {
+        "events_seen_after_filter": seen,
+        "canonical_events_used": total,
+        "legacy_events_ignored": seen - total,
+        "manual_override_rate": (int(np.count_nonzero(cbits & MANUAL_OVERRIDE)) / total) if total else 0.0,
+        "avg_duration_ms": float(d.mean()) if len(d) else 0.0,
+        "p50_duration_ms": q["p50"],
+        "p90_duration_ms": q["p90"],
+        "p95_duration_ms": q["p95"],
+        "p99_duration_ms": q["p99"],
+        "avg_cost_usd": float(cost.mean()) if len(cost) else 0.0,
+        "total_cost_usd": float(cost.sum()),
+        "first_reward_event_index": int(rewarded[0]) if len(rewarded) else None,
+        "completed_count_in_window": int(np.count_nonzero(cbits & COMPLETED)),
+        "friction_steps": friction_steps,
+    }
+
+
+def checkpoint_info() -> Dict[str, Any]:
+    return _store.checkpoint_info() if _store is not None else {"available": False}
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from fabric.events.schema import event_ts_ms
+from fabric.file_lock import atomic_write_text, file_lock
+from fabric.ledger.segments import LEDGER_DIR, ledger_generation
+from fabric.loe.accumulator import LoeAccumulator
+from fabric.loe.scopes import Scope, parse_scope_key, scope_key, scopes_for
+
+FROZEN_PATH = LEDGER_DIR / "loe_frozen.json"
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+Aggs = Dict[Scope, LoeAccumulator]
+Days = Dict[Scope, Dict[int, LoeAccumulator]]
+
+
+class FrozenDelta:
+    """LOE summaries of a set of raw events about to be expired, in ledger order."""
+
+    def __init__(self) -> None:
+        self.aggs: Aggs = {}
+        self.days: Days = {}
+        self.events = 0
+
+    def is_empty(self) -> bool:
+        return self.events == 0
+
+    def add(self, e: Dict[str, Any]) -> None:
+        self.events += 1
+        ts = event_ts_ms(e)
+        for scope in scopes_for(e):
+            acc = self.aggs.get(scope)
+            if acc is None:
+                acc = self.aggs[scope] = LoeAccumulator()
+            acc.add(e)
+            if ts is not None:
+                per_day = self.days.setdefault(scope, {})
+                start = ts - ts % DAY_MS
+                acc = per_day.get(start)
+                if acc is None:
+                    acc = per_day[start] = LoeAccumulator()
+                acc.add(e)
+
+
+def _merge(aggs: Aggs, days: Days, delta_aggs: Aggs, delta_days: Days) -> None:
+    for scope, acc in delta_aggs.items():
+        if scope in aggs:
+            aggs[scope].merge(acc)
+        else:
+            aggs[scope] = acc.copy()
+    for scope, per_day in delta_days.items():
+        mine = days.setdefault(scope, {})
+        for start, acc in per_day.items():
+            if start in mine:
+                mine[start].merge(acc)
+            else:
+                mine[start] = acc.copy()
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _aggs_to_dict(aggs: Aggs) -> Dict[str, Any]:
+    return {scope_key(k): v.to_dict() for k, v in aggs.items()}
+
+
+def _days_to_dict(days: Days) -> Dict[str, Any]:
+    return {scope_key(k): {str(s): a.to_dict() for s, a in v.items()} for k, v in days.items()}
+
+
+def _aggs_from_dict(d: Dict[str, Any]) -> Aggs:
+    return {parse_scope_key(k): LoeAccumulator.from_dict(v) for k, v in (d or {}).items()}
+
+
+def _days_from_dict(d: Dict[str, Any]) -> Days:
+    return {
+        parse_scope_key(k): {int(s): LoeAccumulator.from_dict(a) for s, a in v.items()}
+        for k, v in (d or {}).items()
+    }
+
+
+class FrozenSummaries:
+    """
+    All-history and per-day LOE accumulators of raw events removed by retention.
+
+    The aggregates and rollups stores start from these when they rebuild, so historic
+    LOE still covers expired events (at day resolution for time windows). A delta is
+    staged together with the ledger generation and file hash its segment swap will
+    produce, and only counts once the ledger shows both; a crash between staging and the
+    swap therefore neither loses nor double-counts events.
+
+    The file is shared by worker processes: the lock is cross-process and the summaries
+    are re-read whenever another process has rewritten the file.
+    """
+
+    def __init__(self) -> None:
+        self.lock = file_lock("loe_frozen")
+        self._loaded = False
+        self._stamp: Optional[Tuple[int, int]] = None
+        self.aggs: Aggs = {}
+        self.days: Days = {}
+        self.events = 0
+        # (generation, segment path, sha256 of the rewritten segment, delta)
+        self.pending: Optional[Tuple[int, str, str, FrozenDelta]] = None
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = FROZEN_PATH.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self) -> None:
+        self._loaded = True
+        self._stamp = self._file_stamp()
+        self.pending = None
+        try:
+            doc = json.loads(FROZEN_PATH.read_text(encoding="utf-8")) if FROZEN_PATH.exists() else {}
+        except Exception:
+            doc = {}
+        self.aggs = _aggs_from_dict(doc.get("aggregates"))
+        self.days = _days_from_dict(doc.get("days"))
+        self.events = int(doc.get("events") or 0)
+        p = doc.get("pending")
+        if isinstance(p, dict):
+            delta = FrozenDelta()
+            delta.aggs = _aggs_from_dict(p.get("aggregates"))
+            delta.days = _days_from_dict(p.get("days"))
+            delta.events = int(p.get("events") or 0)
+            self.pending = (int(p.get("generation") or 0), str(p.get("path") or ""), str(p.get("sha256") or ""), delta)
+
+    def _save(self) -> None:
+        doc: Dict[str, Any] = {
+            "version": 1,
+            "events": self.events,
+            "aggregates": _aggs_to_dict(self.aggs),
+            "days": _days_to_dict(self.days),
+        }
+        if self.pending is not None:
+            gen, path, sha, delta = self.pending
+            doc["pending"] = {
+                "generation": gen,
+                "path": path,
+                "sha256": sha,
+                "events": delta.events,
+                "aggregates": _aggs_to_dict(delta.aggs),
+                "days": _days_to_dict(delta.days),
+            }
+        atomic_write_text(FROZEN_PATH, json.dumps(doc))
+        self._stamp = self._file_stamp()
+
+    def _settle(self) -> None:
+        """Commits a pending delta once its swap is visible; drops it if the swap never happened."""
+        if not self._loaded or self._stamp != self._file_stamp():
+            self._load()
+        if self.pending is None:
+            return
+        gen, path, sha, delta = self.pending
+        if ledger_generation() < gen:
+            return  # swap still in progress (or abandoned; the next stage() replaces it)
+        p = Path(path)
+        if p.exists() and file_sha256(p) == sha:
+            _merge(self.aggs, self.days, delta.aggs, delta.days)
+            self.events += delta.events
+        self.pending = None
+        self._save()
+
+    def stage(self, delta: FrozenDelta, generation: int, path: Path, sha256: str) -> None:
+        """Persists `delta` to take effect once `path` holds the rewrite hashed as `sha256`."""
+        with self.lock:
+            self._settle()
+            self.pending = (generation, str(path), sha256, delta)
+            self._save()
+
+    def commit(self) -> None:
+        with self.lock:
+            self._settle()
+
+    def seed_aggregates(self) -> Aggs:
+        with self.lock:
+            self._settle()
+            return {k: v.copy() for k, v in self.aggs.items()}
+
+    def seed_days(self) -> Days:
+        with self.lock:
+            self._settle()
+            return {k: {s: a.copy() for s, a in v.items()} for k, v in self.days.items()}
+
+    def info(self) -> Dict[str, Any]:
+        with self.lock:
+            self._settle()
+            return {
+                "path": str(FROZEN_PATH),
+                "events": self.events,
+                "scopes": len(self.aggs),
+                "days": sum(len(v) for v in self.days.values()),
+                "pending": self.pending is not None,
+            }
+
+
+frozen = FrozenSummaries()
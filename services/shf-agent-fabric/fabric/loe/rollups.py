@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import time
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fabric.events.schema import event_ts_ms
+from fabric.ledger.consumer import LedgerConsumer
+from fabric.ledger.segments import LEDGER_DIR, read_events
+from fabric.loe.accumulator import LoeAccumulator
+from fabric.loe.frozen import frozen
+from fabric.loe.scopes import Scope, parse_scope_key, scope_key, scopes_for
+from fabric.run_ledger import is_fabric_event
+from fabric.settings import LOE_ROLLUP_HOUR_RETENTION_D, LOE_ROLLUP_MINUTE_MAX_BUCKETS, LOE_ROLLUP_MINUTE_RETENTION_H
+
+CHECKPOINT_PATH = LEDGER_DIR / "loe_rollups.json"
+
+MINUTE_MS = 60 * 1000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+GRANULARITIES = (MINUTE_MS, HOUR_MS, DAY_MS)
+GRANULARITY_NAMES = {MINUTE_MS: "minute", HOUR_MS: "hour", DAY_MS: "day"}
+
+# A plan piece is ("raw", lo, hi) - scan events with lo <= ts < hi,
+# ("bucket", g, start) - one whole bucket, or ("tail", g, start) - every g-bucket from start on.
+
+
+def _retention_ms(g: int) -> Optional[int]:
+    if g == MINUTE_MS and LOE_ROLLUP_MINUTE_RETENTION_H > 0:
+        return LOE_ROLLUP_MINUTE_RETENTION_H * HOUR_MS
+    if g == HOUR_MS and LOE_ROLLUP_HOUR_RETENTION_D > 0:
+        return LOE_ROLLUP_HOUR_RETENTION_D * DAY_MS
+    return None
+
+
+def _horizon(g: int, now_ms: int) -> Optional[int]:
+    """Buckets of granularity g that start before this are not kept."""
+    r = _retention_ms(g)
+    horizon = (now_ms - r) if r is not None else None
+    floor = _rollups.floor.get(g)
+    if floor:
+        horizon = floor if horizon is None else max(horizon, floor)
+    return horizon
+
+
+def plan_window(since_ms: int, until_ms: Optional[int], now_ms: Optional[int] = None) -> List[Tuple[Any, ...]]:
+    """
+    Covers [since_ms, until_ms) with the coarsest whole buckets available.
+    Only sub-minute edges (and buckets older than their retention) are left as raw scans.
+    until_ms=None means "open ended": trailing whole days are taken as one tail piece.
+    """
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    pieces: List[Tuple[Any, ...]] = []
+
+    def raw(lo: int, hi: Optional[int]) -> None:
+        if hi is not None and hi <= lo:
+            return
+        if pieces and pieces[-1][0] == "raw" and pieces[-1][2] == lo:
+            pieces[-1] = ("raw", pieces[-1][1], hi)
+        else:
+            pieces.append(("raw", lo, hi))
+
+    cur = since_ms
+    aligned = -(-cur // MINUTE_MS) * MINUTE_MS
+    if aligned > cur:
+        raw(cur, aligned if until_ms is None else min(aligned, until_ms))
+        cur = aligned
+
+    while until_ms is None or cur < until_ms:
+        g = None
+        for cand in (DAY_MS, HOUR_MS, MINUTE_MS):
+            if cur % cand == 0 and (until_ms is None or cur + cand <= until_ms):
+                g = cand
+                break
+        if g is None:
+            raw(cur, until_ms)
+            break
+        horizon = _horizon(g, now_ms)
+        if g == DAY_MS and until_ms is None:
+            pieces.append(("tail", g, cur))
+            break
+        if horizon is not None and cur < horizon:
+            raw(cur, cur + g)
+        else:
+            pieces.append(("bucket", g, cur))
+        cur += g
+    return pieces
+
+
+class LoeRollups(LedgerConsumer):
+    """
+    Minute / hour / day LOE buckets per (app_id, run_id) filter combination, keyed by
+    event time. Each bucket is a LoeAccumulator (counts, sums, manual and completion
+    counts, duration sketch). Minute and hour buckets expire after their retention;
+    day buckets are kept, and a rebuild starts from the frozen day summaries of events
+    removed by ledger retention.
+
+    Minute buckets are also capped at LOE_ROLLUP_MINUTE_MAX_BUCKETS (scope x minute): past
+    it the oldest minutes are dropped for every scope and `floor` moves up, so windows
+    that old are served from hour buckets or raw scans instead.
+
+    Checkpoints keep the JSON of every bucket and only re-encode the ones touched since
+    the previous save (closed buckets are encoded once).
+    """
+
+    version = 2
+    summarizes_expired = True
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, Dict[Scope, Dict[int, LoeAccumulator]]] = {g: {} for g in GRANULARITIES}
+        # granularity -> buckets starting before this were dropped by the cap
+        self.floor: Dict[int, int] = {}
+        self._minute_buckets = 0
+        self._encoded: Dict[Tuple[int, Scope, int], str] = {}
+        self._touched: Set[Tuple[int, Scope, int]] = set()
+        super().__init__(CHECKPOINT_PATH)
+
+    def reset(self) -> None:
+        self.buckets = {g: {} for g in GRANULARITIES}
+        self.buckets[DAY_MS] = frozen.seed_days()
+        self.floor = {}
+        self._minute_buckets = 0
+        self._encoded = {}
+        self._touched = {(DAY_MS, scope, start) for scope, per in self.buckets[DAY_MS].items() for start in per}
+
+    def apply(self, e: Dict[str, Any]) -> None:
+        ts = event_ts_ms(e)
+        if ts is None:
+            return  # can never match a since/until window
+        now_ms = int(time.time() * 1000)
+        scopes = list(scopes_for(e))
+        for g in GRANULARITIES:
+            start = ts - ts % g
+            horizon = _horizon(g, now_ms)
+            if horizon is not None and start < horizon:
+                continue
+            per_g = self.buckets[g]
+            for scope in scopes:
+                per_scope = per_g.get(scope)
+                if per_scope is None:
+                    per_scope = per_g[scope] = {}
+                acc = per_scope.get(start)
+                if acc is None:
+                    acc = per_scope[start] = LoeAccumulator()
+                    if g == MINUTE_MS:
+                        self._minute_buckets += 1
+                acc.add(e)
+                self._touched.add((g, scope, start))
+        if LOE_ROLLUP_MINUTE_MAX_BUCKETS > 0 and self._minute_buckets > LOE_ROLLUP_MINUTE_MAX_BUCKETS * 11 // 10:
+            self.prune()  # don't wait for the checkpoint on a burst of new scopes
+
+    def prune(self) -> None:
+        now_ms = int(time.time() * 1000)
+        if LOE_ROLLUP_MINUTE_MAX_BUCKETS > 0 and self._minute_buckets > LOE_ROLLUP_MINUTE_MAX_BUCKETS:
+            # drop whole minutes, oldest first, down to 90% of the cap
+            per_minute: Dict[int, int] = {}
+            for per_scope in self.buckets[MINUTE_MS].values():
+                for start in per_scope:
+                    per_minute[start] = per_minute.get(start, 0) + 1
+            n = self._minute_buckets
+            for start in sorted(per_minute):
+                if n <= LOE_ROLLUP_MINUTE_MAX_BUCKETS * 9 // 10:
+                    break
+                n -= per_minute[start]
+                self.floor[MINUTE_MS] = start + MINUTE_MS
+        for g in GRANULARITIES:
+            horizon = _horizon(g, now_ms)
+            if horizon is None:
+                continue
+            for scope, per_scope in list(self.buckets[g].items()):
+                for start in [s for s in per_scope if s < horizon]:
+                    del per_scope[start]
+                    self._encoded.pop((g, scope, start), None)
+                    if g == MINUTE_MS:
+                        self._minute_buckets -= 1
+                if not per_scope:
+                    del self.buckets[g][scope]
+
+    def state_to_dict(self) -> Dict[str, Any]:
+        return json.loads(self.state_json())
+
+    def state_json(self) -> str:
+        self.prune()
+        for key in self._touched:
+            g, scope, start = key
+            acc = (self.buckets[g].get(scope) or {}).get(start)
+            if acc is not None:
+                self._encoded[key] = json.dumps(acc.to_dict())
+        self._touched = set()
+        parts = []
+        for g in GRANULARITIES:
+            scopes = []
+            for scope, per_scope in self.buckets[g].items():
+                body = ", ".join(f'"{start}": {self._encoded[(g, scope, start)]}' for start in per_scope)
+                scopes.append(f"{json.dumps(scope_key(scope))}: {{{body}}}")
+            parts.append(f'"{GRANULARITY_NAMES[g]}": {{{", ".join(scopes)}}}')
+        parts.append(f'"floor": {json.dumps({GRANULARITY_NAMES[g]: v for g, v in self.floor.items()})}')
+        return "{" + ", ".join(parts) + "}"
+
+    def state_from_dict(self, d: Dict[str, Any]) -> None:
+        self.buckets = {g: {} for g in GRANULARITIES}
+        for g in GRANULARITIES:
+            for k, per_scope in (d.get(GRANULARITY_NAMES[g]) or {}).items():
+                self.buckets[g][parse_scope_key(k)] = {
+                    int(start): LoeAccumulator.from_dict(v) for start, v in per_scope.items()
+                }
+        names = {name: g for g, name in GRANULARITY_NAMES.items()}
+        self.floor = {names[k]: int(v) for k, v in (d.get("floor") or {}).items() if k in names}
+        self._minute_buckets = sum(len(p) for p in self.buckets[MINUTE_MS].values())
+        self._encoded = {}
+        self._touched = {(g, scope, start) for g in GRANULARITIES for scope, per in self.buckets[g].items() for start in per}
+
+
+_rollups = LoeRollups()
+
+
+def _raw_window(app_id: Optional[str], run_id: Optional[str], lo: int, hi: Optional[int]) -> LoeAccumulator:
+    def match(e: Any) -> bool:
+        if not isinstance(e, dict) or is_fabric_event(e):
+            return False
+        c = e.get("context") if isinstance(e.get("context"), dict) else {}
+        if app_id and c.get("app_id") != app_id:
+            return False
+        if run_id and c.get("run_id") != run_id:
+            return False
+        ts = event_ts_ms(e)
+        return ts is not None and ts >= lo and (hi is None or ts < hi)
+
+    rows, _ = read_events(app_id=app_id, run_id=run_id, since_ms=lo, until_ms=hi, match=match)
+    acc = LoeAccumulator()
+    for e in rows:
+        acc.add(e)
+    return acc
+
+
+def window(
+    app_id: Optional[str],
+    run_id: Optional[str],
+    since_ms: int,
+    until_ms: Optional[int] = None,
+) -> Tuple[LoeAccumulator, Dict[str, Any]]:
+    """
+    LOE accumulator for events with since_ms <= ts < until_ms, combined from whole
+    rollup buckets plus raw scans of the edges. Buckets are merged in time order.
+    """
+    scope = (app_id or None, run_id or None)
+    out = LoeAccumulator()
+    stats = {"buckets": 0, "raw_ranges": 0}
+    with _rollups.lock:
+        _rollups.catch_up()
+        for piece in plan_window(since_ms, until_ms):
+            kind = piece[0]
+            if kind == "raw":
+                stats["raw_ranges"] += 1
+                out.merge(_raw_window(app_id, run_id, piece[1], piece[2]))
+                continue
+            g, start = piece[1], piece[2]
+            per_scope = _rollups.buckets[g].get(scope) or {}
+            if kind == "bucket":
+                acc = per_scope.get(start)
+                if acc is not None:
+                    stats["buckets"] += 1
+                    out.merge(acc)
+            else:
+                for s in sorted(k for k in per_scope if k >= start):
+                    stats["buckets"] += 1
+                    out.merge(per_scope[s])
+    return out, stats
+
+
+def checkpoint_info() -> Dict[str, Any]:
+    return _rollups.checkpoint_info()
+
+
+def series(app_id: Optional[str], run_id: Optional[str], edges: List[int]) -> Optional[List[LoeAccumulator]]:
+    """
+    One accumulator per interval [edges[i], edges[i+1]) built only from whole buckets.
+    Returns None when any interval would need a raw scan (unaligned edge or expired buckets).
+    """
+    now_ms = int(time.time() * 1000)
+    plans = [plan_window(lo, hi, now_ms) for lo, hi in zip(edges, edges[1:])]
+    if any(piece[0] != "bucket" for plan in plans for piece in plan):
+        return None
+    scope = (app_id or None, run_id or None)
+    out: List[LoeAccumulator] = []
+    with _rollups.lock:
+        _rollups.catch_up()
+        for plan in plans:
+            acc = LoeAccumulator()
+            for _, g, start in plan:
+                b = (_rollups.buckets[g].get(scope) or {}).get(start)
+                if b is not None:
+                    acc.merge(b)
+            out.append(acc)
+    return out
+
+
+def needs_scan(since_ms: int, until_ms: Optional[int] = None) -> bool:
+    """True when window(since_ms, until_ms) would read raw ledger ranges besides buckets."""
+    return any(piece[0] == "raw" for piece in plan_window(since_ms, until_ms))
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fabric.run_ledger import is_fabric_event
+
+Scope = Tuple[Optional[str], Optional[str]]  # (app_id, run_id); None = any
+
+
+def scopes_for(e: Dict[str, Any]) -> Iterable[Scope]:
+    """
+    Every filter combination (app_id, run_id, both, neither) this event counts toward;
+    none for the fabric's own run records (see is_fabric_event).
+    """
+    if is_fabric_event(e):
+        return
+    c = e.get("context")
+    c = c if isinstance(c, dict) else {}
+    app = c.get("app_id") if isinstance(c.get("app_id"), str) else None
+    run = c.get("run_id") if isinstance(c.get("run_id"), str) else None
+    yield (None, None)
+    if app:
+        yield (app, None)
+    if run:
+        yield (None, run)
+        if app:
+            yield (app, run)
+
+
+def scope_key(scope: Scope) -> str:
+    return json.dumps(list(scope))
+
+
+def parse_scope_key(k: str) -> Scope:
+    app, run = json.loads(k)
+    return (app, run)
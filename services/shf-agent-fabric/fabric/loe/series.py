@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fabric.events.schema import event_ts_ms, parse_ts_ms
+from fabric.ledger.segments import iter_events
+from fabric.loe import rollups as loe_rollups
+from fabric.loe.accumulator import LoeAccumulator
+from fabric.loe.signals import _match_filters, assess_health
+
+MAX_POINTS = 2000
+
+_STEP_RE = re.compile(r"^\s*(\d+)\s*([smhd]?)\s*$")
+_STEP_UNITS_MS = {"": 1000, "s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+
+def parse_step(step: str) -> int:
+    """'90s', '15m', '1h', '1d' (bare numbers are seconds) -> milliseconds."""
+    m = _STEP_RE.match(step or "")
+    if not m or int(m.group(1)) <= 0:
+        raise ValueError("INVALID_STEP")
+    return int(m.group(1)) * _STEP_UNITS_MS[m.group(2)]
+
+
+def _iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def compute_loe_series(
+    since: str,
+    until: Optional[str] = None,
+    step: str = "1h",
+    app_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    LOE `derived` block, health and flags per interval of `step` over [since, until).
+    until defaults to now. Each interval covers every matching event in it (no `limit`).
+
+    When every interval is a whole number of rollup buckets the series is assembled from
+    the rollups without reading the ledger; otherwise the range is streamed once and each
+    event is binned into its interval as it is read (no rows are kept).
+    """
+    since_ms = parse_ts_ms(since)
+    if since_ms is None:
+        raise ValueError("INVALID_SINCE")
+    until_ms = parse_ts_ms(until) if until else int(time.time() * 1000)
+    if until_ms is None:
+        raise ValueError("INVALID_UNTIL")
+    step_ms = parse_step(step)
+
+    if until_ms <= since_ms:
+        raise ValueError("EMPTY_RANGE")
+    n = -(-(until_ms - since_ms) // step_ms)
+    if n > MAX_POINTS:
+        raise ValueError("TOO_MANY_POINTS")
+    edges = [since_ms + i * step_ms for i in range(n)] + [until_ms]
+
+    accs = loe_rollups.series(app_id, run_id, edges)
+    if accs is not None:
+        source: Dict[str, Any] = {"engine": "rollups", **loe_rollups.checkpoint_info()}
+    else:
+        accs = [LoeAccumulator() for _ in range(n)]
+        scan: Dict[str, Any] = {}
+        rows = iter_events(
+            app_id=app_id,
+            run_id=run_id,
+            since_ms=since_ms,
+            until_ms=until_ms,
+            match=lambda e: isinstance(e, dict) and _match_filters(e, app_id, run_id, since_ms, until_ms),
+            stats=scan,
+        )
+        try:
+            # newest-first: each event is folded in front of its interval's older ones
+            for e in rows:
+                accs[(event_ts_ms(e) - since_ms) // step_ms].add_older(e)
+        finally:
+            rows.close()
+        source = {"engine": "scan", **scan}
+
+    points: List[Dict[str, Any]] = []
+    for i, acc in enumerate(accs):
+        derived = acc.derived()
+        health, flags = assess_health(derived)
+        points.append({
+            "start": _iso(edges[i]),
+            "end": _iso(edges[i + 1]),
+            "health": health,
+            "flags": [f["code"] for f in flags],
+            "derived": derived,
+        })
+
+    return {
+        "ok": True,
+        "filters": {"app_id": app_id, "run_id": run_id, "since": since, "until": until, "step": step},
+        "step_ms": step_ms,
+        "points": points,
+        "source": source,
+    }
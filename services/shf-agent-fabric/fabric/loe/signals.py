@@ -1,60 +1,37 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
-from datetime import datetime, timezone
+
+from fabric.events.schema import event_ts_ms, parse_ts_ms
+from fabric.ledger.scan import field_pattern
+from fabric.ledger.segments import LEDGER_DIR, iter_events, read_events
+from fabric.loe import aggregates as loe_aggregates
+from fabric.loe import columns as loe_columns
+from fabric.loe import rollups as loe_rollups
+from fabric.loe.accumulator import LoeAccumulator
+from fabric.request_context import memoized
+from fabric.run_ledger import is_fabric_event
 
 BASE = Path(__file__).resolve().parent.parent.parent
 DB = BASE / "db"
 RUNS_LOG = DB / "runs.jsonl"
 
 
-def _read_jsonl(path: Path, limit: int = 5000) -> List[Dict[str, Any]]:
-    if not path.exists():
-        return []
-    rows: List[Dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                rows.append(json.loads(line))
-            except Exception:
-                continue
-    return rows[-limit:]
-
-
-def _parse_ts(ts: Any) -> Optional[datetime]:
-    """
-    Parses ISO timestamps like:
-      - 2026-01-10T12:34:56Z
-      - 2026-01-10T12:34:56.123Z
-      - 2026-01-10T12:34:56+00:00
-    Returns aware UTC datetime or None.
-    """
-    if not isinstance(ts, str) or not ts.strip():
-        return None
-    s = ts.strip()
-    try:
-        if s.endswith("Z"):
-            s2 = s[:-1] + "+00:00"
-            return datetime.fromisoformat(s2).astimezone(timezone.utc)
-        dt = datetime.fromisoformat(s)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone(timezone.utc)
-    except Exception:
-        return None
-
-
 def _ctx(e: Dict[str, Any]) -> Dict[str, Any]:
     c = e.get("context")
     return c if isinstance(c, dict) else {}
 
 
-def _match_filters(e: Dict[str, Any], app_id: Optional[str], run_id: Optional[str], since_dt: Optional[datetime]) -> bool:
+def _match_filters(
+    e: Dict[str, Any],
+    app_id: Optional[str],
+    run_id: Optional[str],
+    since_ms: Optional[int],
+    until_ms: Optional[int] = None,
+) -> bool:
+    if is_fabric_event(e):
+        return False
     c = _ctx(e)
 
     if app_id:
@@ -67,109 +44,33 @@ def _match_filters(e: Dict[str, Any], app_id: Optional[str], run_id: Optional[st
         if not isinstance(v, str) or v != run_id:
             return False
 
-    if since_dt:
-        dt = _parse_ts(e.get("ts"))
-        if not dt:
+    if since_ms is not None or until_ms is not None:
+        ts = event_ts_ms(e)
+        if ts is None:
             # if we can't parse ts, exclude it in filtered mode
             return False
-        if dt < since_dt:
+        if since_ms is not None and ts < since_ms:
+            return False
+        if until_ms is not None and ts >= until_ms:
             return False
 
     return True
 
 
-def compute_loe_signals(
-    limit: int = 5000,
-    app_id: Optional[str] = None,
-    run_id: Optional[str] = None,
-    since: Optional[str] = None,
-) -> Dict[str, Any]:
+def assess_health(derived: Dict[str, Any], filtered: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
     """
-    Canonical-only LOE reader with filtering.
-    Uses ONLY normalized schema (schema_version=1):
-      - metrics.duration_ms
-      - metrics.cost_usd
-      - flags.manual_override
-      - flags.reward / flags.first_reward
-      - context.step_id / context.app_id / context.run_id
-      - outcome
-    Filters:
-      - app_id: match context.app_id
-      - run_id: match context.run_id
-      - since: ISO timestamp string (UTC recommended), e.g. 2026-01-10T00:00:00Z
+    Health and flags for a LOE `derived` block.
+    `filtered` marks windows narrowed by app_id/run_id/since/until (enables NO_EVENTS_MATCH_FILTER).
     """
-    events_all = _read_jsonl(RUNS_LOG, limit=limit)
-
-    since_dt = _parse_ts(since) if since else None
-
-    # Apply filters first (so we don't dilute with unrelated streams)
-    filtered_seen = []
-    for e in events_all:
-        if isinstance(e, dict) and _match_filters(e, app_id, run_id, since_dt):
-            filtered_seen.append(e)
-
-    total_seen = len(filtered_seen)
-
-    canonical_events = []
-    legacy_count = 0
-    for e in filtered_seen:
-        if isinstance(e, dict) and e.get("schema_version") == 1:
-            canonical_events.append(e)
-        else:
-            legacy_count += 1
-
-    total = len(canonical_events)
-
-    manual_count = 0
-    durations: List[float] = []
-    costs: List[float] = []
-    step_counts: Dict[str, int] = {}
-    first_reward_index = None
-    completed_count = 0
-
-    for idx, e in enumerate(canonical_events):
-        metrics = e.get("metrics") or {}
-        flags = e.get("flags") or {}
-        context = e.get("context") or {}
-
-        if flags.get("manual_override") is True:
-            manual_count += 1
-
-        d = metrics.get("duration_ms")
-        if isinstance(d, (int, float)):
-            durations.append(float(d))
-
-        c = metrics.get("cost_usd")
-        if isinstance(c, (int, float)):
-            costs.append(float(c))
-
-        step = context.get("step_id")
-        if isinstance(step, str):
-            step_counts[step] = step_counts.get(step, 0) + 1
-
-        if first_reward_index is None and (flags.get("reward") or flags.get("first_reward")):
-            first_reward_index = idx
-
-        outcome = e.get("outcome")
-        if isinstance(outcome, str) and outcome.lower() in ("complete", "completed", "success", "placed"):
-            completed_count += 1
-
-    avg_duration_ms = (sum(durations) / len(durations)) if durations else 0.0
-    p95_duration_ms = 0.0
-    if durations:
-        ds = sorted(durations)
-        p95_duration_ms = ds[int(0.95 * (len(ds) - 1))]
-
-    avg_cost = (sum(costs) / len(costs)) if costs else 0.0
-    total_cost = sum(costs) if costs else 0.0
-
-    manual_rate = (manual_count / total) if total else 0.0
-
-    top_steps: List[Tuple[str, int]] = sorted(step_counts.items(), key=lambda kv: kv[1], reverse=True)[:5]
-    friction_steps = [{"step_id": sid, "event_count": cnt} for sid, cnt in top_steps]
+    total_seen = derived["events_seen_after_filter"]
+    total = derived["canonical_events_used"]
+    legacy_count = derived["legacy_events_ignored"]
+    manual_rate = derived["manual_override_rate"]
+    p95_duration_ms = derived["p95_duration_ms"]
+    completed_count = derived["completed_count_in_window"]
 
     flags_out = []
-    if (app_id or run_id or since_dt) and total_seen == 0:
+    if filtered and total_seen == 0:
         flags_out.append({
             "code": "NO_EVENTS_MATCH_FILTER",
             "level": "INFO",
@@ -207,19 +108,93 @@ def compute_loe_signals(
     if sum(1 for f in flags_out if f["level"] == "YELLOW") >= 2:
         health = "RED"
 
-    derived = {
-        "events_seen_after_filter": total_seen,
-        "canonical_events_used": total,
-        "legacy_events_ignored": legacy_count,
-        "manual_override_rate": manual_rate,
-        "avg_duration_ms": avg_duration_ms,
-        "p95_duration_ms": p95_duration_ms,
-        "avg_cost_usd": avg_cost,
-        "total_cost_usd": total_cost,
-        "first_reward_event_index": first_reward_index,
-        "completed_count_in_window": completed_count,
-        "friction_steps": friction_steps,
-    }
+    return health, flags_out
+
+
+@memoized("loe")
+def compute_loe_signals(
+    limit: int = 5000,
+    app_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    engine: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Canonical-only LOE reader with filtering.
+    Uses ONLY normalized schema (schema_version=1):
+      - metrics.duration_ms
+      - metrics.cost_usd
+      - flags.manual_override
+      - flags.reward / flags.first_reward
+      - context.step_id / context.app_id / context.run_id
+      - outcome
+    Filters:
+      - app_id: match context.app_id
+      - run_id: match context.run_id
+      - since: ISO timestamp string (UTC recommended), e.g. 2026-01-10T00:00:00Z
+      - until: ISO timestamp string, exclusive upper bound
+    The window is the newest `limit` events that match the filters. When the whole match
+    fits the window it is served from incremental state: all-history aggregates without a
+    time filter, time-bucketed rollups (plus raw scans of sub-minute edges) with one.
+    Otherwise the columnar store answers with vectorized reductions (when NumPy is
+    installed), and failing that only ledger segments (and offsets within them) that can
+    match are read. `engine` forces one of "aggregates", "rollups", "columns" or "scan"
+    (aggregates/rollups still fall through when the match exceeds the window).
+    """
+    since_ms = parse_ts_ms(since) if since else None
+    until_ms = parse_ts_ms(until) if until else None
+
+    derived = None
+    source: Dict[str, Any] = {}
+    if engine not in (None, "aggregates", "rollups", "columns", "scan"):
+        raise ValueError("UNKNOWN_ENGINE")
+
+    if since_ms is None and until_ms is None and engine in (None, "aggregates"):
+        # All-history accumulators answer in O(1) whenever the whole match fits the window.
+        agg = loe_aggregates.lookup(app_id=app_id, run_id=run_id)
+        if agg["events_seen_after_filter"] <= limit:
+            derived = agg
+            source = {"engine": "aggregates", **loe_aggregates.checkpoint_info()}
+    elif since_ms is not None and engine in (None, "rollups"):
+        acc, stats = loe_rollups.window(app_id, run_id, since_ms, until_ms)
+        if acc.seen <= limit:
+            derived = acc.derived()
+            source = {"engine": "rollups", **stats, **loe_rollups.checkpoint_info()}
+
+    if derived is None and engine in (None, "columns") and loe_columns.available():
+        derived = loe_columns.loe_derived(app_id, run_id, since_ms, until_ms, limit)
+        source = {"engine": "columns", **loe_columns.checkpoint_info()}
+
+    if derived is None:
+        # Apply filters first (so we don't dilute with unrelated streams)
+        filtered_seen, scan = read_events(
+            app_id=app_id,
+            run_id=run_id,
+            since_ms=since_ms,
+            until_ms=until_ms,
+            limit=limit,
+            match=lambda e: isinstance(e, dict) and _match_filters(e, app_id, run_id, since_ms, until_ms),
+        )
+        acc = LoeAccumulator()
+        for e in filtered_seen:
+            acc.add(e)
+        derived = acc.derived()
+        source = {"engine": "scan", **scan}
+
+    return _signals_result(derived, source, limit, app_id, run_id, since, until)
+
+
+def _signals_result(
+    derived: Dict[str, Any],
+    source: Dict[str, Any],
+    limit: int,
+    app_id: Optional[str],
+    run_id: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+) -> Dict[str, Any]:
+    health, flags_out = assess_health(derived, filtered=bool(app_id or run_id or since or until))
 
     return {
         "ok": True,
@@ -230,6 +205,82 @@ def compute_loe_signals(
             "app_id": app_id,
             "run_id": run_id,
             "since": since,
+            "until": until,
         },
-        "source": {"runs_log": str(RUNS_LOG), "limit": limit},
+        "source": {"runs_log": str(RUNS_LOG), "ledger": str(LEDGER_DIR), "limit": limit, **source},
+    }
+
+
+def compute_loe_signals_by_run(
+    runs: Dict[str, Optional[str]],
+    limit: int = 5000,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    compute_loe_signals for many runs at once. `runs` maps run_id -> app_id filter (or None).
+
+    Runs answered by the aggregates/rollups cost no ledger reads; every other run is
+    served from ONE newest-first pass over the ledger, folding each run's newest `limit`
+    matching events into its own accumulator as they stream by (no rows are kept). The
+    pass ends once every run's window is full.
+    """
+    since_ms = parse_ts_ms(since) if since else None
+    until_ms = parse_ts_ms(until) if until else None
+
+    derived_by_run: Dict[str, Dict[str, Any]] = {}
+    source_by_run: Dict[str, Dict[str, Any]] = {}
+    for rid, app in runs.items():
+        if since_ms is None and until_ms is None:
+            agg = loe_aggregates.lookup(app_id=app, run_id=rid)
+            if agg["events_seen_after_filter"] <= limit:
+                derived_by_run[rid] = agg
+                source_by_run[rid] = {"engine": "aggregates"}
+        elif since_ms is not None and not loe_rollups.needs_scan(since_ms, until_ms):
+            acc, stats = loe_rollups.window(app, rid, since_ms, until_ms)
+            if acc.seen <= limit:
+                derived_by_run[rid] = acc.derived()
+                source_by_run[rid] = {"engine": "rollups", **stats}
+
+    pending = {rid: app for rid, app in runs.items() if rid not in derived_by_run}
+    if pending:
+
+        def match(e: Any) -> bool:
+            if not isinstance(e, dict):
+                return False
+            rid = _ctx(e).get("run_id")
+            if not isinstance(rid, str) or rid not in pending:
+                return False
+            return _match_filters(e, pending[rid], rid, since_ms, until_ms)
+
+        accs = {rid: LoeAccumulator() for rid in pending}
+        open_runs = set(pending)
+        scan: Dict[str, Any] = {}
+        rows = iter_events(
+            since_ms=since_ms,
+            until_ms=until_ms,
+            match=match,
+            prefilter=field_pattern("run_id", pending),
+            stats=scan,
+        )
+        try:
+            for e in rows:
+                rid = _ctx(e)["run_id"]
+                if rid not in open_runs:
+                    continue
+                acc = accs[rid]
+                acc.add_older(e)
+                if acc.seen >= limit:
+                    open_runs.discard(rid)
+                    if not open_runs:
+                        break
+        finally:
+            rows.close()
+        for rid, acc in accs.items():
+            derived_by_run[rid] = acc.derived()
+            source_by_run[rid] = {"engine": "scan", **scan}
+
+    return {
+        rid: _signals_result(derived_by_run[rid], source_by_run[rid], limit, app, rid, since, until)
+        for rid, app in runs.items()
     }
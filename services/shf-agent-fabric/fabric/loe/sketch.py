@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_K = 256
+_C = 2.0 / 3.0
+
+QUANTILES = (("p50", 0.50), ("p90", 0.90), ("p95", 0.95), ("p99", 0.99))
+
+
+class QuantileSketch:
+    """
+    Mergeable KLL-style quantile sketch with bounded memory (O(k) retained values).
+
+    Level h holds values of weight 2**h. When a level overflows its capacity it is
+    sorted and every other value is promoted one level up (weight doubles), so total
+    weight always equals n. Compaction alternates between odd/even picks instead of
+    flipping a coin, which keeps results reproducible (report hashes depend on them).
+
+    Until the first compaction (< k values) every value is kept and quantiles are exact,
+    using the same nearest-rank convention as before: sorted[int(q * (n - 1))].
+    """
+
+    __slots__ = ("k", "n", "levels", "_flip")
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = max(8, int(k))
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+        self._flip = 0
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, int(math.ceil(self.k * (_C ** depth))))
+
+    def add(self, x: float) -> None:
+        self.levels[0].append(float(x))
+        self.n += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def update(self, xs: Iterable[float]) -> None:
+        for x in xs:
+            self.add(x)
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            lvl = self.levels[h]
+            if len(lvl) >= self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                lvl.sort()
+                keep = [lvl.pop()] if len(lvl) % 2 else []
+                self.levels[h + 1].extend(lvl[self._flip::2])
+                self._flip ^= 1
+                self.levels[h] = keep
+            h += 1
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, lvl in enumerate(other.levels):
+            self.levels[h].extend(lvl)
+        self.n += other.n
+        if any(len(lvl) >= self._capacity(h) for h, lvl in enumerate(self.levels)):
+            self._compress()
+        return self
+
+    def copy(self) -> "QuantileSketch":
+        s = QuantileSketch(self.k)
+        s.n = self.n
+        s.levels = [list(lvl) for lvl in self.levels]
+        s._flip = self._flip
+        return s
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        qs = list(qs)
+        if self.n == 0:
+            return [0.0 for _ in qs]
+        items = sorted((x, 1 << h) for h, lvl in enumerate(self.levels) for x in lvl)
+        total = sum(w for _, w in items)
+        out = []
+        for q in qs:
+            rank = int(q * (total - 1))
+            cum = 0
+            val = items[-1][0]
+            for x, w in items:
+                cum += w
+                if cum > rank:
+                    val = x
+                    break
+            out.append(val)
+        return out
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def summary(self) -> Dict[str, float]:
+        vals = self.quantiles(q for _, q in QUANTILES)
+        return {name: v for (name, _), v in zip(QUANTILES, vals)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "n": self.n, "levels": self.levels, "flip": self._flip}
+
+    @classmethod
+    def from_dict(cls, d: Optional[Dict[str, Any]]) -> "QuantileSketch":
+        d = d or {}
+        s = cls(int(d.get("k") or DEFAULT_K))
+        s.n = int(d.get("n") or 0)
+        s.levels = [[float(x) for x in lvl] for lvl in (d.get("levels") or [[]])] or [[]]
+        s._flip = int(d.get("flip") or 0) & 1
+        return s
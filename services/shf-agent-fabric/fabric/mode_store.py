@@ -1,6 +1,8 @@
 import json
 from pathlib import Path
 
+from fabric.file_lock import atomic_write_text
+
 MODE_FILE = Path(__file__).resolve().parent.parent / "db" / "fabric_mode.json"
 
 def read_mode(default: str = "ON") -> str:
@@ -19,5 +21,5 @@ def write_mode(mode: str) -> str:
     if mode not in ("ON", "OFF"):
         mode = "ON"
     MODE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    MODE_FILE.write_text(json.dumps({"mode": mode}, indent=2) + "\n")
+    atomic_write_text(MODE_FILE, json.dumps({"mode": mode}, indent=2) + "\n")
     return mode
@@ -1,11 +1,12 @@
 import json
 import secrets
 from pathlib import Path
-from threading import Lock
+
+from fabric.file_lock import atomic_write_text, file_lock
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 PLANS_DIR = BASE_DIR / "db" / "plans"
-_lock = Lock()
+_lock = file_lock("plans")
 
 def _ensure_dirs():
     PLANS_DIR.mkdir(parents=True, exist_ok=True)
@@ -18,7 +19,7 @@ def save_plan(plan: dict) -> str:
     plan_id = plan.get("planId") or secrets.token_hex(8)
     plan["planId"] = plan_id
     with _lock:
-        _path(plan_id).write_text(json.dumps(plan, indent=2, sort_keys=True) + "\n")
+        atomic_write_text(_path(plan_id), json.dumps(plan, indent=2, sort_keys=True) + "\n")
     return plan_id
 
 def load_plan(plan_id: str) -> dict | None:
@@ -33,7 +34,7 @@ def mark_plan_status(plan_id: str, status: str) -> bool:
         if not plan:
             return False
         plan["status"] = status
-        _path(plan_id).write_text(json.dumps(plan, indent=2, sort_keys=True) + "\n")
+        atomic_write_text(_path(plan_id), json.dumps(plan, indent=2, sort_keys=True) + "\n")
         return True
 
 def list_recent_plans(limit: int = 10) -> list[dict]:
@@ -41,6 +41,30 @@ def build_forecast(
             run_meta = {"run_id": run_id, "error": r.get("error", "RUN_NOT_FOUND")}
 
     loe = compute_loe_signals(limit=limit, app_id=app_id, run_id=run_id, since=since)
+    return forecast_from_loe(
+        loe,
+        app_id=app_id,
+        run_id=run_id,
+        since=since,
+        run_meta=run_meta,
+        run_targets=run_targets,
+        loo_score=loo_score,
+    )
+
+
+def forecast_from_loe(
+    loe: Dict[str, Any],
+    app_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    since: Optional[str] = None,
+    run_meta: Optional[Dict[str, Any]] = None,
+    run_targets: Optional[Dict[str, Any]] = None,
+    loo_score: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Forecast rules and target checks over already-computed LOE signals.
+    build_forecast() resolves the run and LOE first; batch callers pass their own.
+    """
     derived = loe.get("derived", {}) if isinstance(loe, dict) else {}
 
     manual_rate = float(derived.get("manual_override_rate") or 0.0)
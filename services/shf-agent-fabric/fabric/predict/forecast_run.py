@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from fabric.loe.signals import compute_loe_signals
-from fabric.runs_registry.store import get_run
-from fabric.predict.forecast import build_forecast
+from fabric.loe.signals import compute_loe_signals, compute_loe_signals_by_run
+from fabric.runs_registry.store import get_run, get_runs, list_run_ids
+from fabric.predict.forecast import forecast_from_loe
 from fabric.runs_registry.loo_payload_store import load_latest_loo_payload
 
 try:
@@ -15,25 +15,8 @@ except Exception:
     loo_inject_targets = None
 
 
-def forecast_run(
-    run_id: str,
-    loo_payload: Optional[Dict[str, Any]] = None,
-    limit: int = 5000,
-    since: Optional[str] = None,
-) -> Dict[str, Any]:
-    r = get_run(run_id)
-    if not r.get("ok"):
-        return {"ok": False, "error": r.get("error", "RUN_NOT_FOUND"), "run_id": run_id}
-
-    run = r.get("run") or {}
-    targets = run.get("targets") if isinstance(run.get("targets"), dict) else {}
-    app_id = run.get("app_id")
-
-    # 1) LOE
-    loe = compute_loe_signals(limit=limit, app_id=app_id, run_id=run_id, since=since)
-
-    # 2) LOO (from provided payload or stored payload)
-    loo_score = None
+def _score_loo(run_id: str, targets: Dict[str, Any], loo_payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """LOO score from the provided payload, else the stored latest payload for the run."""
     targets_used = {}
     loo_payload_used = None
 
@@ -49,18 +32,34 @@ def forecast_run(
         injected = loo_inject_targets(loo_payload, targets)
         targets_used = injected.get("northStar") if isinstance(injected.get("northStar"), dict) else {}
         scored = loo_score_payload(injected)
-        loo_score = {**(scored or {}), "run_id": run_id, "targets_used": targets_used, "payload_source": loo_payload_used or {"source": "request"}}
-    elif isinstance(loo_payload, dict) and not (loo_score_payload and loo_inject_targets):
-        loo_score = {"ok": False, "error": "LOO_SCORER_NOT_AVAILABLE", "run_id": run_id}
-    else:
-        loo_score = {"ok": False, "error": "LOO_PAYLOAD_NOT_PROVIDED", "run_id": run_id}
-
-    # 3) Prediction
-    pred = build_forecast(
-        limit=limit,
+        return {**(scored or {}), "run_id": run_id, "targets_used": targets_used, "payload_source": loo_payload_used or {"source": "request"}}
+    if isinstance(loo_payload, dict) and not (loo_score_payload and loo_inject_targets):
+        return {"ok": False, "error": "LOO_SCORER_NOT_AVAILABLE", "run_id": run_id}
+    return {"ok": False, "error": "LOO_PAYLOAD_NOT_PROVIDED", "run_id": run_id}
+
+
+def _run_forecast(
+    run: Dict[str, Any],
+    loe: Dict[str, Any],
+    loo_payload: Optional[Dict[str, Any]],
+    limit: int,
+    since: Optional[str],
+) -> Dict[str, Any]:
+    run_id = run.get("run_id")
+    targets = run.get("targets") if isinstance(run.get("targets"), dict) else {}
+    app_id = run.get("app_id")
+
+    # 2) LOO (from provided payload or stored payload)
+    loo_score = _score_loo(run_id, targets, loo_payload)
+
+    # 3) Prediction (same LOE window, no second read)
+    pred = forecast_from_loe(
+        loe,
         app_id=app_id,
         run_id=run_id,
         since=since,
+        run_meta=run,
+        run_targets=targets,
         loo_score=loo_score if isinstance(loo_score, dict) and loo_score.get("ok") else None,
     )
 
@@ -90,3 +89,70 @@ def forecast_run(
         "guardrails": {"advisory_only": True, "no_commands": True, "no_enforcement": True},
         "note": "Forecast is computed from event telemetry (LOE) and outcome payload (LOO), using targets from Run Registry."
     }
+
+
+def forecast_run(
+    run_id: str,
+    loo_payload: Optional[Dict[str, Any]] = None,
+    limit: int = 5000,
+    since: Optional[str] = None,
+) -> Dict[str, Any]:
+    r = get_run(run_id)
+    if not r.get("ok"):
+        return {"ok": False, "error": r.get("error", "RUN_NOT_FOUND"), "run_id": run_id}
+
+    run = r.get("run") or {}
+
+    # 1) LOE
+    loe = compute_loe_signals(limit=limit, app_id=run.get("app_id"), run_id=run_id, since=since)
+
+    return _run_forecast(run, loe, loo_payload, limit, since)
+
+
+MAX_BATCH_RUNS = 1000
+
+
+def forecast_batch(
+    run_ids: Optional[List[str]] = None,
+    app_id: Optional[str] = None,
+    limit: int = 5000,
+    since: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    forecast_run for many runs: one bulk registry lookup and one grouped LOE pass
+    (compute_loe_signals_by_run) instead of a lookup and ledger read per run.
+    LOO uses each run's stored payload. Pass run_ids, or app_id for all of its runs.
+    """
+    if run_ids is None:
+        if not app_id:
+            return {"ok": False, "error": "RUN_IDS_OR_APP_ID_REQUIRED"}
+        run_ids = list_run_ids(app_id)
+    run_ids = list(dict.fromkeys(r for r in run_ids if isinstance(r, str) and r))
+    if len(run_ids) > MAX_BATCH_RUNS:
+        return {"ok": False, "error": "BATCH_TOO_LARGE", "max_runs": MAX_BATCH_RUNS, "count": len(run_ids)}
+
+    runs = get_runs(run_ids)
+    loes = compute_loe_signals_by_run({rid: run.get("app_id") for rid, run in runs.items()}, limit=limit, since=since)
+
+    results = []
+    for rid in run_ids:
+        run = runs.get(rid)
+        if run is None:
+            results.append({"ok": False, "error": "RUN_NOT_FOUND", "run_id": rid})
+            continue
+        results.append(_run_forecast(run, loes[rid], None, limit, since))
+
+    engines: Dict[str, int] = {}
+    for loe in loes.values():
+        eng = (loe.get("source") or {}).get("engine")
+        engines[eng] = engines.get(eng, 0) + 1
+
+    return {
+        "ok": True,
+        "count": len(results),
+        "found": len(runs),
+        "filters": {"run_ids": run_ids, "app_id": app_id, "since": since, "limit": limit},
+        "results": results,
+        "source": {"ledger_scans": 1 if engines.get("scan") else 0, "engines": engines},
+        "guardrails": {"advisory_only": True, "no_commands": True, "no_enforcement": True},
+    }
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+MEMO_HEADER = "x-fabric-memo"
+
+
+class RequestContext:
+    """
+    Per-request memo shared by the predict, LOE, registry and LOO-payload layers.
+
+    Each memoized (function, arguments) pair is computed once per request; repeats are
+    served from the memo. Memoized results are shared between callers and must be
+    treated as read-only.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._memo: Dict[Tuple[str, Tuple[Any, ...]], Any] = {}
+        self._tags: Dict[Tuple[str, Tuple[Any, ...]], str] = {}
+        self.hits: Dict[str, int] = {}
+        self.computed: Dict[str, int] = {}
+
+    def invalidate(self, tag: str) -> None:
+        with self._lock:
+            for key in [k for k, t in self._tags.items() if t == tag]:
+                self._memo.pop(key, None)
+                self._tags.pop(key, None)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": dict(self.hits),
+                "computed": dict(self.computed),
+                "saved_calls": sum(self.hits.values()),
+            }
+
+    def header_value(self) -> str:
+        r = self.report()
+        return f"hits={r['saved_calls']}; computed={sum(r['computed'].values())}"
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("fabric_request_context", default=None)
+
+
+def current() -> Optional[RequestContext]:
+    return _current.get()
+
+
+@contextmanager
+def request_context() -> Iterator[RequestContext]:
+    """Enters a request context; re-entrant (nested uses share the outer memo)."""
+    ctx = _current.get()
+    if ctx is not None:
+        yield ctx
+        return
+    ctx = RequestContext()
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def invalidate(tag: str) -> None:
+    """Drops memoized results for `tag` after a write in the same request."""
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.invalidate(tag)
+
+
+def memoized(tag: str) -> Callable[[F], F]:
+    """
+    Memoizes a function inside the active request context (no-op outside one).
+    Arguments are bound to the signature, so positional and keyword calls share entries;
+    calls with unhashable arguments are not memoized.
+    """
+
+    def deco(fn: F) -> F:
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            ctx = _current.get()
+            if ctx is None:
+                return fn(*args, **kwargs)
+            try:
+                bound = sig.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (name, tuple(bound.arguments.items()))
+                hash(key)
+            except TypeError:
+                return fn(*args, **kwargs)
+
+            with ctx._lock:
+                if key in ctx._memo:
+                    ctx.hits[name] = ctx.hits.get(name, 0) + 1
+                    return ctx._memo[key]
+            value = fn(*args, **kwargs)
+            with ctx._lock:
+                ctx._memo[key] = value
+                ctx._tags[key] = tag
+                ctx.computed[name] = ctx.computed.get(name, 0) + 1
+            return value
+
+        return wrapper  # type: ignore[return-value]
+
+    return deco
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware: one RequestContext per HTTP request, with the memo summary
+    reported in the X-Fabric-Memo response header.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_context() as ctx:
+
+            async def send_with_memo(message: Dict[str, Any]) -> None:
+                if message.get("type") == "http.response.start":
+                    headers = list(message.get("headers") or [])
+                    headers.append((MEMO_HEADER.encode("latin-1"), ctx.header_value().encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_memo)
@@ -1,35 +1,112 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from threading import Lock
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 
 from fabric.events.schema import normalize_event
-
-_lock = Lock()
+from fabric.ledger import dedup
+from fabric.ledger.writer import get_writer
+from fabric.request_context import invalidate
+from fabric.settings import LEDGER_DURABLE
 
 BASE = Path(__file__).resolve().parent.parent
 DB = BASE / "db"
 DB.mkdir(exist_ok=True)
 
-# Keep current location to avoid breaking existing tooling
+# Pre-segmentation ledger; still read (as segment 0) but no longer appended to.
 RUNS_LOG = DB / "runs.jsonl"
 
-def write_run_event(event: dict) -> dict:
+# Old /runs/execute log; no longer written, merged into the ledger by compaction.
+EXECUTION_LOG = DB / "runs" / "events.jsonl"
+
+# context.app_id of the fabric's own /run and /runs/execute records, so LOE and
+# queries can tell them apart from producer events sharing the ledger.
+FABRIC_APP_ID = "agent-fabric"
+
+
+def is_fabric_event(e: Any) -> bool:
     """
-    Writes a normalized SHF event record to db/runs.jsonl.
+    True for the fabric's own /run and /runs/execute records: stamped with FABRIC_APP_ID,
+    or an execution-log record merged before the stamp (an execute with a plan_id and
+    no app_id). LOE leaves them out; they are decisions, not producer activity.
+    """
+    if not isinstance(e, dict):
+        return False
+    c = e.get("context")
+    if not isinstance(c, dict):
+        return False
+    app = c.get("app_id")
+    if app:
+        return app == FABRIC_APP_ID
+    return e.get("action") == "execute" and bool(c.get("plan_id"))
+
+
+def write_run_event(event: dict, durable: Optional[bool] = None, normalized: bool = False, wait: bool = True) -> dict:
+    """
+    Writes a normalized SHF event record to the segmented ledger (db/ledger/seg-*.jsonl).
     Preserves backward compatibility: you can still pass legacy shapes.
+    normalized=True means `event` is normalize_event output already and is written as is.
+
+    The write goes through the group-commit writer and, like the old direct append,
+    returns once the event is in the ledger (readable by the next request). durable=True
+    (or LEDGER_DURABLE=1) also waits for the fsync. wait=False is an explicit opt-in to
+    return once queued: the event is not yet readable and cached LOE results are only
+    refreshed by later writes. If that queued write later fails, its event_id is
+    released so a retry is written instead of acknowledged as a duplicate.
     """
-    rec = dict(event or {})
+    if normalized:
+        norm = event
+    else:
+        rec = dict(event or {})
+
+        # Keep old ts behavior if provided, otherwise set it
+        rec.setdefault("ts", datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"))
 
-    # Keep old ts behavior if provided, otherwise set it
-    rec.setdefault("ts", datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"))
+        # Normalize into canonical schema
+        norm = normalize_event(rec)
 
-    # Normalize into canonical schema
-    norm = normalize_event(rec)
+    durable = LEDGER_DURABLE if durable is None else bool(durable)
+    event_id = norm.get("event_id")
+    if dedup.claim([event_id])[0]:
+        # retried post of an event already in the ledger: acknowledge, don't write
+        return {"ok": True, "event_id": event_id, "durable": durable, "duplicate": True}
+    waiting = wait or durable
+    try:
+        get_writer().submit(
+            [norm],
+            durable=durable,
+            wait=waiting,
+            on_error=None if waiting else (lambda _err: dedup.release([event_id])),
+        )
+    except Exception:
+        dedup.release([event_id])
+        raise
+    if waiting:
+        invalidate("loe")
+    return {"ok": True, "event_id": event_id, "durable": durable, "duplicate": False}
 
-    with _lock:
-        with RUNS_LOG.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(norm) + "\n")
-    return {"ok": True, "event_id": norm.get("event_id")}
+
+def write_normalized_events(events: List[Dict[str, Any]], durable: Optional[bool] = None) -> dict:
+    """
+    Appends events that are already in canonical schema (normalize_event output)
+    in a single ledger write. Used by batch ingest to avoid re-normalizing.
+    Events whose event_id was already ingested are skipped; `duplicates` lists their
+    indexes in `events`.
+    """
+    durable = LEDGER_DURABLE if durable is None else bool(durable)
+    flags = dedup.claim([e.get("event_id") for e in events])
+    fresh = [e for e, dup in zip(events, flags) if not dup]
+    if fresh:
+        try:
+            get_writer().submit(fresh, durable=durable, wait=True)
+        except Exception:
+            dedup.release(e.get("event_id") for e in fresh)
+            raise
+    invalidate("loe")
+    return {
+        "ok": True,
+        "count": len(fresh),
+        "durable": durable,
+        "duplicates": [i for i, dup in enumerate(flags) if dup],
+    }
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from threading import Lock
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
-_lock = Lock()
+from fabric.file_lock import atomic_write_text, file_lock
+from fabric.request_context import invalidate, memoized
+
+_lock = file_lock("loo_payload")
 
 BASE = Path(__file__).resolve().parent.parent.parent
 DB = BASE / "db"
@@ -38,10 +40,12 @@ def save_latest_loo_payload(run_id: str, payload: Dict[str, Any]) -> Dict[str, A
         "payload": payload if isinstance(payload, dict) else {},
     }
     with _lock:
-        p.write_text(json.dumps(rec, indent=2) + "\n", encoding="utf-8")
+        atomic_write_text(p, json.dumps(rec, indent=2) + "\n")
+    invalidate("loo_payload")
     return {"ok": True, "run_id": run_id, "path": str(p), "stored_ts": rec["stored_ts"]}
 
 
+@memoized("loo_payload")
 def load_latest_loo_payload(run_id: str) -> Dict[str, Any]:
     """
     Loads the latest LOO payload for a run, if present.
@@ -1,16 +1,132 @@
 from __future__ import annotations
 
+import base64
 import json
 import sqlite3
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime, timezone
 
-BASE = Path(__file__).resolve().parent.parent.parent
-DB_DIR = BASE / "db"
-DB_DIR.mkdir(exist_ok=True)
+from fabric.events.schema import parse_ts_ms
+from fabric.file_lock import atomic_write_text
+from fabric.request_context import invalidate, memoized
+from fabric.settings import RUNS_CACHE_SIZE
+from fabric.sqlite_db import SQLITE_PATH, connect, in_marks, migrate, register_schema
+from fabric.versioned_cache import MISSING, VersionedLRU
 
-SQLITE_PATH = DB_DIR / "fabric.sqlite"
+BASE = Path(__file__).resolve().parents[2]
+PUBLISHED_DIR = BASE / "registry" / "published"
+# Hand-authored run docs (run fields, policy, targets). Imported into runs_registry,
+# which is authoritative; publishing writes the doc back as a mirror (export_run_doc).
+# Docs added or edited while the service runs are imported by the next get_run_doc.
+RUN_DOCS_DIR = BASE / "registry" / "runs"
+
+# top-level keys of a run doc that map to columns; anything else is kept in extra_json
+_RUN_FIELDS = ("app_id", "name", "owner", "mode", "start_ts", "end_ts")
+_DOC_KEYS = {"run_id", "run", "meta", "created_ts", "policy", "targets", "published_at", "published", "site", *_RUN_FIELDS}
+
+
+def _backfill_published(con: sqlite3.Connection) -> None:
+    # runs published before published_at existed: take it from their publish proof
+    if not PUBLISHED_DIR.is_dir():
+        return
+    for proof_fp in PUBLISHED_DIR.glob("*/proof.json"):
+        try:
+            proof = json.loads(proof_fp.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        ts = proof.get("published_at") if isinstance(proof, dict) else None
+        if isinstance(ts, str) and ts:
+            con.execute(
+                "UPDATE runs_registry SET published_at = ? WHERE run_id = ? AND published_at IS NULL",
+                (ts, proof_fp.parent.name),
+            )
+
+
+def _import_run_docs(con: sqlite3.Connection) -> int:
+    """
+    Upserts registry/runs/<run_id>.json docs that are new or changed since they were last
+    imported (file mtime), merged over the registered run. Returns the number imported.
+    """
+    if not RUN_DOCS_DIR.is_dir():
+        return 0
+    seen = {
+        r["run_id"]: r["doc_mtime_ns"]
+        for r in con.execute("SELECT run_id, doc_mtime_ns FROM runs_registry WHERE doc_mtime_ns IS NOT NULL")
+    }
+    n = 0
+    for fp in sorted(RUN_DOCS_DIR.glob("*.json")):
+        run_id = fp.stem
+        try:
+            mtime_ns = fp.stat().st_mtime_ns
+            if seen.get(run_id) == mtime_ns:
+                continue
+            doc = json.loads(fp.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if not isinstance(doc, dict):
+            continue
+        row = con.execute("SELECT * FROM runs_registry WHERE run_id = ?", (run_id,)).fetchone()
+        rec = _doc_row(run_id, doc, _row_to_run(row) if row else None)
+        rec["doc_mtime_ns"] = mtime_ns
+        con.execute(_UPSERT_DOC_SQL, rec)
+        n += 1
+    return n
+
+
+register_schema(
+    "runs_registry",
+    [
+        """
+        CREATE TABLE IF NOT EXISTS runs_registry (
+          run_id      TEXT PRIMARY KEY,
+          app_id      TEXT NOT NULL,
+          name        TEXT,
+          owner       TEXT,
+          mode        TEXT,          -- "pilot" | "system" | "dev" | null
+          created_ts  TEXT NOT NULL,
+          start_ts    TEXT,
+          end_ts      TEXT,
+          targets_json TEXT,         -- JSON string
+          meta_json    TEXT          -- JSON string
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_app_id ON runs_registry(app_id);
+        CREATE INDEX IF NOT EXISTS idx_runs_created_ts ON runs_registry(created_ts);
+        """,
+        # list_runs filters: site comes out of meta_json; each filter index ends in the
+        # (created_ts, run_id) page order so a filtered page is an index range walk.
+        """
+        ALTER TABLE runs_registry ADD COLUMN site TEXT
+          GENERATED ALWAYS AS (CASE WHEN json_valid(meta_json) THEN json_extract(meta_json, '$.site') END) VIRTUAL;
+        ALTER TABLE runs_registry ADD COLUMN published_at TEXT;
+        DROP INDEX IF EXISTS idx_runs_app_id;
+        DROP INDEX IF EXISTS idx_runs_created_ts;
+        CREATE INDEX idx_runs_created ON runs_registry(created_ts, run_id);
+        CREATE INDEX idx_runs_app_created ON runs_registry(app_id, created_ts, run_id);
+        CREATE INDEX idx_runs_owner_created ON runs_registry(owner, created_ts, run_id);
+        CREATE INDEX idx_runs_mode_created ON runs_registry(mode, created_ts, run_id);
+        CREATE INDEX idx_runs_site_created ON runs_registry(site, created_ts, run_id);
+        CREATE INDEX idx_runs_start_ts ON runs_registry(start_ts);
+        CREATE INDEX idx_runs_end_ts ON runs_registry(end_ts);
+        CREATE INDEX idx_runs_published_at ON runs_registry(published_at);
+        """,
+        _backfill_published,
+        # registry/runs/*.json docs move into the registry: policy (visibility indexed),
+        # publish proof and doc-only keys become columns; site goes to meta like API runs
+        """
+        ALTER TABLE runs_registry ADD COLUMN policy_json TEXT;
+        ALTER TABLE runs_registry ADD COLUMN visibility TEXT;
+        ALTER TABLE runs_registry ADD COLUMN published_json TEXT;
+        ALTER TABLE runs_registry ADD COLUMN extra_json TEXT;
+        ALTER TABLE runs_registry ADD COLUMN doc_mtime_ns INTEGER;
+        CREATE INDEX idx_runs_visibility_created ON runs_registry(visibility, created_ts, run_id);
+        """,
+        _import_run_docs,
+    ],
+)
+
+# run_id -> decoded run record, or None for a run_id known not to be registered
+_run_cache = VersionedLRU("runs_registry", RUNS_CACHE_SIZE)
 
 
 def _utc_iso() -> str:
@@ -18,32 +134,17 @@ def _utc_iso() -> str:
 
 
 def _conn() -> sqlite3.Connection:
-    c = sqlite3.connect(str(SQLITE_PATH))
-    c.row_factory = sqlite3.Row
-    return c
+    migrate("runs_registry")
+    return connect(SQLITE_PATH)
 
 
 def init_runs_registry() -> None:
-    with _conn() as con:
-        con.execute(
-            """
-            CREATE TABLE IF NOT EXISTS runs_registry (
-              run_id      TEXT PRIMARY KEY,
-              app_id      TEXT NOT NULL,
-              name        TEXT,
-              owner       TEXT,
-              mode        TEXT,          -- "pilot" | "system" | "dev" | null
-              created_ts  TEXT NOT NULL,
-              start_ts    TEXT,
-              end_ts      TEXT,
-              targets_json TEXT,         -- JSON string
-              meta_json    TEXT          -- JSON string
-            );
-            """
-        )
-        con.execute("CREATE INDEX IF NOT EXISTS idx_runs_app_id ON runs_registry(app_id);")
-        con.execute("CREATE INDEX IF NOT EXISTS idx_runs_created_ts ON runs_registry(created_ts);")
-        con.commit()
+    """
+    Applies pending schema steps and imports new or edited registry/runs docs (at startup;
+    later _conn() calls only check a set, and get_run_doc picks up later edits).
+    """
+    migrate("runs_registry")
+    sync_run_docs()
 
 
 def _json_dumps(obj: Any) -> Optional[str]:
@@ -64,7 +165,27 @@ def _json_loads(s: Any) -> Any:
         return None
 
 
-def register_run(
+_UPSERT_SQL = """
+    INSERT INTO runs_registry
+      (run_id, app_id, name, owner, mode, created_ts, start_ts, end_ts, targets_json, meta_json)
+    VALUES
+      (:run_id, :app_id, :name, :owner, :mode, :created_ts, :start_ts, :end_ts, :targets_json, :meta_json)
+    ON CONFLICT(run_id) DO UPDATE SET
+      app_id=excluded.app_id,
+      name=excluded.name,
+      owner=excluded.owner,
+      mode=excluded.mode,
+      start_ts=excluded.start_ts,
+      end_ts=excluded.end_ts,
+      targets_json=excluded.targets_json,
+      meta_json=excluded.meta_json;
+"""
+
+MAX_REGISTER_BATCH = 1000
+MAX_LOOKUP_RUNS = 1000
+
+
+def _run_row(
     run_id: str,
     app_id: str,
     name: Optional[str] = None,
@@ -75,9 +196,7 @@ def register_run(
     targets: Optional[Dict[str, Any]] = None,
     meta: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
-    init_runs_registry()
-
-    rec = {
+    return {
         "run_id": run_id,
         "app_id": app_id,
         "name": name,
@@ -90,85 +209,463 @@ def register_run(
         "meta_json": _json_dumps(meta),
     }
 
+
+def register_run(
+    run_id: str,
+    app_id: str,
+    name: Optional[str] = None,
+    owner: Optional[str] = None,
+    mode: Optional[str] = None,
+    start_ts: Optional[str] = None,
+    end_ts: Optional[str] = None,
+    targets: Optional[Dict[str, Any]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    rec = _run_row(run_id, app_id, name, owner, mode, start_ts, end_ts, targets, meta)
+
     with _conn() as con:
         # upsert
-        con.execute(
-            """
-            INSERT INTO runs_registry
-              (run_id, app_id, name, owner, mode, created_ts, start_ts, end_ts, targets_json, meta_json)
-            VALUES
-              (:run_id, :app_id, :name, :owner, :mode, :created_ts, :start_ts, :end_ts, :targets_json, :meta_json)
-            ON CONFLICT(run_id) DO UPDATE SET
-              app_id=excluded.app_id,
-              name=excluded.name,
-              owner=excluded.owner,
-              mode=excluded.mode,
-              start_ts=excluded.start_ts,
-              end_ts=excluded.end_ts,
-              targets_json=excluded.targets_json,
-              meta_json=excluded.meta_json;
-            """,
-            rec,
-        )
+        con.execute(_UPSERT_SQL, rec)
         con.commit()
 
+    _run_cache.invalidate()
+    invalidate("runs")
     return {"ok": True, "run_id": run_id}
 
 
-def get_run(run_id: str) -> Dict[str, Any]:
-    init_runs_registry()
+def register_runs(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Batched register_run: upserts every run ({register_run keyword: value}) with one
+    executemany in a single transaction. A run_id given twice keeps its last entry.
+    """
+    if len(runs) > MAX_REGISTER_BATCH:
+        return {"ok": False, "error": "BATCH_TOO_LARGE", "max_runs": MAX_REGISTER_BATCH, "count": len(runs)}
+    rows = [_run_row(**r) for r in runs]
+    if rows:
+        with _conn() as con:
+            con.executemany(_UPSERT_SQL, rows)
+            con.commit()
+        _run_cache.invalidate()
+        invalidate("runs")
+    run_ids = list(dict.fromkeys(r["run_id"] for r in rows))
+    return {"ok": True, "count": len(run_ids), "run_ids": run_ids}
+
+
+def mark_run_published(run_id: str, published_at: str, proof: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Records the publish time and proof of a registered run (the published filter of list_runs)."""
+    with _conn() as con:
+        cur = con.execute(
+            "UPDATE runs_registry SET published_at = ?, published_json = COALESCE(?, published_json) WHERE run_id = ?",
+            (published_at, _json_dumps(proof), run_id),
+        )
+        con.commit()
+    if not cur.rowcount:
+        return {"ok": False, "error": "RUN_NOT_FOUND", "run_id": run_id}
+    _run_cache.invalidate()
+    invalidate("runs")
+    return {"ok": True, "run_id": run_id, "published_at": published_at}
+
+
+_UPSERT_DOC_SQL = """
+    INSERT INTO runs_registry
+      (run_id, app_id, name, owner, mode, created_ts, start_ts, end_ts, targets_json, meta_json,
+       policy_json, visibility, published_at, published_json, extra_json, doc_mtime_ns)
+    VALUES
+      (:run_id, :app_id, :name, :owner, :mode, :created_ts, :start_ts, :end_ts, :targets_json, :meta_json,
+       :policy_json, :visibility, :published_at, :published_json, :extra_json, :doc_mtime_ns)
+    ON CONFLICT(run_id) DO UPDATE SET
+      app_id=excluded.app_id,
+      name=excluded.name,
+      owner=excluded.owner,
+      mode=excluded.mode,
+      start_ts=excluded.start_ts,
+      end_ts=excluded.end_ts,
+      targets_json=excluded.targets_json,
+      meta_json=excluded.meta_json,
+      policy_json=excluded.policy_json,
+      visibility=excluded.visibility,
+      published_at=excluded.published_at,
+      published_json=excluded.published_json,
+      extra_json=excluded.extra_json,
+      doc_mtime_ns=excluded.doc_mtime_ns;
+"""
+
+
+def _doc_row(run_id: str, doc: Dict[str, Any], prev: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Row for a run doc (flat, or with the run fields under "run") merged over the registered run."""
+    prev = prev or {}
+    run_obj = doc.get("run") if isinstance(doc.get("run"), dict) else doc
+    meta = dict(prev.get("meta") or {}) if isinstance(prev.get("meta"), dict) else {}
+    if isinstance(doc.get("meta"), dict):
+        meta.update(doc["meta"])
+    site = run_obj.get("site") or doc.get("site")
+    if site:
+        meta["site"] = site
+    policy = doc.get("policy") if isinstance(doc.get("policy"), dict) else prev.get("policy")
+    targets = doc.get("targets") if isinstance(doc.get("targets"), dict) else prev.get("targets")
+    proof = _load_proof(run_id) or (doc.get("published") if isinstance(doc.get("published"), dict) else None)
+    extra = {k: v for k, v in doc.items() if k not in _DOC_KEYS}
+
+    rec = {f: run_obj.get(f) if run_obj.get(f) is not None else prev.get(f) for f in _RUN_FIELDS}
+    rec["app_id"] = rec["app_id"] or ""
+    rec.update(
+        run_id=run_id,
+        created_ts=prev.get("created_ts") or doc.get("created_ts") or _utc_iso(),
+        targets_json=_json_dumps(targets),
+        meta_json=_json_dumps(meta),
+        policy_json=_json_dumps(policy),
+        visibility=_visibility(policy),
+        published_at=doc.get("published_at") or (proof or {}).get("published_at") or prev.get("published_at"),
+        published_json=_json_dumps(proof or prev.get("published")),
+        extra_json=_json_dumps(extra or prev.get("extra")),
+    )
+    return rec
+
+
+def _visibility(policy: Any) -> Optional[str]:
+    if not isinstance(policy, dict):
+        return None
+    return str(policy.get("visibility") or "PRIVATE").upper()
+
+
+def _load_proof(run_id: str) -> Optional[Dict[str, Any]]:
+    fp = PUBLISHED_DIR / run_id / "proof.json"
+    try:
+        proof = json.loads(fp.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    return proof if isinstance(proof, dict) else None
+
+
+# RUN_DOCS_DIR mtime as of this worker's last sync_run_docs (None: not synced yet)
+_run_docs_dir_mtime: Optional[int] = None
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def sync_run_docs() -> Dict[str, Any]:
+    """Imports registry/runs docs added or edited since the last import."""
+    global _run_docs_dir_mtime
+    _run_docs_dir_mtime = _mtime_ns(RUN_DOCS_DIR)
+    con = _conn()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        n = _import_run_docs(con)
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    if n:
+        _run_cache.invalidate()
+        invalidate("runs")
+    return {"ok": True, "imported": n}
+
+
+def save_run_doc(run_id: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Upserts a run given as a registry/runs doc, merged over the registered run."""
     with _conn() as con:
         row = con.execute("SELECT * FROM runs_registry WHERE run_id = ?", (run_id,)).fetchone()
-        if not row:
-            return {"ok": False, "error": "RUN_NOT_FOUND", "run_id": run_id}
-
-        d = dict(row)
-        d["targets"] = _json_loads(d.pop("targets_json", None))
-        d["meta"] = _json_loads(d.pop("meta_json", None))
-        m = d.get("meta") or {}
-        if isinstance(m, dict):
-            d["site"] = m.get("site") or d.get("site") or "unknown"
+        rec = _doc_row(run_id, doc, _row_to_run(row) if row else None)
+        rec["doc_mtime_ns"] = None
+        con.execute(_UPSERT_DOC_SQL, rec)
+        con.commit()
+    _run_cache.invalidate()
+    invalidate("runs")
+    return {"ok": True, "run_id": run_id}
+
+
+def get_run_doc(run_id: str) -> Optional[Dict[str, Any]]:
+    """
+    A registered run in the registry/runs doc shape ({"run": {...}, "policy", "targets",
+    "published_at", "published", ...}) used by the report and publish routes, or None.
+    Served from the run cache: one indexed lookup, no file reads. Two stats catch docs
+    added to registry/runs (directory mtime) or edited in place (the doc's own mtime
+    against the one last imported); either re-syncs the docs first.
+    """
+    run = _lookup_run(run_id)
+    doc_mtime = _mtime_ns(RUN_DOCS_DIR / f"{run_id}.json")
+    stale = doc_mtime is not None and (run is None or run.get("doc_mtime_ns") != doc_mtime)
+    if stale or _mtime_ns(RUN_DOCS_DIR) != _run_docs_dir_mtime:
+        sync_run_docs()
+        run = _lookup_run(run_id)
+    if run is None:
+        return None
+    meta = run.get("meta") if isinstance(run.get("meta"), dict) else {}
+    doc: Dict[str, Any] = dict(run.get("extra") or {})
+    doc.update(
+        run_id=run_id,
+        meta=meta,
+        created_ts=run.get("created_ts"),
+        run={"run_id": run_id, "site": meta.get("site"), **{f: run.get(f) for f in _RUN_FIELDS}},
+        policy=run.get("policy") or {},
+        targets=run.get("targets") or {},
+    )
+    if run.get("published_at"):
+        proof = run.get("published") or {}
+        doc["published_at"] = run["published_at"]
+        doc["published"] = {k: proof.get(k) for k in ("report_sha256", "pdf_sha256", "urls")}
+    return doc
+
+
+def export_run_doc(run_id: str) -> Optional[Path]:
+    """Writes registry/runs/<run_id>.json from the registry (a mirror; not read back unless edited)."""
+    doc = get_run_doc(run_id)
+    if doc is None:
+        return None
+    RUN_DOCS_DIR.mkdir(parents=True, exist_ok=True)
+    fp = RUN_DOCS_DIR / f"{run_id}.json"
+    atomic_write_text(fp, json.dumps(doc, ensure_ascii=False, indent=2) + "\n")
+    with _conn() as con:
+        con.execute("UPDATE runs_registry SET doc_mtime_ns = ? WHERE run_id = ?", (fp.stat().st_mtime_ns, run_id))
+        con.commit()
+    _run_cache.invalidate()  # cached runs carry doc_mtime_ns (see get_run_doc)
+    return fp
+
+
+# fields of a run as returned by get_run/get_runs/list_runs; policy and publish proof
+# stay behind get_run_doc/get_run_proof
+_RUN_VIEW = ("run_id", "app_id", "name", "owner", "mode", "created_ts", "start_ts", "end_ts", "targets", "meta", "site")
+
+
+def _run_view(run: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: run.get(k) for k in _RUN_VIEW}
+
+
+def _row_to_run(row: sqlite3.Row) -> Dict[str, Any]:
+    d = dict(row)
+    d["targets"] = _json_loads(d.pop("targets_json", None))
+    d["meta"] = _json_loads(d.pop("meta_json", None))
+    d["policy"] = _json_loads(d.pop("policy_json", None))
+    d["published"] = _json_loads(d.pop("published_json", None))
+    d["extra"] = _json_loads(d.pop("extra_json", None))
+    m = d.get("meta") or {}
+    if isinstance(m, dict):
+        d["site"] = m.get("site") or d.get("site") or "unknown"
+    else:
+        d["site"] = d.get("site") or "unknown"
+    return d
+
+
+def _lookup_run(run_id: str) -> Optional[Dict[str, Any]]:
+    run, version = _run_cache.get(run_id)
+    if run is MISSING:
+        row = _conn().execute("SELECT * FROM runs_registry WHERE run_id = ?", (run_id,)).fetchone()
+        run = _row_to_run(row) if row else None
+        _run_cache.put(run_id, run, version)
+    return run
+
+
+def _lookup_runs(ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """_lookup_run for many run_ids; cache misses are fetched with batched IN queries."""
+    out: Dict[str, Optional[Dict[str, Any]]] = {}
+    missing: List[str] = []
+    versions: Dict[str, int] = {}
+    for run_id in ids:
+        run, versions[run_id] = _run_cache.get(run_id)
+        if run is MISSING:
+            missing.append(run_id)
         else:
-            d["site"] = d.get("site") or "unknown"
-        return {"ok": True, "run": d}
+            out[run_id] = run
+    if missing:
+        found: Dict[str, Dict[str, Any]] = {}
+        con = _conn()
+        for marks, args in _in_chunks(missing):
+            rows = con.execute(f"SELECT * FROM runs_registry WHERE run_id IN ({marks})", args).fetchall()
+            for r in rows:
+                found[r["run_id"]] = _row_to_run(r)
+        for run_id in missing:
+            out[run_id] = found.get(run_id)
+            _run_cache.put(run_id, out[run_id], versions[run_id])
+    return out
 
 
-def list_runs(app_id: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
-    init_runs_registry()
-    limit = max(1, min(int(limit or 50), 500))
+def run_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of this worker's run record cache."""
+    return {"ok": True, "cache": _run_cache.stats()}
 
-    q = "SELECT * FROM runs_registry"
+
+@memoized("runs")
+def get_run(run_id: str) -> Dict[str, Any]:
+    """
+    Registry record for run_id, served from the run cache when possible (the record
+    is shared: treat it as read-only).
+    """
+    run = _lookup_run(run_id)
+    if run is None:
+        return {"ok": False, "error": "RUN_NOT_FOUND", "run_id": run_id}
+
+    return {"ok": True, "run": _run_view(run)}
+
+
+def get_run_proof(run_id: str) -> Optional[Dict[str, Any]]:
+    """Full publish proof recorded for run_id (see mark_run_published), or None."""
+    run = _lookup_run(run_id)
+    proof = run.get("published") if run is not None else None
+    return proof if isinstance(proof, dict) else None
+
+
+MAX_LIST_LIMIT = 500
+
+
+def _encode_cursor(created_ts: str, run_id: str) -> str:
+    raw = json.dumps([created_ts, run_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_ts, run_id = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise ValueError("INVALID_CURSOR")
+    if not isinstance(created_ts, str) or not isinstance(run_id, str):
+        raise ValueError("INVALID_CURSOR")
+    return created_ts, run_id
+
+
+def list_runs(
+    app_id: Optional[str] = None,
+    limit: int = 50,
+    owner: Optional[str] = None,
+    mode: Optional[str] = None,
+    site: Optional[str] = None,
+    start_from: Optional[str] = None,
+    end_to: Optional[str] = None,
+    published: Optional[bool] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One page of runs, newest first (created_ts, then run_id), with exact filters on
+    app_id/owner/mode/site (meta.site), start_ts >= start_from, end_ts <= end_to and
+    published state. Filters and the page order are served from indexes and only the
+    returned rows are decoded. Pass next_cursor back as cursor for the next page.
+    """
+    limit = max(1, min(int(limit or 50), MAX_LIST_LIMIT))
+    filters = {
+        "app_id": app_id,
+        "owner": owner,
+        "mode": mode,
+        "site": site,
+        "start_from": start_from,
+        "end_to": end_to,
+        "published": published,
+        "limit": limit,
+    }
+
+    where: List[str] = []
     args: List[Any] = []
-    if app_id:
-        q += " WHERE app_id = ?"
-        args.append(app_id)
-    q += " ORDER BY created_ts DESC LIMIT ?"
-    args.append(limit)
+    for col in ("app_id", "owner", "mode", "site"):
+        v = filters[col]
+        if v:
+            where.append(f"{col} = ?")
+            args.append(v)
+    # ISO timestamps compare in time order as strings; a bare date as end_to covers that day
+    if start_from:
+        if parse_ts_ms(start_from) is None:
+            return {"ok": False, "error": "INVALID_START_FROM", "start_from": start_from}
+        where.append("start_ts >= ?")
+        args.append(start_from)
+    if end_to:
+        if parse_ts_ms(end_to) is None:
+            return {"ok": False, "error": "INVALID_END_TO", "end_to": end_to}
+        where.append("end_ts <= ?")
+        args.append(end_to + "\uffff" if len(end_to) == 10 else end_to)
+    if published is not None:
+        where.append("published_at IS NOT NULL" if published else "published_at IS NULL")
+    if cursor:
+        try:
+            after = _decode_cursor(cursor)
+        except ValueError as e:
+            return {"ok": False, "error": str(e), "cursor": cursor}
+        where.append("(created_ts, run_id) < (?, ?)")
+        args.extend(after)
 
-    with _conn() as con:
-        rows = con.execute(q, tuple(args)).fetchall()
-        out = []
-        for r in rows:
-            d = dict(r)
-            d["targets"] = _json_loads(d.pop("targets_json", None))
-            d["meta"] = _json_loads(d.pop("meta_json", None))
-            m = d.get("meta") or {}
-            if isinstance(m, dict):
-                d["site"] = m.get("site") or d.get("site") or "unknown"
-            else:
-                d["site"] = d.get("site") or "unknown"
-            out.append(d)
-
-    return {"ok": True, "runs": out, "count": len(out), "filters": {"app_id": app_id, "limit": limit}}
+    q = "SELECT * FROM runs_registry"
+    if where:
+        q += " WHERE " + " AND ".join(where)
+    q += " ORDER BY created_ts DESC, run_id DESC LIMIT ?"
+    args.append(limit + 1)
+
+    rows = _conn().execute(q, tuple(args)).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    out = [_run_view(_row_to_run(r)) for r in rows]
+    next_cursor = _encode_cursor(rows[-1]["created_ts"], rows[-1]["run_id"]) if more else None
+
+    return {"ok": True, "runs": out, "count": len(out), "next_cursor": next_cursor, "filters": filters}
 
 
 def run_exists(run_id: str) -> bool:
     if not run_id:
         return False
-    init_runs_registry()
-    with _conn() as con:
-        row = con.execute("SELECT 1 FROM runs_registry WHERE run_id = ? LIMIT 1", (run_id,)).fetchone()
-        return bool(row)
+    return _lookup_run(run_id) is not None
+
+# SQLite's default host-parameter limit is 999; stay under it per IN (...) query
+# (a power of two, so padded chunks reuse one of a few statements; see in_marks).
+_IN_CHUNK = 512
+
+
+def _in_chunks(ids: List[str]) -> Iterable[Tuple[str, Tuple[Optional[str], ...]]]:
+    """(placeholders, args) per chunk of ids, padded with NULLs (which never match)."""
+    for i in range(0, len(ids), _IN_CHUNK):
+        chunk: List[Optional[str]] = list(ids[i : i + _IN_CHUNK])
+        n = in_marks(len(chunk))
+        chunk.extend([None] * (n - len(chunk)))
+        yield ",".join("?" * n), tuple(chunk)
+
+
+def runs_exist(run_ids: Iterable[str]) -> Set[str]:
+    """
+    Batched run_exists: returns the subset of run_ids present in the registry.
+    """
+    ids = sorted({r for r in run_ids if isinstance(r, str) and r})
+    if not ids:
+        return set()
+    return {run_id for run_id, run in _lookup_runs(ids).items() if run is not None}
+
+
+def get_runs(run_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Batched get_run: {run_id: run} for the run_ids present in the registry.
+    """
+    ids = sorted({r for r in run_ids if isinstance(r, str) and r})
+    if not ids:
+        return {}
+    return {run_id: _run_view(run) for run_id, run in _lookup_runs(ids).items() if run is not None}
+
+
+def lookup_runs(run_ids: List[str]) -> Dict[str, Any]:
+    """
+    Resolves many run_ids at once (get_runs); missing lists the ones not registered,
+    in request order.
+    """
+    ids = list(dict.fromkeys(r for r in run_ids if isinstance(r, str) and r))
+    if len(ids) > MAX_LOOKUP_RUNS:
+        return {"ok": False, "error": "BATCH_TOO_LARGE", "max_runs": MAX_LOOKUP_RUNS, "count": len(ids)}
+    runs = get_runs(ids)
+    return {
+        "ok": True,
+        "count": len(ids),
+        "found": len(runs),
+        "runs": runs,
+        "missing": [r for r in ids if r not in runs],
+    }
+
+
+def list_run_ids(app_id: str) -> List[str]:
+    """
+    Every run_id registered for app_id (newest first), without list_runs' page cap.
+    """
+    rows = _conn().execute(
+        "SELECT run_id FROM runs_registry WHERE app_id = ? ORDER BY created_ts DESC", (app_id,)
+    ).fetchall()
+    return [r["run_id"] for r in rows]
+
 
 def get_run_targets(run_id: str) -> Dict[str, Any]:
     """
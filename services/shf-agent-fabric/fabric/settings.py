@@ -8,3 +8,53 @@ ADMIN_API_KEY = (os.getenv("ADMIN_API_KEY", "") or "").strip()
 SECURITY_ENABLED = _env_bool("SECURITY_ENABLED", "0")
 SECURITY_BASE_URL = (os.getenv("SECURITY_BASE_URL", "http://127.0.0.1:8091") or "").strip()
 FABRIC_MODE_DEFAULT = (os.getenv("FABRIC_MODE", "ON") or "ON").strip().upper()
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int((os.getenv(key, "") or "").strip() or default)
+    except ValueError:
+        return default
+
+# Event ledger (db/ledger): segment rotation thresholds; 0 disables a threshold.
+LEDGER_SEGMENT_MAX_BYTES = _env_int("LEDGER_SEGMENT_MAX_BYTES", 64 * 1024 * 1024)
+LEDGER_SEGMENT_MAX_AGE_S = _env_int("LEDGER_SEGMENT_MAX_AGE_S", 24 * 3600)
+
+# Group-commit ledger writer (fabric/ledger/writer.py)
+LEDGER_FLUSH_INTERVAL_MS = _env_int("LEDGER_FLUSH_INTERVAL_MS", 5)
+LEDGER_MAX_BATCH = _env_int("LEDGER_MAX_BATCH", 1000)
+LEDGER_QUEUE_MAX = _env_int("LEDGER_QUEUE_MAX", 10000)
+LEDGER_FSYNC = (os.getenv("LEDGER_FSYNC", "none") or "none").strip().lower()  # none | batch | interval
+LEDGER_FSYNC_INTERVAL_MS = _env_int("LEDGER_FSYNC_INTERVAL_MS", 1000)
+LEDGER_DURABLE = _env_bool("LEDGER_DURABLE", "0")
+
+# LOE time rollups (fabric/loe/rollups.py): how long fine-grained buckets are kept; 0 = forever.
+LOE_ROLLUP_MINUTE_RETENTION_H = _env_int("LOE_ROLLUP_MINUTE_RETENTION_H", 48)
+LOE_ROLLUP_HOUR_RETENTION_D = _env_int("LOE_ROLLUP_HOUR_RETENTION_D", 90)
+LOE_ROLLUP_MINUTE_MAX_BUCKETS = _env_int("LOE_ROLLUP_MINUTE_MAX_BUCKETS", 200000)  # (scope, minute) pairs; 0 = no cap
+
+# Columnar LOE store (fabric/loe/columns.py); only active when NumPy is installed.
+LOE_COLUMNS = _env_bool("LOE_COLUMNS", "1")
+
+# Ingest dedup (fabric/ledger/dedup.py): how many recent event_ids are remembered; 0 disables.
+EVENT_DEDUP_WINDOW = _env_int("EVENT_DEDUP_WINDOW", 200000)
+
+# Ledger retention (fabric/ledger/retention.py): raw events older than this are folded into
+# frozen LOE summaries and removed from sealed segments; 0 keeps them forever. Per-app and
+# per-run overrides live in registry/retention.json. Interval 0 = run only on demand.
+LEDGER_RETENTION_DAYS = _env_int("LEDGER_RETENTION_DAYS", 0)
+LEDGER_RETENTION_INTERVAL_H = _env_int("LEDGER_RETENTION_INTERVAL_H", 0)
+
+# Live event stream (GET /events/stream, fabric/ledger/follower.py)
+EVENTS_STREAM_BUFFER = _env_int("EVENTS_STREAM_BUFFER", 1000)  # queued events per client before it is dropped
+EVENTS_STREAM_MAX_CLIENTS = _env_int("EVENTS_STREAM_MAX_CLIENTS", 100)
+EVENTS_STREAM_HEARTBEAT_S = _env_int("EVENTS_STREAM_HEARTBEAT_S", 15)
+EVENTS_STREAM_POLL_MS = _env_int("EVENTS_STREAM_POLL_MS", 500)  # picks up appends by other workers
+
+# SQLite (db/fabric.sqlite, fabric/sqlite_db.py): per-thread connections in WAL mode.
+SQLITE_SYNCHRONOUS = (os.getenv("SQLITE_SYNCHRONOUS", "NORMAL") or "NORMAL").strip().upper()  # OFF | NORMAL | FULL
+SQLITE_CACHE_KB = _env_int("SQLITE_CACHE_KB", 16 * 1024)  # page cache per connection
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_MMAP_MB = _env_int("SQLITE_MMAP_MB", 64)
+
+# Decoded run records kept in memory per worker (fabric/runs_registry/store.py); 0 disables.
+RUNS_CACHE_SIZE = _env_int("RUNS_CACHE_SIZE", 4096)
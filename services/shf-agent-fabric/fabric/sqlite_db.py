@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Set, Tuple, Union
+
+from fabric.settings import SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_KB, SQLITE_MMAP_MB, SQLITE_SYNCHRONOUS
+
+BASE = Path(__file__).resolve().parent.parent
+DB_DIR = BASE / "db"
+DB_DIR.mkdir(exist_ok=True)
+
+SQLITE_PATH = DB_DIR / "fabric.sqlite"
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL")
+# sqlite3 keeps this many compiled statements per connection, keyed by SQL text
+STATEMENT_CACHE = 256
+
+_local = threading.local()
+
+# A schema step: an SQL script, or a function run with the migration's connection
+# (for data backfills SQL cannot express). It must not commit.
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+# name -> ordered schema steps; step i (0-based) brings the schema to version i + 1
+_schemas: Dict[str, List[Step]] = {}
+_migrated: Set[Tuple[str, str]] = set()
+_migrate_lock = threading.Lock()
+
+
+def _open(path: Path) -> sqlite3.Connection:
+    con = sqlite3.connect(str(path), timeout=SQLITE_BUSY_TIMEOUT_MS / 1000.0, cached_statements=STATEMENT_CACHE)
+    con.row_factory = sqlite3.Row
+    sync = SQLITE_SYNCHRONOUS if SQLITE_SYNCHRONOUS in SYNCHRONOUS_MODES else "NORMAL"
+    # WAL: readers never block the writer (or each other); NORMAL sync is durable
+    # across application crashes and only fsyncs at checkpoints.
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute(f"PRAGMA synchronous={sync}")
+    con.execute(f"PRAGMA cache_size=-{max(0, SQLITE_CACHE_KB)}")
+    con.execute(f"PRAGMA busy_timeout={max(0, SQLITE_BUSY_TIMEOUT_MS)}")
+    con.execute(f"PRAGMA mmap_size={max(0, SQLITE_MMAP_MB) * 1024 * 1024}")
+    con.execute("PRAGMA temp_store=MEMORY")
+    return con
+
+
+def connect(path: Path = SQLITE_PATH) -> sqlite3.Connection:
+    """
+    This thread's connection to `path`, opened once and reused (so are its compiled
+    statements). `with connect() as con:` commits or rolls back without closing it.
+    A forked worker opens its own instead of inheriting the parent's.
+    """
+    pid = os.getpid()
+    pool = getattr(_local, "pool", None)
+    if pool is None or _local.pid != pid:
+        pool = _local.pool = {}
+        _local.pid = pid
+    key = str(path)
+    con = pool.get(key)
+    if con is None:
+        con = pool[key] = _open(path)
+    return con
+
+
+def register_schema(name: str, steps: Sequence[Step]) -> None:
+    """
+    Declares the schema of one store as ordered steps. Append a step to change it;
+    never edit an applied one. Applied by migrate(name).
+    """
+    _schemas[name] = list(steps)
+
+
+def migrate(name: str, path: Path = SQLITE_PATH) -> None:
+    """
+    Brings `name`'s schema up to date, once per process and database. The applied
+    version is kept in the schema_versions table and steps run in one write transaction,
+    so concurrent workers apply each step exactly once.
+    """
+    key = (name, str(path))
+    if key in _migrated:
+        return
+    with _migrate_lock:
+        if key in _migrated:
+            return
+        steps = _schemas[name]
+        con = connect(path)
+        con.execute("CREATE TABLE IF NOT EXISTS schema_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        con.commit()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute("SELECT version FROM schema_versions WHERE name = ?", (name,)).fetchone()
+            version = int(row["version"]) if row else 0
+            for step in steps[version:]:
+                if callable(step):
+                    step(con)
+                    continue
+                for stmt in _statements(step):
+                    con.execute(stmt)
+            if len(steps) > version:
+                con.execute(
+                    "INSERT INTO schema_versions (name, version) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET version = excluded.version",
+                    (name, len(steps)),
+                )
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        _migrated.add(key)
+
+
+def _statements(script: str) -> List[str]:
+    # executescript() would commit the open transaction; split complete statements instead
+    out: List[str] = []
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            out.append(buf.strip())
+            buf = ""
+    if buf.strip():
+        out.append(buf.strip())
+    return out
+
+
+def in_marks(n: int) -> int:
+    """
+    Placeholder count to use for an IN (...) list of n values: n rounded up to a power of
+    two, so variable-length lookups share a few cached statements. Pad with None.
+    """
+    size = 1
+    while size < n:
+        size *= 2
+    return size
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+from fabric.file_lock import shared_counter
+
+MISSING = object()
+
+
+class VersionedLRU:
+    """
+    Bounded LRU of read-mostly values, invalidated across worker processes.
+
+    Writers call invalidate() after committing; it bumps a SharedCounter every process
+    maps, and each process drops its entries the next time it sees a new version. A value
+    loaded while a write raced it is not stored (put() carries the version of its get()).
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = max(0, int(size))
+        self._counter = shared_counter(name)
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._version = -1
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync(self) -> int:
+        # with _lock held
+        v = self._counter.value()
+        if v != self._version:
+            if self._items:
+                self.invalidations += 1
+            self._items.clear()
+            self._version = v
+        return v
+
+    def get(self, key: Hashable) -> Tuple[Any, int]:
+        """(value, version), or (MISSING, version) to load and put() with that version."""
+        if self.size <= 0:
+            with self._lock:
+                self.misses += 1
+            return MISSING, 0
+        with self._lock:
+            v = self._sync()
+            value = self._items.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self._items.move_to_end(key)
+                self.hits += 1
+            return value, v
+
+    def put(self, key: Hashable, value: Any, version: int) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            if self._sync() != version:
+                return  # written meanwhile; the value may predate it
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Call after a committed write: every process drops its entries."""
+        self._counter.bump()
+        with self._lock:
+            self._sync()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "capacity": self.size,
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
@@ -7,9 +7,13 @@ from routers.alignment.routes_admin import router as alignment_admin_router
 from routers.alignment.routes_plans_admin import router as alignment_plans_admin_router
 from routers.health_routes import router as health_router
 from routers.admin_force_routes import router as admin_force_router
+from routers.admin_ledger_routes import router as admin_ledger_router
 from routers.api_v1 import router as api_v1_router
 from routers.loo_routes import router as loo_router
 from db.db import init_db
+from fabric.request_context import RequestContextMiddleware
+from fabric.ledger.jobs import start_scheduler as start_ledger_jobs
+from fabric.runs_registry.store import init_runs_registry
 from routers.status_routes import router as status_router
 from routers.artifacts_routes import router as artifacts_router
 from routers.registry_routes import router as registry_router
@@ -40,6 +44,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestContextMiddleware)
+app.add_event_handler("startup", start_ledger_jobs)
+app.add_event_handler("startup", init_runs_registry)
 app.include_router(alignment_gateway_router)
 app.include_router(alignment_admin_router)
 app.include_router(alignment_plans_admin_router)
@@ -60,6 +67,7 @@ app.include_router(feedback_router)
 app.include_router(reports_router)
 app.include_router(health_router)
 app.include_router(admin_force_router)
+app.include_router(admin_ledger_router)
 app.include_router(loe_router)
 app.include_router(predict_router)
 app.include_router(events_router)
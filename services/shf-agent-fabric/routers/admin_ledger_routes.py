@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from fabric.admin_auth import require_admin_key
+from fabric.events.schema import SHAPES_PATH, list_shapes
+from fabric.ledger import jobs
+from fabric.ledger.retention import load_policy
+from fabric.loe.frozen import frozen
+from fabric.ledger.segments import ledger_generation, segments
+
+router = APIRouter(
+    prefix="/admin/ledger",
+    tags=["admin-ledger"],
+    dependencies=[Depends(require_admin_key)],
+)
+
+@router.get("/segments")
+def list_segments():
+    return {
+        "generation": ledger_generation(),
+        "segments": [
+            {"seg_id": s.seg_id, "path": str(s.path), "sealed": s.sealed, "bytes": s.indexed_bytes}
+            for s in segments()
+        ],
+    }
+
+@router.get("/retention")
+def retention_status():
+    return {"policy": load_policy().to_dict(), "frozen": frozen.info()}
+
+@router.get("/shapes")
+def event_shapes():
+    return {"path": str(SHAPES_PATH), "shapes": list_shapes()}
+
+@router.get("/jobs")
+def list_jobs():
+    return {"available": sorted(jobs.JOBS), "jobs": jobs.list_jobs()}
+
+@router.post("/jobs/{name}", status_code=202)
+def start_job(name: str):
+    if name not in jobs.JOBS:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {name}")
+    try:
+        return jobs.start(name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/jobs/{job_id}/status")
+def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
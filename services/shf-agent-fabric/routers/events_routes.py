@@ -1,11 +1,19 @@
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
 import os
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
+from fabric.events.batch import MAX_BATCH_BYTES, MAX_BATCH_EVENTS, BatchParser, ingest_batch
+from fabric.events.query import MAX_QUERY_LIMIT, run_query
 from fabric.events.schema import normalize_event
+from fabric.ledger.follower import Subscription, follower, format_cursor, parse_cursor
+from fabric.loe.accumulator import LoeAccumulator
 from fabric.run_ledger import write_run_event
 from fabric.runs_registry.store import run_exists
+from fabric.settings import EVENTS_STREAM_HEARTBEAT_S
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -29,9 +37,164 @@ def ingest(body: EventBody):
         if not run_exists(run_id.strip()):
             raise HTTPException(status_code=404, detail=f"Unknown run_id: {run_id}")
 
-    write_run_event(body.event)  # ledger normalizes again on write; safe
-    return {"ok": True, "normalized": norm}
+    written = write_run_event(norm, normalized=True)
+    return {"ok": True, "normalized": norm, "duplicate": written["duplicate"]}
+
+@router.post("/ingest_batch")
+async def ingest_batch_route(request: Request, durable: Optional[bool] = Query(default=None)):
+    """
+    Bulk ingest. Body is NDJSON (one event per line) or a JSON array of events,
+    parsed incrementally as it streams in. Each event is normalized once, strict-mode
+    run_ids are checked in one registry query, and all valid events go to the ledger
+    in a single write. Response reports accept/reject per line (or array element).
+    Bodies over MAX_BATCH_BYTES or MAX_BATCH_EVENTS items are refused with 413
+    without being read to the end.
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail={"ok": False, "error": "BATCH_TOO_LARGE", "max_events": MAX_BATCH_EVENTS, "max_bytes": MAX_BATCH_BYTES},
+    )
+    try:
+        declared = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        declared = 0
+    if declared > MAX_BATCH_BYTES:
+        raise too_large
+
+    parser = BatchParser()
+    items = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_BATCH_BYTES:
+            raise too_large
+        items.extend(parser.feed(chunk))
+        if len(items) > MAX_BATCH_EVENTS:
+            raise too_large
+    items.extend(parser.feed(b"", final=True))
+    if len(items) > MAX_BATCH_EVENTS:
+        raise too_large
+    return await run_in_threadpool(ingest_batch, items, _strict_enabled(), durable)
 
 @router.post("/normalize")
 def normalize_only(body: EventBody):
     return {"ok": True, "normalized": normalize_event(body.event)}
+
+@router.get("/query")
+def query_events(
+    app_id: Optional[str] = Query(default=None),
+    run_id: Optional[str] = Query(default=None),
+    step_id: Optional[str] = Query(default=None),
+    session_id: Optional[str] = Query(default=None),
+    cohort_id: Optional[str] = Query(default=None),
+    actor_type: Optional[str] = Query(default=None),
+    action: Optional[str] = Query(default=None),
+    since: Optional[str] = Query(default=None),
+    until: Optional[str] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=MAX_QUERY_LIMIT),
+    fields: Optional[str] = Query(default=None),
+):
+    """
+    Raw ledger records, oldest-first, filtered by exact context ids, actor_type, action
+    and since/until (ISO, until exclusive). Filters are answered from the ledger index.
+    Pass `next_cursor` back as `cursor` for the next page (null on the last page);
+    `fields` is a comma list of dotted paths to return, e.g. event_id,ts,context.run_id.
+    """
+    context = {
+        "app_id": app_id,
+        "run_id": run_id,
+        "step_id": step_id,
+        "session_id": session_id,
+        "cohort_id": cohort_id,
+    }
+    try:
+        return run_query(context, actor_type, action, since, until, cursor, limit, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"ok": False, "error": str(e)})
+
+REPLAY_CHUNK = 500
+
+def _sse(event: str, data: Any, cursor: Optional[Tuple[int, int]] = None) -> str:
+    head = f"id: {format_cursor(cursor)}\n" if cursor is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def _loe_delta(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    acc = LoeAccumulator()
+    for e in events:
+        acc.add(e)
+    return acc.counters()
+
+def _take(it: Iterator[Any], n: int) -> List[Any]:
+    out = []
+    for item in it:
+        out.append(item)
+        if len(out) >= n:
+            break
+    return out
+
+async def _stream(request: Request, sub: Subscription, cursor: Optional[Tuple[int, int]], loe: bool):
+    last = cursor or sub.start
+    replay = sub.replay(cursor)
+    try:
+        yield "retry: 3000\n" + _sse("ready", {"cursor": format_cursor(sub.start), "replay": cursor is not None})
+        # catch up from the client's cursor, in chunks read off the event loop
+        while True:
+            chunk = await run_in_threadpool(_take, replay, REPLAY_CHUNK)
+            if not chunk:
+                break
+            for pos, e in chunk:
+                yield _sse("ledger", e, pos)
+            last = chunk[-1][0]
+            if loe:
+                yield _sse("loe_delta", _loe_delta([e for _, e in chunk]))
+        # then live batches from the shared tail follower
+        while not await request.is_disconnected():
+            got = await sub.get(EVENTS_STREAM_HEARTBEAT_S)
+            if sub.dropped:
+                yield _sse("error", {"error": "SLOW_CONSUMER", "cursor": format_cursor(last)})
+                break
+            if got is None:
+                yield ": ping\n\n"
+                continue
+            pos, events = got
+            # the cursor is per append batch, so it rides on the batch's last event
+            for i, e in enumerate(events):
+                yield _sse("ledger", e, pos if i == len(events) - 1 else None)
+            last = pos
+            if loe:
+                yield _sse("loe_delta", _loe_delta(events))
+    finally:
+        replay.close()
+        follower.unsubscribe(sub)
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    app_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    loe: bool = False,
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+):
+    """
+    Server-sent events of canonical ledger records matching app_id/run_id.
+
+    Starts live at the tail, or replays from `cursor` (or the Last-Event-ID header on
+    reconnect) first. Each `ledger` event's id is a resume cursor; loe=true adds
+    `loe_delta` events with additive LOE counters for each delivered batch. A client
+    that falls behind gets an `error` event (SLOW_CONSUMER) with its cursor and is closed.
+    """
+    try:
+        start = parse_cursor(last_event_id or cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"ok": False, "error": str(e)})
+    try:
+        sub = follower.subscribe(app_id, run_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail={"ok": False, "error": str(e)})
+    return StreamingResponse(
+        _stream(request, sub, start, loe),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
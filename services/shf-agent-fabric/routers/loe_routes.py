@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
+from fabric.loe.series import compute_loe_series
 from fabric.loe.signals import compute_loe_signals
 
 router = APIRouter(prefix="/loe", tags=["loe"])
 
+# The window is counted after filtering. Before the segmented ledger, limit took the
+# last N ledger lines and filtered those, so a filtered window could hold fewer events.
+LIMIT_DESCRIPTION = "newest `limit` events matching app_id/run_id/since/until (counted after filtering, not the last `limit` ledger lines)"
+
 @router.get("/health")
 def loe_health(
-    limit: int = Query(default=5000, ge=10, le=200000),
+    limit: int = Query(default=5000, ge=10, le=200000, description=LIMIT_DESCRIPTION),
     app_id: Optional[str] = Query(default=None),
     run_id: Optional[str] = Query(default=None),
     since: Optional[str] = Query(default=None),
+    until: Optional[str] = Query(default=None),
 ):
-    res = compute_loe_signals(limit=limit, app_id=app_id, run_id=run_id, since=since)
+    res = compute_loe_signals(limit=limit, app_id=app_id, run_id=run_id, since=since, until=until)
     return {
         "ok": res.get("ok", True),
         "health": res.get("health", "GREEN"),
@@ -27,9 +33,23 @@ def loe_health(
 
 @router.get("/signals")
 def loe_signals(
-    limit: int = Query(default=5000, ge=10, le=200000),
+    limit: int = Query(default=5000, ge=10, le=200000, description=LIMIT_DESCRIPTION),
     app_id: Optional[str] = Query(default=None),
     run_id: Optional[str] = Query(default=None),
     since: Optional[str] = Query(default=None),
+    until: Optional[str] = Query(default=None),
+):
+    return compute_loe_signals(limit=limit, app_id=app_id, run_id=run_id, since=since, until=until)
+
+@router.get("/series")
+def loe_series(
+    since: str = Query(...),
+    until: Optional[str] = Query(default=None),
+    step: str = Query(default="1h"),
+    app_id: Optional[str] = Query(default=None),
+    run_id: Optional[str] = Query(default=None),
 ):
-    return compute_loe_signals(limit=limit, app_id=app_id, run_id=run_id, since=since)
+    try:
+        return compute_loe_series(since=since, until=until, step=step, app_id=app_id, run_id=run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"ok": False, "error": str(e)})
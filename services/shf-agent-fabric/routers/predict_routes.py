@@ -1,9 +1,9 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Query
 from pydantic import BaseModel
 
 from fabric.predict.forecast import build_forecast
-from fabric.predict.forecast_run import forecast_run
+from fabric.predict.forecast_run import forecast_batch, forecast_run
 
 router = APIRouter(prefix="/predict", tags=["predict"])
 
@@ -52,3 +52,19 @@ def predict_forecast_run(body: PredictRunBody):
         limit=body.limit,
         since=body.since,
     )
+
+
+class PredictBatchBody(BaseModel):
+    run_ids: Optional[List[str]] = None
+    app_id: Optional[str] = None
+    limit: int = 5000
+    since: Optional[str] = None
+
+@router.post("/forecast_batch")
+def predict_forecast_batch(body: PredictBatchBody):
+    return forecast_batch(
+        run_ids=body.run_ids,
+        app_id=body.app_id,
+        limit=body.limit,
+        since=body.since,
+    )
@@ -14,6 +14,7 @@ from fastapi.responses import JSONResponse, Response
 from fastapi import Header
 from fabric.force_mode import apply_force
 from fabric.force_ledger import append_force_event
+from fabric.runs_registry.store import export_run_doc, get_run_doc, get_run_proof, mark_run_published, save_run_doc
 
 from fabric.reports.funder_report import build_funder_report
 from fabric.reports.pdf_report import build_funder_report_pdf
@@ -146,12 +147,7 @@ def _append_audit(event: dict) -> None:
         f.write(json.dumps(event, ensure_ascii=False) + "\n")
 
 def _load_run_meta(run_id: str) -> dict:
-    from pathlib import Path
-    import json
-    fp = Path(__file__).resolve().parent.parent / "registry" / "runs" / f"{_rid(run_id)}.json"
-    if fp.exists():
-        return json.loads(fp.read_text(encoding="utf-8"))
-    return {}
+    return get_run_doc(_rid(run_id)) or {}
 
 def _policy_check_run_meta(meta: dict) -> dict:
     run_obj = meta.get("run") if isinstance(meta.get("run"), dict) else meta
@@ -196,38 +192,27 @@ def _policy_check(run_obj: dict) -> dict:
 
 from datetime import datetime, timezone
 
-def _runs_dir() -> Path:
-    d = _service_root() / "registry" / "runs"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
-
 def _write_run_stub(run_id: str, meta: Dict[str, Any]) -> Path:
     rid = _rid(run_id)
-    fp = _runs_dir() / f"{rid}.json"
     doc = {"run_id": rid, "meta": meta or {}, "created_ts": datetime.now(timezone.utc).isoformat()}
-    fp.write_text(json.dumps(doc, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    return fp
+    save_run_doc(rid, doc)
+    return export_run_doc(rid)
 
 @router.get("/reports/{run_id}/policy")
 def get_run_policy(run_id: str):
     rid = _rid(run_id)
 
-    base = _service_root()
-    run_fp = base / "registry" / "runs" / f"{rid}.json"
-    if not run_fp.exists():
+    doc = get_run_doc(rid)
+    if doc is None:
         raise HTTPException(status_code=404, detail={"ok": False, "error": "run_not_found", "run_id": rid})
 
-    doc = json.loads(run_fp.read_text(encoding="utf-8"))
-
     run_obj = doc.get("run") if isinstance(doc.get("run"), dict) else doc
     policy = doc.get("policy") if isinstance(doc.get("policy"), dict) else {}
 
     status = _policy_check_run_meta(doc)
 
-    pub_dir = base / "registry" / "published" / rid
-    proof_fp = pub_dir / "proof.json"
-    published = proof_fp.exists()
-    proof = json.loads(proof_fp.read_text(encoding="utf-8")) if published else None
+    published = bool(doc.get("published_at"))
+    proof = get_run_proof(rid) if published else None
 
     publish_allowed = bool(policy.get("publish_allowed", True))
     data_allowed = bool(policy.get("data_allowed", True))
@@ -288,15 +273,11 @@ def publish_report(run_id: str, x_force: str | None = Header(default=None), x_fo
     _append_audit({"event": "publish_attempt", "run_id": rid})
 
     base = _service_root()
-    runs_dir = base / "registry" / "runs"
     pub_dir = base / "registry" / "published" / rid
-    pub_dir.mkdir(parents=True, exist_ok=True)
 
-    run_file = runs_dir / f"{rid}.json"
-    if not run_file.exists():
+    run_doc = get_run_doc(rid)
+    if run_doc is None:
         raise HTTPException(status_code=404, detail={"ok": False, "error": "run_not_found", "run_id": rid})
-
-    run_doc = json.loads(run_file.read_text(encoding="utf-8"))
     policy = run_doc.get("policy") if isinstance(run_doc.get("policy"), dict) else {}
     visibility = (policy.get("visibility") or "PRIVATE").upper()
 
@@ -315,11 +296,13 @@ def publish_report(run_id: str, x_force: str | None = Header(default=None), x_fo
     if issues:
         raise HTTPException(status_code=403, detail={"ok": False, "error": "policy_blocked", "run_id": rid, "issues": issues})
 
-    proof_path = pub_dir / "proof.json"
-    if proof_path.exists():
-        proof = json.loads(proof_path.read_text(encoding="utf-8"))
+    if run_doc.get("published_at"):
+        proof = get_run_proof(rid)
         raise HTTPException(status_code=409, detail={"ok": False, "error": "already_published", "run_id": rid, "proof": proof})
 
+    pub_dir.mkdir(parents=True, exist_ok=True)
+    proof_path = pub_dir / "proof.json"
+
     # Build report + pdf bytes using existing helpers
     report_obj = _build_report_object(rid, limit=5000, since=None)
     report_sha = _sha256_json(report_obj)
@@ -349,9 +332,8 @@ def publish_report(run_id: str, x_force: str | None = Header(default=None), x_fo
 
     proof_path.write_text(json.dumps(proof, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
 
-    run_doc["published_at"] = published_at
-    run_doc["published"] = {"report_sha256": report_sha, "pdf_sha256": pdf_sha, "urls": proof["urls"]}
-    run_file.write_text(json.dumps(run_doc, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    mark_run_published(rid, published_at, proof)
+    export_run_doc(rid)
 
     _append_audit({"event": "publish", "run_id": rid, "ts": published_at, "report_sha256": report_sha, "pdf_sha256": pdf_sha})
 
@@ -396,13 +378,7 @@ from fastapi import Request
 @router.get("/public/{run_id}")
 def runs_public(request: Request, run_id: str):
     base = Path(__file__).resolve().parents[1]
-    reg = base / "registry"
-    run_file = reg / "runs" / f"{run_id}.json"
-
-    pub_dir = reg / "published" / run_id
-    pub_report = pub_dir / "report.json"
-    pub_pdf = pub_dir / "report.pdf"
-    pub_proof = pub_dir / "proof.json"
+    pub_dir = base / "registry" / "published" / run_id
 
     origin = str(request.base_url).rstrip("/")
 
@@ -413,11 +389,15 @@ def runs_public(request: Request, run_id: str):
         "verify": f"{origin}/runs/report/{run_id}/verify"
     }
 
-    if not run_file.exists() and not pub_dir.exists():
+    doc = get_run_doc(run_id)
+    if doc is not None:
+        published_ok = bool(doc.get("published_at"))
+    elif pub_dir.exists():
+        # published artifacts without a registered run
+        published_ok = all((pub_dir / f).exists() for f in ("report.json", "report.pdf", "proof.json"))
+    else:
         raise HTTPException(status_code=404, detail={"ok": False, "error": "run_not_found", "run_id": run_id})
 
-    published_ok = pub_report.exists() and pub_pdf.exists() and pub_proof.exists()
-
     out = {"ok": True, "run_id": run_id, "published": bool(published_ok), "urls": live_urls}
 
     if published_ok:
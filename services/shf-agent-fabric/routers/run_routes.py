@@ -5,11 +5,25 @@ from fabric.runtime_state import get_mode
 from fabric.agent_state import agent_allowed
 from fabric.feedback import log_event
 from fabric.planner import build_plan
-from fabric.run_ledger import write_run_event
+from fabric.run_ledger import FABRIC_APP_ID, write_run_event
 import secrets
 
 router = APIRouter(tags=["run"])
 
+def _ledger_event(request_id: str, outcome: str, message: str, agent: dict | None = None, **detail):
+    # canonical ledger record for a /run decision; route specifics go under `detail`
+    d = {"request_id": request_id, "message": message}
+    if agent:
+        d.update(agent_name=agent.get("name"), agent_id=agent.get("agentId"), layer=agent.get("layer"))
+    d.update(detail)
+    write_run_event({
+        "actor_type": "system",
+        "action": "run",
+        "outcome": outcome,
+        "context": {"app_id": FABRIC_APP_ID},
+        "detail": {k: v for k, v in d.items() if v is not None},
+    })
+
 class RunBody(BaseModel):
     agentName: str
     input: dict
@@ -20,13 +34,13 @@ def run(body: RunBody):
 
     if get_mode() != "ON":
         log_event(kind="run", outcome="blocked", message="FABRIC_MODE=OFF", request_id=request_id)
-        write_run_event(request_id=request_id, route="run", outcome="blocked", message="FABRIC_MODE=OFF")
+        _ledger_event(request_id, "blocked", "FABRIC_MODE=OFF")
         return {"ok": False, "requestId": request_id, "blocked": True, "reason": "FABRIC_MODE=OFF"}
 
     agent = find_agent_by_name(body.agentName)
     if not agent:
         log_event(kind="run", outcome="error", message=f"unknown agent {body.agentName}", request_id=request_id)
-        write_run_event(request_id=request_id, route="run", outcome="error", message="unknown agent")
+        _ledger_event(request_id, "error", "unknown agent")
         return {"ok": False, "requestId": request_id, "error": "unknown agent"}
 
     if not agent_allowed(agent):
@@ -39,15 +53,7 @@ def run(body: RunBody):
             message="agent or layer disabled",
             request_id=request_id,
         )
-        write_run_event(
-            request_id=request_id,
-            route="run",
-            outcome="blocked",
-            agent_name=agent.get("name"),
-            agent_id=agent.get("agentId"),
-            layer=agent.get("layer"),
-            message="agent or layer disabled",
-        )
+        _ledger_event(request_id, "blocked", "agent or layer disabled", agent)
         return {"ok": False, "requestId": request_id, "blocked": True, "reason": "agent or layer disabled"}
 
     policy = agent.get("policy") or {}
@@ -63,17 +69,7 @@ def run(body: RunBody):
             message=msg,
             request_id=request_id,
         )
-        write_run_event(
-            request_id=request_id,
-            route="run",
-            outcome="blocked",
-            agent_name=agent.get("name"),
-            agent_id=agent.get("agentId"),
-            layer=agent.get("layer"),
-            plan=plan_obj,
-            input_data=body.input,
-            message=msg,
-        )
+        _ledger_event(request_id, "blocked", msg, agent, plan=plan_obj, input_data=body.input)
         return {"ok": False, "requestId": request_id, "blocked": True, "reason": "approval required", "plan": plan_obj}
 
     output = {
@@ -91,17 +87,7 @@ def run(body: RunBody):
         message="stub run executed",
         request_id=request_id,
     )
-    write_run_event(
-        request_id=request_id,
-        route="run",
-        outcome="ok",
-        agent_name=agent.get("name"),
-        agent_id=agent.get("agentId"),
-        layer=agent.get("layer"),
-        input_data=body.input,
-        output_data=output,
-        message="stub run executed",
-    )
+    _ledger_event(request_id, "ok", "stub run executed", agent, input_data=body.input, output_data=output)
 
     return {
         "ok": True,
@@ -1,8 +1,8 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Query
 from pydantic import BaseModel, Field
 
-from fabric.runs_registry.store import register_run, get_run, list_runs
+from fabric.runs_registry.store import register_run, register_runs, get_run, list_runs, lookup_runs, run_cache_stats
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 
@@ -42,12 +42,54 @@ def runs_register(body: RunRegisterBody):
     )
 
 
+class RunRegisterBatchBody(BaseModel):
+    runs: List[RunRegisterBody]
+
+
+@router.post("/register_batch")
+def runs_register_batch(body: RunRegisterBatchBody):
+    # Upsert, one transaction
+    return register_runs([r.model_dump() for r in body.runs])
+
+
+class RunLookupBody(BaseModel):
+    run_ids: List[str]
+
+
+@router.post("/lookup")
+def runs_lookup(body: RunLookupBody):
+    return lookup_runs(body.run_ids)
+
+
 @router.get("")
 def runs_list(
     app_id: Optional[str] = Query(default=None),
+    owner: Optional[str] = Query(default=None),
+    mode: Optional[str] = Query(default=None),
+    site: Optional[str] = Query(default=None),
+    start_from: Optional[str] = Query(default=None, description="ISO timestamp or date; start_ts >= start_from"),
+    end_to: Optional[str] = Query(default=None, description="ISO timestamp or date; end_ts <= end_to"),
+    published: Optional[bool] = Query(default=None),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
     limit: int = Query(default=50, ge=1, le=500),
 ):
-    return list_runs(app_id=app_id, limit=limit)
+    return list_runs(
+        app_id=app_id,
+        limit=limit,
+        owner=owner,
+        mode=mode,
+        site=site,
+        start_from=start_from,
+        end_to=end_to,
+        published=published,
+        cursor=cursor,
+    )
+
+
+@router.get("/cache/stats")
+def runs_cache_stats():
+    # per worker process
+    return run_cache_stats()
 
 
 @router.get("/{run_id}")
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import heapq
+import itertools
 import json
 import secrets
 import hashlib
@@ -7,6 +9,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 from fastapi import APIRouter, HTTPException, Header
 from fabric.loo.validator import validate_report
+from fabric.ledger.scan import field_pattern
+from fabric.ledger.segments import iter_events
+from fabric.run_ledger import EXECUTION_LOG, FABRIC_APP_ID, write_run_event
 
 from fabric.security import require_admin_key
 
@@ -15,7 +20,6 @@ router = APIRouter(prefix="/runs", tags=["runs"])
 ROOT = Path(__file__).resolve().parents[1]
 PLANS_DIR = ROOT / "db" / "plans"
 ARTIFACTS_DIR = ROOT / "db" / "artifacts"
-RUNS_LOG = ROOT / "db" / "runs" / "events.jsonl"
 
 def _utc_stamp() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
@@ -27,11 +31,6 @@ def _write_json(p: Path, obj: dict):
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(json.dumps(obj, indent=2, sort_keys=True) + "\n", encoding="utf-8")
 
-def _append_run_event(ev: dict):
-    RUNS_LOG.parent.mkdir(parents=True, exist_ok=True)
-    with RUNS_LOG.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(ev, sort_keys=True) + "\n")
-
 def _canon(obj: object) -> bytes:
     return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
 
@@ -200,43 +199,72 @@ def execute_run(payload: dict, x_admin_key: str | None = Header(default=None, al
     _write_json(plan_path, plan)
 
     run_id = secrets.token_hex(6)
-    _append_run_event({
-        "id": None,
-        "ts": datetime.now(timezone.utc).isoformat(),
-        "kind": "execute",
+    write_run_event({
+        "actor_type": "staff",
+        "action": "execute",
         "outcome": "ok",
-        "agentName": (plan.get("agent") or {}).get("name"),
-        "agentId": (plan.get("agent") or {}).get("agentId"),
-        "layer": (plan.get("agent") or {}).get("layer"),
-        "message": "plan executed",
-        "requestId": plan.get("requestId"),
-        "runId": run_id,
-        "planId": plan_id,
-        "snapshotSha256": snapshot_hash,
-        "northStar": v.get("northStar"),
-        "artifacts": artifacts_written,
+        "context": {"app_id": FABRIC_APP_ID, "run_id": run_id, "plan_id": plan_id},
+        "detail": {
+            "agentName": (plan.get("agent") or {}).get("name"),
+            "agentId": (plan.get("agent") or {}).get("agentId"),
+            "layer": (plan.get("agent") or {}).get("layer"),
+            "message": "plan executed",
+            "requestId": plan.get("requestId"),
+            "snapshotSha256": snapshot_hash,
+            "northStar": v.get("northStar"),
+            "artifacts": artifacts_written,
+        },
     })
 
     return {"ok": True, "runId": run_id, "planId": plan_id, "snapshotSha256": snapshot_hash, "northStar": v.get("northStar"), "results": results}
 
+# detail keys of an execute record, in the flat shape /runs/recent has always returned
+_RECENT_DETAIL_KEYS = ("agentName", "agentId", "layer", "message", "requestId", "snapshotSha256", "northStar", "artifacts")
+
+def _is_execute(e) -> bool:
+    return isinstance(e, dict) and e.get("action") == "execute"
+
+def _is_merged_execute(e) -> bool:
+    # execution-log records merged before they were stamped with FABRIC_APP_ID
+    ctx = e.get("context") if _is_execute(e) else None
+    return isinstance(ctx, dict) and not ctx.get("app_id") and bool(ctx.get("plan_id"))
+
+def _recent_record(e: dict) -> dict:
+    ctx = e.get("context") or {}
+    detail = e.get("detail") or {}
+    rec = {
+        "id": e.get("event_id"),
+        "ts": e.get("ts"),
+        "kind": e.get("action"),
+        "outcome": e.get("outcome"),
+        "runId": ctx.get("run_id"),
+        "planId": ctx.get("plan_id"),
+    }
+    for k in _RECENT_DETAIL_KEYS:
+        rec[k] = detail.get(k)
+    return rec
+
 @router.get("/recent")
 def recent_runs(limit: int = 50, x_admin_key: str | None = Header(default=None, alias="X-Admin-Key")):
     require_admin_key(x_admin_key)
 
-    if not RUNS_LOG.exists():
+    if limit <= 0:
         return {"events": []}
-
-    lines = RUNS_LOG.read_text(encoding="utf-8").splitlines()
-    events = []
-    for line in reversed(lines):
-        if not line.strip():
-            continue
-        try:
-            events.append(json.loads(line))
-        except Exception:
-            continue
-        if len(events) >= limit:
-            break
+    # fabric records come from the app_id postings; merged execution-log records that
+    # predate the stamp are only looked for up to the log's last write
+    streams = [iter_events(app_id=FABRIC_APP_ID, match=_is_execute)]
+    if EXECUTION_LOG.exists():
+        streams.append(iter_events(
+            until_ms=int(EXECUTION_LOG.stat().st_mtime * 1000) + 1,
+            match=_is_merged_execute,
+            prefilter=field_pattern("action", ["execute"]),
+        ))
+    try:
+        newest = heapq.merge(*streams, key=lambda e: e.get("ts_ms") or 0, reverse=True)
+        events = [_recent_record(e) for e in itertools.islice(newest, limit)]
+    finally:
+        for it in streams:
+            it.close()
     return {"events": events}
 
 @router.post("/loo/validate")